@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""fake_cli.py — Substituto roteirizado de kubectl/kind/helm/docker/scrapy
+para o benchmark dos scripts do cluster local (ver k8s_local_bench.py).
+
+Chamado pelos shims que o benchmark coloca no PATH, como
+`fake_cli.py <ferramenta> <args...>`. Procura, nas regras da ferramenta no
+arquivo de cenários, a primeira cuja regex casa com os argumentos (unidos
+por espaço) e cujas condições de estado valem; então espera a latência
+configurada, escreve a saída roteirizada e sai com o código da regra.
+
+O estado do "cluster" é um conjunto de flags (arquivos num diretório):
+regras podem exigir (`when`), proibir (`unless`), ligar (`set`) e desligar
+(`unset`) flags — ex: `kind create cluster` liga "cluster", e a partir daí
+`kind get clusters` passa a listá-lo.
+
+Variáveis de ambiente (definidas pelo benchmark):
+    QD_FAKE_SCENARIOS   arquivo JSON com as regras
+    QD_FAKE_STATE       diretório das flags de estado
+    QD_FAKE_LOG         arquivo onde cada chamada é registrada (JSON lines)
+    QD_FAKE_TIME_SCALE  multiplicador das latências (padrão 1.0)
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+
+def _flags(state_dir: Path) -> set[str]:
+    return {p.name for p in state_dir.iterdir()} if state_dir.is_dir() else set()
+
+
+def _match(rules: list[dict], argline: str, flags: set[str]) -> dict | None:
+    for rule in rules:
+        if not re.search(rule.get("match", ""), argline):
+            continue
+        if not set(rule.get("when", [])) <= flags:
+            continue
+        if set(rule.get("unless", [])) & flags:
+            continue
+        return rule
+    return None
+
+
+class _OkHandler(BaseHTTPRequestHandler):
+    """Responde 200 + `{}` a qualquer requisição (serviço atrás do port-forward)."""
+
+    def _reply(self) -> None:
+        body = b"{}"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    do_GET = do_HEAD = do_PUT = do_POST = _reply
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def _serve_port_forward(args: list[str]) -> None:
+    """`kubectl port-forward svc/x LOCAL:REMOTE`: escuta em LOCAL até ser
+    terminado (como o kubectl de verdade)."""
+    ports = next(a for a in args if re.fullmatch(r"\d+:\d+", a))
+    server = ThreadingHTTPServer(("127.0.0.1", int(ports.split(":")[0])), _OkHandler)
+    server.serve_forever()
+
+
+def main() -> int:
+    tool, args = sys.argv[1], sys.argv[2:]
+    argline = " ".join(args)
+    state_dir = Path(os.environ["QD_FAKE_STATE"])
+    scale = float(os.environ.get("QD_FAKE_TIME_SCALE", "1.0"))
+    rules = json.loads(Path(os.environ["QD_FAKE_SCENARIOS"]).read_text(encoding="utf-8"))["tools"].get(tool, [])
+
+    rule = _match(rules, argline, _flags(state_dir))
+    with open(os.environ["QD_FAKE_LOG"], "a", encoding="utf-8") as f:
+        f.write(json.dumps({"tool": tool, "args": args, "matched": rule is not None}) + "\n")
+    if rule is None:
+        print(f"fake {tool}: nenhuma regra para '{argline}'", file=sys.stderr)
+        return 0
+
+    time.sleep(rule.get("delay", 0.0) * scale)
+    for flag in rule.get("set", []):
+        (state_dir / flag).touch()
+    for flag in rule.get("unset", []):
+        (state_dir / flag).unlink(missing_ok=True)
+    if rule.get("stdout"):
+        sys.stdout.write(rule["stdout"])
+    if rule.get("stderr"):
+        sys.stderr.write(rule["stderr"])
+    sys.stdout.flush()
+    if rule.get("serve"):
+        _serve_port_forward(args)
+    return rule.get("exit", 0)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
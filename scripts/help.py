@@ -13,11 +13,18 @@ SECTIONS = [
     ]),
     ("Kubernetes local (kind)", [
         ("make k8s-local-up", "cria cluster kind + sobe ambiente dev"),
+        ("make k8s-local-up FORCE=<passo|all>", "refaz passos que o modo incremental pularia"),
         ("make k8s-local-down", "destroi o cluster kind"),
+        ("make k8s-local-pause", "pausa o cluster kind (preserva dados; retome com k8s-local-up)"),
+        ("make k8s-local-snapshot [SNAPSHOT=<arquivo>]", "exporta os dados do cluster (Postgres, OpenSearch, Garage)"),
+        ("make k8s-local-restore SNAPSHOT=<arquivo>", "restaura um snapshot no cluster"),
+        ("make k8s-local-bench [UPDATE_BASELINE=1]", "benchmark dos scripts com kubectl/kind/helm/docker falsos"),
         ("make k8s-local-status", "status dos pods"),
         ("make k8s-local-hosts", "adiciona entradas ao hosts file"),
+        ("make k8s-local-forwards", "daemon de port-forwards compartilhados (status: -status, parar: -stop)"),
         ("make k8s-local-garage-ui", "port-forward Garage UI -> localhost:3909"),
         ("make k8s-local-data-processing", "executa data-processing manualmente"),
+        ("make k8s-local-data-processing-run", "idem, seguindo o log até o fim + relatório de vazão (JSON)"),
     ]),
     ("Kubernetes (kustomize)", [
         ("make k8s-build-dev", "dry-run overlay dev"),
@@ -28,10 +35,13 @@ SECTIONS = [
         ("make k8s-diff-prod", "diff entre cluster e overlay producao"),
     ]),
     ("Raspadores (execução local)", [
-        ("make spider-setup", "cria venv e instala deps (uma vez)"),
-        ("make spider-list", "lista todos os spiders"),
+        ("make spider-setup", "cria/atualiza venv e deps (incremental, com wheelhouse)"),
+        ("make spider-list [STATE=sp] [DETAILS=1]", "lista os spiders (índice estático, sem importar o Scrapy)"),
         ("make run-spider SPIDER=<nome>", ""),
         ("make run-spider SPIDER=<nome> START=YYYY-MM-DD END=YYYY-MM-DD", ""),
+        ("make run-spider SPIDER=<nome> START=YYYY-MM-DD SHARD_BY=month [JOBS=4]", "backfill em janelas paralelas, retomável"),
+        ("make backfill-spider SPIDER=<nome> [DRY_RUN=1]", "crawleia só as lacunas de datas no banco"),
+        ("make run-spiders SPIDERS=\"ba_* sp_campinas\" [JOBS=4]", "vários spiders em paralelo (ou FILE=<arquivo>)"),
     ]),
     ("Build local (com cache remoto)", [
         ("make build-api", "API"),
@@ -51,8 +61,22 @@ VARS = [
     ("DATA_PROCESSING_DIR=<path>", "padrao: ../querido-diario-data-processing"),
     ("FRONTEND_DIR=<path>", "padrao: ../querido-diario-frontend"),
     ("SPIDER=<nome>", "nome do spider a executar"),
+    ("SPIDERS=\"<nomes/globs>\"", "run-spiders: spiders a executar (ex: \"ba_* sp_campinas\")"),
+    ("FILE=<arquivo>", "run-spiders: arquivo com um spider (ou glob) por linha"),
+    ("STATE=\"<UFs>\"", "spider-list/run-spiders: só spiders dessas UFs (ex: \"sp ba\")"),
+    ("ZYTE=1|0", "spider-list/run-spiders: só spiders com (1) ou sem (0) Zyte Smart Proxy"),
+    ("DETAILS=1", "spider-list: tabela com início, Zyte, territórios e arquivo"),
+    ("DRY_RUN=1", "backfill-spider: só mostra os intervalos que seriam crawleados"),
+    ("SHARD_BY=month|year", "run-spider: divide START..END em janelas (com checkpoint)"),
+    ("JOBS=<n>", "run-spiders/run-spider com SHARD_BY: crawls simultâneos (padrao: 4)"),
     ("START=YYYY-MM-DD", "data de inicio do raspador (opcional)"),
     ("END=YYYY-MM-DD", "data de fim do raspador (opcional)"),
+    ("FORCE=<passo|all>", "k8s-local-up: ignora o estado incremental do passo"),
+    ("SNAPSHOT=<arquivo>", "k8s-local-snapshot/k8s-local-restore: arquivo .tar.gz do snapshot"),
+    ("REPORT=<arquivo>", "k8s-local-data-processing-run: onde gravar o relatório JSON"),
+    ("SHARDS=<n>", "k8s-local-data-processing-run: divide os diários pendentes entre n pods (exige QD_SHARDED_PIPELINE=1)"),
+    ("PARALLELISM=<n>", "k8s-local-data-processing-run com SHARDS: pods simultâneos (padrao: todos)"),
+    ("UPDATE_BASELINE=1", "k8s-local-bench: regrava scripts/bench/baseline.json"),
     ("PYTHON=<binario>", "interpretador usado pelos scripts (padrao: python3)"),
 ]
 
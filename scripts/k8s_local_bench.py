@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""k8s_local_bench.py — Benchmark determinístico dos scripts do cluster local
+(k8s_local_up.py, k8s_local_down.py, spider.py), sem Docker nem rede.
+
+Coloca no PATH versões falsas de kubectl/kind/helm/docker (e um scrapy falso
+num venv de mentira em QD_DIR), com latências e saídas roteirizadas em
+scripts/bench/scenarios.json (ver scripts/bench/fake_cli.py), e roda cada
+cenário (cold, warm, no-op, resume...) com HOME e cache isolados num
+diretório temporário. Compara o número de chamadas a cada ferramenta e o
+tempo de parede com scripts/bench/baseline.json e falha se algum cenário
+fizer mais chamadas ou ficar mais lento que a tolerância.
+
+Uso:
+    python3 scripts/k8s_local_bench.py [--scenario NOME ...] [--repeat N]
+                                       [--tolerance FRAÇÃO] [--update-baseline]
+
+Só POSIX (os shims são scripts sh).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import pycommon as pc  # noqa: E402
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+BENCH_DIR = SCRIPTS_DIR / "bench"
+SCENARIOS_FILE = BENCH_DIR / "scenarios.json"
+BASELINE_FILE = BENCH_DIR / "baseline.json"
+FAKE_CLI = BENCH_DIR / "fake_cli.py"
+
+RUN_TIMEOUT = 300
+# Folga absoluta somada à tolerância relativa do tempo de parede: cenários
+# curtos (~1s) variam mais em proporção do que os longos.
+WALL_SLACK_S = 0.5
+
+# Raspadores do QD_DIR falso (o conteúdo só importa pra quem lê os arquivos).
+FAKE_SPIDERS = {
+    "ba/ba_salvador.py": "class BaSalvadorSpider:\n    name = \"ba_salvador\"\n",
+    "rj/rj_rio_de_janeiro.py": "class RjRioDeJaneiroSpider:\n    name = \"rj_rio_de_janeiro\"\n",
+    "sp/sp_sao_paulo.py": "class SpSaoPauloSpider:\n    name = \"sp_sao_paulo\"\n",
+}
+
+
+def _write_shim(path: Path, tool: str) -> None:
+    path.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{FAKE_CLI}" {tool} "$@"\n', encoding="utf-8")
+    path.chmod(0o755)
+
+
+def _fake_qd_dir(root: Path) -> Path:
+    """Repositório de raspadores falso: venv com `scrapy` e `python`
+    roteirizados, alguns spiders e o territories.csv (entra no fingerprint
+    do postgres-schema)."""
+    dc_dir = root / "data_collection"
+    venv_bin = dc_dir / ".venv" / "bin"
+    venv_bin.mkdir(parents=True)
+    _write_shim(venv_bin / "scrapy", "scrapy")
+    _write_shim(venv_bin / "python", "venv-python")
+    (dc_dir / "requirements.txt").write_text("scrapy\n", encoding="utf-8")
+    resources = dc_dir / "gazette" / "resources"
+    resources.mkdir(parents=True)
+    (resources / "territories.csv").write_text("id,name,state_code\n3550308,São Paulo,SP\n", encoding="utf-8")
+    for rel, source in FAKE_SPIDERS.items():
+        path = dc_dir / "gazette" / "spiders" / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(source, encoding="utf-8")
+    return root
+
+
+def _command_label(tool: str, args: list[str]) -> str:
+    """Ferramenta + até dois subcomandos (sem flags/valores): agrupa as
+    chamadas no relatório, ex: `kubectl get`, `docker image inspect`."""
+    words = [tool]
+    for arg in args:
+        if arg.startswith("-") or os.path.isabs(arg) or len(words) == 3:
+            break
+        words.append(arg)
+    return " ".join(words)
+
+
+def run_scenario(scenario: dict, tools: list[str], time_scale: float) -> dict:
+    """Roda um cenário uma vez num ambiente isolado e devolve tempo e chamadas."""
+    with tempfile.TemporaryDirectory(prefix="qd-bench-") as tmp:
+        root = Path(tmp)
+        bin_dir = root / "bin"
+        bin_dir.mkdir()
+        for tool in tools:
+            if tool not in ("scrapy", "venv-python"):
+                _write_shim(bin_dir / tool, tool)
+        state_dir = root / "state"
+        state_dir.mkdir()
+        for flag in scenario.get("flags", []):
+            (state_dir / flag).touch()
+        home = root / "home"
+        home.mkdir()
+        calls_log = root / "calls.jsonl"
+        output_log = root / "output.log"
+
+        env = dict(os.environ)
+        for var in ("XDG_CACHE_HOME", "QD_TRACE", "QD_REGISTRY_MIRROR", "QUERIDODIARIO_DATABASE_URL", "FILES_STORE"):
+            env.pop(var, None)
+        env.update(
+            {
+                "PATH": f"{bin_dir}{os.pathsep}{env.get('PATH', '')}",
+                "HOME": str(home),
+                "KUBECONFIG": str(home / ".kube" / "config"),
+                # Sem cliente da API: toda leitura do cluster passa pelo
+                # kubectl falso e entra na contagem.
+                "QD_KUBE_API": "0",
+                # Um daemon de port-forward rodando na máquina atenderia os
+                # forwards sem passar pelo kubectl falso.
+                "QD_PF_DAEMON": "0",
+                "QD_DIR": str(_fake_qd_dir(root / "querido-diario")),
+                "QD_PRELOAD_WORKERS": "4",
+                "QD_FAKE_SCENARIOS": str(SCENARIOS_FILE),
+                "QD_FAKE_STATE": str(state_dir),
+                "QD_FAKE_LOG": str(calls_log),
+                "QD_FAKE_TIME_SCALE": str(time_scale),
+                "NO_COLOR": "1",
+            }
+        )
+        # Variáveis extras do cenário (ex: opt-ins exigidos pelo script).
+        env.update(scenario.get("env", {}))
+
+        def _invoke(argv: list[str]) -> tuple[int, float]:
+            t0 = time.monotonic()
+            with open(output_log, "a", encoding="utf-8") as out:
+                proc = subprocess.run(
+                    [sys.executable, str(SCRIPTS_DIR / argv[0]), *argv[1:]],
+                    env=env,
+                    cwd=str(root),
+                    stdin=subprocess.DEVNULL,
+                    stdout=out,
+                    stderr=subprocess.STDOUT,
+                    timeout=RUN_TIMEOUT,
+                )
+            return proc.returncode, time.monotonic() - t0
+
+        if scenario.get("prepare"):
+            code, _ = _invoke(scenario["prepare"])
+            if code != 0:
+                return {"error": f"preparação saiu com código {code}", "output": output_log.read_text(encoding="utf-8")}
+            calls_log.unlink(missing_ok=True)
+
+        code, wall = _invoke(scenario["run"])
+        output = output_log.read_text(encoding="utf-8")
+        if code != 0:
+            return {"error": f"saiu com código {code}", "output": output}
+
+        calls = [json.loads(line) for line in calls_log.read_text(encoding="utf-8").splitlines()] if calls_log.exists() else []
+        return {
+            "wall_s": wall,
+            "calls": dict(Counter(c["tool"] for c in calls)),
+            "commands": dict(Counter(_command_label(c["tool"], c["args"]) for c in calls)),
+            "unmatched": sorted({f"{c['tool']} {' '.join(c['args'])}" for c in calls if not c["matched"]}),
+            "output": output,
+        }
+
+
+def summarize(runs: list[dict]) -> dict:
+    """Mediana do tempo entre repetições; chamadas da repetição com mais
+    chamadas (threads de polling podem variar em ±1 pra baixo)."""
+    worst = max(runs, key=lambda r: sum(r["calls"].values()))
+    return {
+        "wall_s": round(statistics.median(r["wall_s"] for r in runs), 2),
+        "calls": dict(sorted(worst["calls"].items())),
+        "commands": dict(sorted(worst["commands"].items())),
+    }
+
+
+def compare(name: str, result: dict, baseline: dict | None, tolerance: float) -> list[str]:
+    """Regressões do cenário em relação ao baseline (lista vazia = ok)."""
+    if baseline is None:
+        return []
+    problems = []
+    total, base_total = sum(result["calls"].values()), sum(baseline["calls"].values())
+    if total > base_total:
+        added = Counter(result["commands"])
+        added.subtract(Counter(baseline["commands"]))
+        detail = ", ".join(f"{label} +{n}" for label, n in sorted(added.items()) if n > 0)
+        problems.append(f"{name}: {total} chamadas, baseline {base_total} ({detail})")
+    limit = baseline["wall_s"] * (1 + tolerance) + WALL_SLACK_S
+    if result["wall_s"] > limit:
+        problems.append(f"{name}: {result['wall_s']:.2f}s, acima do limite de {limit:.2f}s (baseline {baseline['wall_s']:.2f}s)")
+    return problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", action="append", default=None, help="Roda só este cenário (repetível)")
+    parser.add_argument("--repeat", type=int, default=3, help="Execuções por cenário (padrão: 3; vale a mediana)")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25, help="Piora de tempo aceita sobre o baseline (padrão: 0.25 = 25%%)"
+    )
+    parser.add_argument("--time-scale", type=float, default=1.0, help="Multiplicador das latências falsas")
+    parser.add_argument("--update-baseline", action="store_true", help=f"Regrava {BASELINE_FILE.name} com os resultados")
+    parser.add_argument("--verbose", action="store_true", help="Mostra a saída dos scripts em cada cenário")
+    args = parser.parse_args()
+
+    if pc.IS_WINDOWS:
+        pc.err("O benchmark usa shims sh no PATH — rode no Linux/Mac (ou WSL).")
+
+    config = json.loads(SCENARIOS_FILE.read_text(encoding="utf-8"))
+    scenarios = config["scenarios"]
+    if args.scenario:
+        known = {s["name"] for s in scenarios}
+        unknown = [n for n in args.scenario if n not in known]
+        if unknown:
+            pc.err(f"Cenário(s) desconhecido(s): {', '.join(unknown)} (disponíveis: {', '.join(sorted(known))})")
+        scenarios = [s for s in scenarios if s["name"] in args.scenario]
+    baseline = json.loads(BASELINE_FILE.read_text(encoding="utf-8")) if BASELINE_FILE.exists() else {"scenarios": {}}
+
+    results: dict[str, dict] = {}
+    problems: list[str] = []
+    for scenario in scenarios:
+        name = scenario["name"]
+        pc.log(f"{name}: {scenario.get('description', '')} ({args.repeat}x)")
+        runs = []
+        for _ in range(max(1, args.repeat)):
+            run = run_scenario(scenario, list(config["tools"]), args.time_scale)
+            if "error" in run:
+                print(run["output"][-4000:], file=sys.stderr)
+                pc.err(f"{name}: {run['error']}")
+            if args.verbose:
+                print(run["output"])
+            for command in run["unmatched"]:
+                pc.warn(f"{name}: chamada sem regra no cenário: {command}")
+            runs.append(run)
+        results[name] = summarize(runs)
+        problems += compare(name, results[name], baseline["scenarios"].get(name), args.tolerance)
+
+    width = max(len("cenário"), *(len(name) for name in results))
+    print()
+    print(f"  {'cenário':<{width}} {'tempo':>7} {'baseline':>9} {'chamadas':>9} {'baseline':>9}")
+    for name, result in results.items():
+        base = baseline["scenarios"].get(name)
+        base_wall = f"{base['wall_s']:.2f}s" if base else "-"
+        base_calls = str(sum(base["calls"].values())) if base else "-"
+        print(f"  {name:<{width}} {result['wall_s']:6.2f}s {base_wall:>9} {sum(result['calls'].values()):>9} {base_calls:>9}")
+    print()
+
+    if args.update_baseline:
+        baseline["scenarios"].update(results)
+        baseline["recorded_with"] = {"python": platform.python_version(), "platform": platform.platform()}
+        BASELINE_FILE.write_text(json.dumps(baseline, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        pc.log(f"Baseline atualizado em {BASELINE_FILE}.")
+        return
+    if problems:
+        for problem in problems:
+            pc.warn(problem)
+        pc.err("Regressão em relação ao baseline (rode com --update-baseline se for intencional).")
+    pc.log("Sem regressões em relação ao baseline.")
+
+
+if __name__ == "__main__":
+    main()
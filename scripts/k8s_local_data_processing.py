@@ -1,17 +1,46 @@
 #!/usr/bin/env python3
 """k8s_local_data_processing.py — Dispara manualmente o CronJob data-processing
 no cluster local (equivalente a `kubectl create job --from=cronjob/... nome-$(date +%s)`,
-sem depender de `date` de shell POSIX)."""
+sem depender de `date` de shell POSIX).
+
+Uso:
+    python3 scripts/k8s_local_data_processing.py                # só dispara o Job
+    python3 scripts/k8s_local_data_processing.py run [--report ARQUIVO] [--timeout SEG]
+                                                     [--shards N [--parallelism P]]
+
+`run` dispara o Job, acompanha o log do pod enquanto ele roda (com um
+resumo de vazão periódico), espera o Job terminar e grava um relatório JSON
+(diários/min, latência da extração no Tika, taxa de indexação no
+OpenSearch, imagem usada) — pra comparar a vazão entre versões da imagem.
+Com --shards N, o Job vira um Indexed Job de N pods, cada um com uma fatia
+dos diários pendentes (QD_SHARD_INDEX/QD_SHARD_COUNT).
+"""
 from __future__ import annotations
 
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
 import sys
+import threading
 import time
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent))
 import pycommon as pc  # noqa: E402
 
 NAMESPACE = "querido-diario"
+CONTAINER = "data-processing"
+
+REPORTS_DIR = pc.CACHE_DIR / "data-processing-runs"
+DEFAULT_RUN_TIMEOUT = 6 * 3600
+POD_START_TIMEOUT = 300
+PROGRESS_INTERVAL = 30.0
 
 
 def trigger_job(name_prefix: str = "data-processing-manual") -> str:
@@ -27,8 +56,548 @@ def trigger_job(name_prefix: str = "data-processing-manual") -> str:
     return job_name
 
 
+# ─── Métricas a partir do log ───────────────────────────────────────────────
+#
+# O pipeline (repo querido-diario-data-processing) não expõe métricas: a
+# vazão sai das mensagens de log, com o timestamp que o kubectl adiciona a
+# cada linha (--timestamps). Os padrões abaixo são tolerantes a variações
+# de texto; se as mensagens mudarem por lá, é aqui que se ajusta.
+
+# Diário concluído ("Processed gazette 123", "Processed 50 gazettes"); a
+# linha de início ("Processing gazette 123") não conta, senão cada diário
+# contaria duas vezes.
+GAZETTE_DONE = re.compile(
+    r"(?i)\b(?:processed|done|finished|completed)\b.*\bgazettes?\b|\bgazettes?\b.*\b(?:processed|done|finished|completed)\b"
+)
+# Quantidade de diários numa linha de conclusão ("Processed 50 gazettes");
+# sem ela, a linha é um diário (o número em "gazette 123" é um id).
+GAZETTE_COUNT = re.compile(r"(?i)(\d+)\s+gazettes\b")
+TIKA_LINE = re.compile(r"(?i)\btika\b|\bextract(?:ing|ed)\b.*\btext\b|\btext extraction\b")
+# Abre e fecha uma extração sem duração explícita: a latência é o intervalo
+# entre as duas, e nunca o tempo até uma linha qualquer.
+TIKA_START = re.compile(r"(?i)\bextracting\b|\bextraction (?:started|starting)\b")
+TIKA_DONE = re.compile(r"(?i)\bextracted\b|\bextraction (?:done|finished|completed)\b")
+INDEX_LINE = re.compile(r"(?i)\bindex(?:ed|ing)\b")
+ERROR_LINE = re.compile(r"\b(?:ERROR|CRITICAL)\b|^Traceback")
+# Duração explícita na mensagem ("took 1.2s", "em 350 ms").
+DURATION = re.compile(r"(?i)(\d+(?:\.\d+)?)\s*(ms|s|secs?|seconds?|segundos?)\b")
+# Quantidade de documentos numa linha de indexação ("indexed 12 excerpts").
+# Linha de indexação sem quantidade ("Creating index ...", "indexing
+# gazette 123") não conta documento nenhum.
+DOC_COUNT = re.compile(r"(?i)(\d+)\s*(?:documents?|docs?|excerpts?|trechos?)\b")
+
+
+def _parse_timestamp(value: str) -> float | None:
+    """Timestamp RFC3339 do `kubectl logs --timestamps` (nanossegundos, 'Z')
+    em segundos desde a época. fromisoformat() do 3.9 não aceita nenhum dos
+    dois, então a fração é cortada em microssegundos à mão."""
+    match = re.fullmatch(r"(\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d)(?:\.(\d+))?(Z|[+-]\d\d:\d\d)", value)
+    if not match:
+        return None
+    base, fraction, tz = match.groups()
+    offset = "+00:00" if tz == "Z" else tz
+    try:
+        moment = datetime.fromisoformat(f"{base}.{(fraction or '0')[:6].ljust(6, '0')}{offset}")
+    except ValueError:
+        return None
+    return moment.timestamp()
+
+
+def _duration_seconds(text: str) -> float | None:
+    match = DURATION.search(text)
+    if not match:
+        return None
+    value = float(match.group(1))
+    return value / 1000 if match.group(2).lower() == "ms" else value
+
+
+def _per_minute(count: int, first: float | None, last: float | None) -> float | None:
+    if not count or first is None or last is None or last <= first:
+        return None
+    return round(count / ((last - first) / 60), 2)
+
+
+@dataclass
+class RunProgress:
+    """Contadores alimentados linha a linha pelo log do pod."""
+
+    lines: int = 0
+    gazettes: int = 0
+    indexed_docs: int = 0
+    errors: int = 0
+    tika_latencies: list[float] = field(default_factory=list)
+    first_ts: float | None = None
+    last_ts: float | None = None
+    first_index_ts: float | None = None
+    last_index_ts: float | None = None
+    # Extrações que começaram mas não tiveram latência medida (nem duração
+    # na mensagem nem linha de conclusão): ficam fora das amostras.
+    tika_unmeasured: int = 0
+    # Início de uma extração sem duração explícita, à espera da conclusão.
+    _tika_open: float | None = None
+
+    def feed(self, ts: float, text: str) -> None:
+        self.lines += 1
+        if self.first_ts is None:
+            self.first_ts = ts
+        self.last_ts = ts
+
+        if ERROR_LINE.search(text):
+            self.errors += 1
+        if GAZETTE_DONE.search(text):
+            count = GAZETTE_COUNT.search(text)
+            self.gazettes += int(count.group(1)) if count else 1
+        if TIKA_LINE.search(text):
+            self._feed_tika(ts, text)
+        if INDEX_LINE.search(text):
+            count = DOC_COUNT.search(text)
+            if count:
+                self.indexed_docs += int(count.group(1))
+                if self.first_index_ts is None:
+                    self.first_index_ts = ts
+                self.last_index_ts = ts
+
+    def _feed_tika(self, ts: float, text: str) -> None:
+        took = _duration_seconds(text)
+        if took is not None:
+            self.tika_latencies.append(took)
+            self._tika_open = None
+        elif TIKA_DONE.search(text):
+            if self._tika_open is not None:
+                self.tika_latencies.append(max(0.0, ts - self._tika_open))
+                self._tika_open = None
+        elif TIKA_START.search(text):
+            # Uma extração nova antes da conclusão da anterior: a anterior
+            # fica sem medida.
+            if self._tika_open is not None:
+                self.tika_unmeasured += 1
+            self._tika_open = ts
+
+    def tika_summary(self) -> dict:
+        samples = sorted(self.tika_latencies)
+        unmeasured = self.tika_unmeasured + (1 if self._tika_open is not None else 0)
+        if not samples:
+            summary: dict = {"samples": 0, "mean_s": None, "p50_s": None, "p95_s": None, "max_s": None}
+            if unmeasured:
+                summary["unmeasured"] = unmeasured
+                summary["note"] = "o log não traz a duração das extrações nem uma linha de conclusão"
+            return summary
+        return {
+            "samples": len(samples),
+            "unmeasured": unmeasured,
+            "mean_s": round(statistics.fmean(samples), 3),
+            "p50_s": round(samples[len(samples) // 2], 3),
+            "p95_s": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+            "max_s": round(samples[-1], 3),
+        }
+
+    def summary_line(self) -> str:
+        gazettes_rate = _per_minute(self.gazettes, self.first_ts, self.last_ts)
+        index_rate = _per_minute(self.indexed_docs, self.first_index_ts, self.last_index_ts)
+        tika = self.tika_summary()
+        parts = [
+            f"{self.gazettes} diário(s)" + (f" ({gazettes_rate}/min)" if gazettes_rate else ""),
+            f"{self.indexed_docs} doc(s) indexado(s)" + (f" ({index_rate}/min)" if index_rate else ""),
+        ]
+        if tika["samples"]:
+            parts.append(f"Tika p50 {tika['p50_s']}s")
+        elif tika.get("unmeasured"):
+            parts.append("latência do Tika ausente no log")
+        if self.errors:
+            parts.append(f"{self.errors} erro(s)")
+        return ", ".join(parts)
+
+
+# ─── Indexed Job: N shards em paralelo ──────────────────────────────────────
+#
+# O CronJob é um pod só (concurrencyPolicy: Forbid), então um backlog grande
+# é processado em série. Com --shards N, o Job vira um Indexed Job
+# (completionMode: Indexed) com N pods, cada um com QD_SHARD_INDEX (a
+# anotação job-completion-index do pod) e QD_SHARD_COUNT=N no ambiente —
+# o pipeline usa o par pra pegar uma fatia disjunta dos diários pendentes.
+# O Job é renderizado a partir do CronJob com `--dry-run=client -o json`
+# (mesma imagem/env/recursos do manifesto) e ajustado aqui antes do create.
+
+COMPLETION_INDEX_ANNOTATION = "batch.kubernetes.io/job-completion-index"
+
+# Opt-in do --shards: sem uma imagem que leia QD_SHARD_INDEX/QD_SHARD_COUNT,
+# cada um dos N pods processaria o backlog inteiro, todos ao mesmo tempo
+# contra o mesmo banco e o mesmo índice.
+SHARDED_PIPELINE_ENV = "QD_SHARDED_PIPELINE"
+
+
+def _render_job(job_name: str) -> dict:
+    out = pc.capture(
+        [
+            "kubectl", "create", "job",
+            "--from=cronjob/data-processing", job_name,
+            "-n", NAMESPACE,
+            "--dry-run=client", "-o", "json",
+        ]
+    )
+    try:
+        return json.loads(out or "")
+    except ValueError:
+        pc.err("Não foi possível renderizar o Job a partir do cronjob/data-processing — o overlay foi aplicado?")
+
+
+def _shard_job(job: dict, shards: int, parallelism: int) -> dict:
+    """Transforma o Job renderizado num Indexed Job com `shards` índices."""
+    spec = job["spec"]
+    spec["completionMode"] = "Indexed"
+    spec["completions"] = shards
+    spec["parallelism"] = max(1, min(parallelism, shards))
+    shard_env = {
+        "QD_SHARD_INDEX": {
+            "name": "QD_SHARD_INDEX",
+            "valueFrom": {"fieldRef": {"fieldPath": f"metadata.annotations['{COMPLETION_INDEX_ANNOTATION}']"}},
+        },
+        "QD_SHARD_COUNT": {"name": "QD_SHARD_COUNT", "value": str(shards)},
+    }
+    for container in spec["template"]["spec"]["containers"]:
+        if container.get("name") != CONTAINER:
+            continue
+        env = [e for e in container.get("env", []) if e.get("name") not in shard_env]
+        container["env"] = env + list(shard_env.values())
+    return job
+
+
+def trigger_sharded_job(shards: int, parallelism: int | None = None, name_prefix: str = "data-processing-run") -> str:
+    """Cria um Indexed Job com `shards` pods (até `parallelism` ao mesmo
+    tempo; padrão: todos) e retorna o nome do Job."""
+    job_name = f"{name_prefix}-{int(time.time())}"
+    job = _shard_job(_render_job(job_name), shards, parallelism or shards)
+    pc.run(["kubectl", "create", "-f", "-", "-n", NAMESPACE], input=json.dumps(job), text=True)
+    return job_name
+
+
+# ─── run: dispara, acompanha e relata ───────────────────────────────────────
+
+class PodFailed(RuntimeError):
+    """Pod do Job que não sobe (CreateContainerConfigError, ImagePullBackOff...)."""
+
+
+# Além dos motivos de pc.POD_FAILURE_REASONS: o Job é disparado com a infra
+# já de pé, então um Secret/ConfigMap faltando não vai aparecer sozinho.
+JOB_POD_FAILURE_REASONS = pc.POD_FAILURE_REASONS | {"CreateContainerConfigError"}
+
+
+def _job_outcome(job_name: str) -> str | None:
+    """"complete"/"failed" quando o Job termina; None enquanto roda."""
+    job = pc.kube_get("jobs", job_name, NAMESPACE) or {}
+    for condition in (job.get("status") or {}).get("conditions", []):
+        if condition.get("status") == "True" and condition.get("type") in ("Complete", "Failed"):
+            return condition["type"].lower()
+    return None
+
+
+def _job_pod(job_name: str, index: int | None = None) -> dict | None:
+    """Pod mais recente do Job (ou do índice, num Indexed Job). Com
+    restartPolicy OnFailure o container reinicia no mesmo pod, mas um pod
+    removido é recriado com outro nome."""
+    selector = f"job-name={job_name}"
+    if index is not None:
+        selector += f",{COMPLETION_INDEX_ANNOTATION}={index}"
+    pods = pc.kube_list("pods", NAMESPACE, label_selector=selector) or []
+    pods.sort(key=lambda p: p.get("metadata", {}).get("creationTimestamp", ""))
+    return pods[-1] if pods else None
+
+
+def _container_status(pod: dict | None) -> dict:
+    statuses = ((pod or {}).get("status") or {}).get("containerStatuses", [])
+    return next((cs for cs in statuses if cs.get("name") == CONTAINER), statuses[0] if statuses else {})
+
+
+def _pod_started(pod: dict | None) -> bool:
+    """Container já rodando ou terminado (tem log pra seguir)."""
+    state = _container_status(pod).get("state") or {}
+    return "running" in state or "terminated" in state
+
+
+def _pod_succeeded(pod: dict | None) -> bool:
+    return ((pod or {}).get("status") or {}).get("phase") == "Succeeded"
+
+
+def _wait_for_pod(job_name: str, index: int | None, deadline: float, stop: threading.Event) -> dict | None:
+    """Espera o pod (do índice) ter log pra seguir. None se o Job terminar
+    antes (ex: índices com parallelism menor que shards que nunca subiram
+    porque o Job falhou) ou se `stop` for sinalizado. Levanta PodFailed se
+    o pod não subir — roda numa thread, onde pc.err não encerraria nada."""
+    pod: dict | None = None
+    label = f"Pod do Job {job_name}" + (f" (shard {index})" if index is not None else "")
+
+    def started() -> bool:
+        nonlocal pod
+        if stop.is_set():
+            return True
+        pod = _job_pod(job_name, index)
+        failure = pc.pod_failure(pod, JOB_POD_FAILURE_REASONS) if pod else None
+        if failure:
+            raise PodFailed(f"{label} não subiu ({failure}).")
+        return _pod_started(pod) or _job_outcome(job_name) is not None
+
+    # Com parallelism < shards, um índice só sobe quando outro termina: o
+    # prazo é o do run inteiro, não só o de um pod subir.
+    if not pc.poll_until(started, max(POD_START_TIMEOUT, deadline - time.monotonic())):
+        raise PodFailed(f"{label} não começou a rodar a tempo.")
+    return pod if _pod_started(pod) and not stop.is_set() else None
+
+
+def _follow_logs(
+    pod_name: str,
+    progress: RunProgress,
+    since: str | None,
+    deadline: float,
+    stop: threading.Event,
+    prefix: str = "",
+) -> str | None:
+    """Segue o log do container até o stream fechar (container terminou ou
+    reiniciou), o prazo estourar ou `stop` ser sinalizado. Devolve o
+    timestamp bruto da última linha lida."""
+    cmd = ["kubectl", "logs", "-f", "--timestamps", f"pod/{pod_name}", "-c", CONTAINER, "-n", NAMESPACE]
+    if since:
+        cmd += ["--since-time", since]
+    last_raw = since
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, errors="replace")
+    finished = threading.Event()
+
+    def watchdog() -> None:
+        # Um container calado não devolve linha nenhuma: o prazo (ou a falha
+        # de outro shard) corta o stream por fora.
+        while not finished.wait(0.5):
+            if stop.is_set() or time.monotonic() > deadline:
+                proc.terminate()
+                return
+
+    threading.Thread(target=watchdog, daemon=True).start()
+    try:
+        assert proc.stdout is not None
+        for raw in proc.stdout:
+            stamp, _, text = raw.rstrip("\n").partition(" ")
+            ts = _parse_timestamp(stamp)
+            if ts is None:
+                # Linha sem timestamp: mensagem do próprio kubectl.
+                print(f"{prefix}{raw}", end="")
+                continue
+            # --since-time é inclusivo: a última linha da leitura anterior volta.
+            if since and stamp <= since:
+                continue
+            last_raw = stamp
+            print(f"{prefix}{text}")
+            progress.feed(ts, text)
+    finally:
+        finished.set()
+        if proc.poll() is None:
+            proc.terminate()
+        proc.wait()
+    return last_raw
+
+
+@dataclass
+class _Shard:
+    index: int | None
+    progress: RunProgress = field(default_factory=RunProgress)
+    pod: dict | None = None
+
+
+def _follow_shard(job_name: str, shard: _Shard, deadline: float, stop: threading.Event, prefix: str) -> None:
+    """Segue o log do pod do shard até ele concluir, o Job terminar, o
+    prazo estourar ou outro shard falhar — reabrindo o stream quando o
+    container reinicia."""
+    shard.pod = _wait_for_pod(job_name, shard.index, deadline, stop)
+    since: str | None = None
+    while shard.pod is not None and not stop.is_set():
+        since = _follow_logs(shard.pod["metadata"]["name"], shard.progress, since, deadline, stop, prefix)
+        # Stream fechou: o Job terminou, o pod do shard concluiu (o Job
+        # segue com os outros índices), ou o container reiniciou (OnFailure)
+        # e o log continua numa nova execução.
+        if stop.is_set() or _job_outcome(job_name) is not None or time.monotonic() > deadline:
+            return
+        shard.pod = _job_pod(job_name, shard.index) or shard.pod
+        if _pod_succeeded(shard.pod):
+            return
+        pc.poll_until(lambda: stop.is_set() or _pod_started(_job_pod(job_name, shard.index)), timeout=10)
+
+
+def _merge_progress(parts: list[RunProgress]) -> RunProgress:
+    """Soma dos shards; as taxas saem da janela total (do primeiro ao último
+    log de qualquer shard), ou seja, a vazão agregada do Job."""
+    def bound(values: list[float | None], pick) -> float | None:
+        present = [v for v in values if v is not None]
+        return pick(present) if present else None
+
+    return RunProgress(
+        lines=sum(p.lines for p in parts),
+        gazettes=sum(p.gazettes for p in parts),
+        indexed_docs=sum(p.indexed_docs for p in parts),
+        errors=sum(p.errors for p in parts),
+        tika_latencies=[x for p in parts for x in p.tika_latencies],
+        tika_unmeasured=sum(p.tika_unmeasured + (p._tika_open is not None) for p in parts),
+        first_ts=bound([p.first_ts for p in parts], min),
+        last_ts=bound([p.last_ts for p in parts], max),
+        first_index_ts=bound([p.first_index_ts for p in parts], min),
+        last_index_ts=bound([p.last_index_ts for p in parts], max),
+    )
+
+
+def _progress_report(progress: RunProgress) -> dict:
+    return {
+        "log_lines": progress.lines,
+        "errors": progress.errors,
+        "gazettes": {
+            "count": progress.gazettes,
+            "per_minute": _per_minute(progress.gazettes, progress.first_ts, progress.last_ts),
+        },
+        "tika_extraction": progress.tika_summary(),
+        "indexing": {
+            "documents": progress.indexed_docs,
+            "per_minute": _per_minute(progress.indexed_docs, progress.first_index_ts, progress.last_index_ts),
+        },
+    }
+
+
+def _write_report(path: Path, report: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    tmp.replace(path)
+
+
+def _iso(ts: float | None) -> str | None:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat() if ts is not None else None
+
+
+def run_job(
+    report_path: Path | None = None,
+    timeout: float = DEFAULT_RUN_TIMEOUT,
+    shards: int = 1,
+    parallelism: int | None = None,
+) -> dict:
+    """Dispara o Job (Indexed, com shards > 1), segue o log de cada pod até
+    ele terminar e grava o relatório. Devolve o relatório."""
+    started = time.time()
+    deadline = time.monotonic() + timeout
+    if shards > 1:
+        job_name = trigger_sharded_job(shards, parallelism)
+        pc.log(f"Indexed Job {job_name}: {shards} shard(s), até {parallelism or shards} em paralelo.")
+        job_shards = [_Shard(i) for i in range(shards)]
+    else:
+        job_name = trigger_job(name_prefix="data-processing-run")
+        job_shards = [_Shard(None)]
+    pc.log(f"Seguindo o log do Job {job_name}...")
+
+    # Na primeira falha de um shard, `stop` encerra os outros: o relatório
+    # sai na hora, em vez de depois de esperar os demais até o prazo.
+    stop = threading.Event()
+    error: BaseException | None = None
+    with ThreadPoolExecutor(max_workers=len(job_shards)) as pool:
+        futures = [
+            pool.submit(
+                _follow_shard, job_name, shard, deadline, stop,
+                f"[{shard.index}] " if shard.index is not None else "",
+            )
+            for shard in job_shards
+        ]
+        while True:
+            done, not_done = wait(futures, timeout=PROGRESS_INTERVAL, return_when=FIRST_EXCEPTION)
+            error = next((f.exception() for f in done if f.exception() is not None), None)
+            if error is not None:
+                stop.set()
+                break
+            if not not_done:
+                break
+            merged = _merge_progress([s.progress for s in job_shards])
+            pc.info(f"Progresso: {merged.summary_line()}")
+
+    outcome: str | None = None
+
+    def finished() -> bool:
+        nonlocal outcome
+        outcome = _job_outcome(job_name)
+        return outcome is not None
+
+    if error is not None:
+        outcome = "failed"
+    else:
+        # O status do Job atualiza um pouco depois do último container sair.
+        pc.poll_until(finished, timeout=10)
+        outcome = outcome or "timeout"
+
+    total = _merge_progress([s.progress for s in job_shards])
+    containers = [_container_status(_job_pod(job_name, s.index) or s.pod) for s in job_shards]
+    report = {
+        "job": job_name,
+        "namespace": NAMESPACE,
+        "status": outcome,
+        "shards": shards,
+        "image": containers[0].get("image"),
+        "image_id": containers[0].get("imageID"),
+        "restarts": sum(c.get("restartCount", 0) for c in containers),
+        "started_at": _iso(started),
+        "finished_at": _iso(time.time()),
+        "duration_s": round(time.time() - started, 1),
+        **_progress_report(total),
+    }
+    if error is not None:
+        report["failure"] = str(error)
+    if shards > 1:
+        report["per_shard"] = [
+            {"index": s.index, "restarts": c.get("restartCount", 0), **_progress_report(s.progress)}
+            for s, c in zip(job_shards, containers)
+        ]
+    path = report_path or REPORTS_DIR / f"{job_name}.json"
+    _write_report(path, report)
+
+    pc.info(f"Resumo: {total.summary_line()}")
+    if shards > 1:
+        for shard in job_shards:
+            print(f"    shard {shard.index}: {shard.progress.summary_line()}")
+    pc.info(f"Relatório gravado em {path}")
+    if error is not None and not isinstance(error, PodFailed):
+        raise error
+    if error is not None:
+        pc.err(f"{error} O Job {job_name} continua no cluster: kubectl delete job -n {NAMESPACE} {job_name}")
+    if outcome == "complete":
+        pc.log(f"Job {job_name} concluído em {report['duration_s']:.0f}s.")
+    elif outcome == "failed":
+        pc.err(f"Job {job_name} falhou. Veja: kubectl logs -n {NAMESPACE} job/{job_name}")
+    else:
+        pc.err(f"Timeout de {timeout:.0f}s: o Job {job_name} continua rodando no cluster.")
+    return report
+
+
 def main() -> None:
-    trigger_job()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command")
+    run_parser = sub.add_parser("run", help="Dispara, acompanha o log e grava um relatório de vazão")
+    run_parser.add_argument(
+        "--report", type=Path, default=None, help=f"Arquivo do relatório JSON (padrão: {REPORTS_DIR}/<job>.json)"
+    )
+    run_parser.add_argument(
+        "--timeout", type=float, default=DEFAULT_RUN_TIMEOUT,
+        help=f"Segundos até desistir de esperar o Job (padrão: {DEFAULT_RUN_TIMEOUT})",
+    )
+    run_parser.add_argument(
+        "--shards", type=int, default=1,
+        help="Divide os diários pendentes entre N pods (Indexed Job); padrão: 1",
+    )
+    run_parser.add_argument(
+        "--parallelism", type=int, default=None, help="Máximo de shards rodando ao mesmo tempo (padrão: todos)"
+    )
+    args = parser.parse_args()
+
+    if args.command == "run":
+        if args.shards < 1:
+            pc.err("--shards precisa ser >= 1.")
+        if args.shards > 1 and os.environ.get(SHARDED_PIPELINE_ENV) != "1":
+            pc.err(
+                "--shards só divide o trabalho se a imagem do data-processing ler QD_SHARD_INDEX/QD_SHARD_COUNT; "
+                f"sem isso, cada um dos {args.shards} pods processaria o backlog inteiro ao mesmo tempo, contra "
+                f"o mesmo banco e o mesmo índice. Se a imagem já suporta, rode com {SHARDED_PIPELINE_ENV}=1."
+            )
+        run_job(args.report, args.timeout, args.shards, args.parallelism)
+    else:
+        trigger_job()
 
 
 if __name__ == "__main__":
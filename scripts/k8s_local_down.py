@@ -1,20 +1,61 @@
 #!/usr/bin/env python3
-"""k8s_local_down.py — Destroi o cluster kind local do Querido Diário.
+"""k8s_local_down.py — Destroi (ou pausa, com --pause) o cluster kind local
+do Querido Diário.
 
 Substitui o antigo k8s/local/teardown.sh (bash).
+
+--pause só para o container do nó kind: PVCs (Postgres, OpenSearch, Garage),
+imagens e tudo mais ficam preservados, e o próximo `make k8s-local-up`
+detecta o cluster pausado e só religa o nó e confere a prontidão.
 """
 from __future__ import annotations
 
+import argparse
 import sys
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent))
 import pycommon as pc  # noqa: E402
+import k8s_portforward_daemon  # noqa: E402
 
 CLUSTER_NAME = "querido-diario-dev"
+NODE_CONTAINER = f"{CLUSTER_NAME}-control-plane"
+
+
+def _stop_portforward_daemon() -> None:
+    """Sem o cluster, o daemon só ficaria tentando reabrir os túneis."""
+    if pc.PF_DAEMON_ENABLED and k8s_portforward_daemon.stop_daemon():
+        pc.info("Daemon de port-forward encerrado.")
+
+
+def pause() -> None:
+    status = pc.capture(["docker", "inspect", "--format", "{{.State.Status}}", NODE_CONTAINER])
+    if status is None:
+        pc.warn(f"Cluster '{CLUSTER_NAME}' não existe. Nada a fazer.")
+        return
+    if status != "running":
+        pc.info(f"Cluster '{CLUSTER_NAME}' já está pausado ({status}).")
+        return
+
+    _stop_portforward_daemon()
+    pc.log(f"Pausando cluster '{CLUSTER_NAME}' (docker stop {NODE_CONTAINER})...")
+    pc.run(["docker", "stop", NODE_CONTAINER])
+    pc.log("Cluster pausado. Dados (PVCs) e imagens foram preservados.")
+    pc.info("Para retomar: make k8s-local-up")
 
 
 def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--pause",
+        action="store_true",
+        help="Só para o nó kind, preservando os dados (retome com make k8s-local-up)",
+    )
+    args = parser.parse_args()
+    if args.pause:
+        pause()
+        return
+
     if not pc.which("kind"):
         pc.warn("kind não encontrado. Nada a fazer.")
         return
@@ -24,10 +65,17 @@ def main() -> None:
         pc.warn(f"Cluster '{CLUSTER_NAME}' não existe. Nada a fazer.")
         return
 
+    _stop_portforward_daemon()
     pc.log(f"Destruindo cluster '{CLUSTER_NAME}'...")
     pc.run(["kind", "delete", "cluster", "--name", CLUSTER_NAME])
 
     pc.log("Cluster removido. Dados locais (PVCs) foram destruídos junto com o cluster.")
+    pc.info(
+        "Os mirrors locais de registry (qd-mirror-*) continuam de pé, com o cache de "
+        "imagens, para o próximo k8s-local-up. Para removê-los: "
+        "docker rm -f qd-mirror-docker-io qd-mirror-ghcr-io && "
+        "docker volume rm qd-mirror-docker-io-data qd-mirror-ghcr-io-data"
+    )
     hosts_path = r"C:\Windows\System32\drivers\etc\hosts" if pc.IS_WINDOWS else "/etc/hosts"
     pc.warn(f"Para remover as entradas do hosts file, edite {hosts_path} manualmente")
     pc.warn("e remova as linhas com queridodiario.local")
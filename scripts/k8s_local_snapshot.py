@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""k8s_local_snapshot.py — Exporta/restaura os dados do cluster kind local
+(bancos do Postgres, índices do OpenSearch e conteúdo do bucket do Garage)
+num único arquivo .tar.gz versionado, pra compartilhar um dataset de dev já
+semeado (spiders rodados, qd-sync-spiders, data-processing) em vez de
+recomputá-lo a cada cluster novo.
+
+Uso:
+    python3 scripts/k8s_local_snapshot.py snapshot [--output ARQUIVO]
+    python3 scripts/k8s_local_snapshot.py restore ARQUIVO
+
+Postgres vai como dump lógico (pg_dump -Fc por banco). OpenSearch e Garage
+vão pelo volume: o workload é escalado pra 0, um pod auxiliar (busybox)
+monta o PVC e faz tar do conteúdo, e o workload volta em seguida. Os
+componentes são exportados e restaurados em paralelo.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import tarfile
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import pycommon as pc  # noqa: E402
+
+NAMESPACE = "querido-diario"
+SNAPSHOT_DIR = pc.REPO_ROOT / "snapshots"
+
+SNAPSHOT_FORMAT = "querido-diario-local-snapshot"
+SNAPSHOT_VERSION = 1
+
+POSTGRES_CLUSTER = "postgres"
+POSTGRES_DATABASES = ["queridodiario", "backend", "companies"]
+
+# componente -> (workload pro kubectl, tipo pro wait_ready, seletor dos pods, PVC)
+VOLUME_COMPONENTS = {
+    "opensearch": ("statefulset/opensearch", "statefulsets", "app=opensearch", "opensearch-data-opensearch-0"),
+    "garage": ("deployment/garage", "deployments", "app=garage", "garage-data"),
+}
+HELPER_IMAGE = "busybox"
+SCALE_TIMEOUT = 300
+
+
+# ─── Postgres ────────────────────────────────────────────────────────────────
+
+def _postgres_primary() -> str:
+    pods = pc.kube_list(
+        "pods", NAMESPACE, label_selector=f"cnpg.io/cluster={POSTGRES_CLUSTER},cnpg.io/instanceRole=primary"
+    )
+    if pods:
+        return pods[0]["metadata"]["name"]
+    return f"{POSTGRES_CLUSTER}-1"
+
+
+def dump_postgres(out_dir: Path) -> dict:
+    pod = _postgres_primary()
+    (out_dir / "postgres").mkdir(parents=True, exist_ok=True)
+    for db in POSTGRES_DATABASES:
+        pc.log(f"Postgres: exportando banco '{db}' ({pod})...")
+        with open(out_dir / "postgres" / f"{db}.dump", "wb") as f:
+            pc.run(["kubectl", "exec", pod, "-n", NAMESPACE, "-c", "postgres", "--", "pg_dump", "-Fc", "-d", db], stdout=f)
+    return {"databases": POSTGRES_DATABASES}
+
+
+def restore_postgres(in_dir: Path, meta: dict) -> None:
+    pod = _postgres_primary()
+    for db in meta.get("databases", []):
+        pc.log(f"Postgres: restaurando banco '{db}' ({pod})...")
+        with open(in_dir / "postgres" / f"{db}.dump", "rb") as f:
+            result = pc.run(
+                [
+                    "kubectl", "exec", "-i", pod, "-n", NAMESPACE, "-c", "postgres", "--",
+                    "pg_restore", "--clean", "--if-exists", "--no-owner", "-d", db,
+                ],
+                stdin=f,
+                check=False,
+            )
+        if result.returncode != 0:
+            # pg_restore sai com código != 0 até por avisos ignoráveis (ex:
+            # extensão já existente) — o restante do dump é aplicado mesmo assim.
+            pc.warn(f"pg_restore de '{db}' terminou com código {result.returncode} — confira as mensagens acima.")
+
+
+# ─── Volumes (OpenSearch, Garage) ────────────────────────────────────────────
+
+def _pods_gone(selector: str) -> bool:
+    pods = pc.kube_list("pods", NAMESPACE, label_selector=selector)
+    return pods is not None and not pods
+
+
+@contextmanager
+def _scaled_down(component: str) -> Iterator[None]:
+    """Workload parado enquanto o volume é lido/escrito; volta a 1 réplica
+    (e espera ficar pronto) ao sair, mesmo em erro."""
+    workload, kind, selector, _ = VOLUME_COMPONENTS[component]
+    pc.log(f"{component}: parando {workload}...")
+    pc.run(["kubectl", "scale", workload, "--replicas=0", "-n", NAMESPACE], stdout=pc.subprocess.DEVNULL)
+    try:
+        if not pc.poll_until(lambda: _pods_gone(selector), SCALE_TIMEOUT):
+            pc.err(f"{component}: pods de {workload} não terminaram em {SCALE_TIMEOUT}s.")
+        yield
+    finally:
+        pc.log(f"{component}: religando {workload}...")
+        pc.run(["kubectl", "scale", workload, "--replicas=1", "-n", NAMESPACE], stdout=pc.subprocess.DEVNULL)
+        pc.wait_ready([(kind, workload.split("/", 1)[1])], NAMESPACE, timeout=SCALE_TIMEOUT)
+
+
+@contextmanager
+def _volume_helper(component: str) -> Iterator[str]:
+    """Pod auxiliar com o PVC do componente montado em /data."""
+    pvc = VOLUME_COMPONENTS[component][3]
+    name = f"snapshot-{component}"
+    manifest = {
+        "apiVersion": "v1",
+        "kind": "Pod",
+        "metadata": {"name": name, "namespace": NAMESPACE, "labels": {"app": "k8s-local-snapshot"}},
+        "spec": {
+            "restartPolicy": "Never",
+            "containers": [
+                {
+                    "name": "helper",
+                    "image": HELPER_IMAGE,
+                    "imagePullPolicy": "IfNotPresent",
+                    "command": ["sleep", "86400"],
+                    "volumeMounts": [{"name": "data", "mountPath": "/data"}],
+                }
+            ],
+            "volumes": [{"name": "data", "persistentVolumeClaim": {"claimName": pvc}}],
+        },
+    }
+    pc.run(["kubectl", "apply", "-f", "-"], input=json.dumps(manifest), text=True, stdout=pc.subprocess.DEVNULL)
+    try:
+        pc.run(
+            ["kubectl", "wait", f"pod/{name}", "-n", NAMESPACE, "--for=condition=Ready", "--timeout=120s"],
+            stdout=pc.subprocess.DEVNULL,
+        )
+        yield name
+    finally:
+        pc.run(
+            ["kubectl", "delete", "pod", name, "-n", NAMESPACE, "--ignore-not-found", "--wait=false"],
+            check=False,
+            stdout=pc.subprocess.DEVNULL,
+        )
+
+
+def dump_volume(component: str, out_dir: Path) -> dict:
+    (out_dir / "volumes").mkdir(parents=True, exist_ok=True)
+    target = out_dir / "volumes" / f"{component}.tar"
+    with _scaled_down(component), _volume_helper(component) as pod:
+        pc.log(f"{component}: exportando volume {VOLUME_COMPONENTS[component][3]}...")
+        with open(target, "wb") as f:
+            pc.run(["kubectl", "exec", pod, "-n", NAMESPACE, "--", "tar", "cf", "-", "-C", "/data", "."], stdout=f)
+    return {"pvc": VOLUME_COMPONENTS[component][3], "bytes": target.stat().st_size}
+
+
+def restore_volume(component: str, in_dir: Path, meta: dict) -> None:
+    source = in_dir / "volumes" / f"{component}.tar"
+    with _scaled_down(component), _volume_helper(component) as pod:
+        pc.log(f"{component}: restaurando volume {VOLUME_COMPONENTS[component][3]}...")
+        with open(source, "rb") as f:
+            pc.run(
+                [
+                    "kubectl", "exec", "-i", pod, "-n", NAMESPACE, "--",
+                    "sh", "-c", "find /data -mindepth 1 -delete && tar xf - -C /data",
+                ],
+                stdin=f,
+            )
+
+
+# ─── Comandos ────────────────────────────────────────────────────────────────
+
+def _require_cluster() -> None:
+    if not pc.kube_exists("services", "postgres-rw", NAMESPACE):
+        pc.err("Cluster local não encontrado (svc/postgres-rw) — suba com: make k8s-local-up")
+
+
+def _run_parallel(jobs: dict) -> dict:
+    """Roda {nome: função} em paralelo e devolve {nome: resultado}; repropaga
+    a primeira falha (inclusive o SystemExit de pc.err)."""
+    with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+        futures = {name: pool.submit(job) for name, job in jobs.items()}
+    return {name: future.result() for name, future in futures.items()}
+
+
+def cmd_snapshot(args: argparse.Namespace) -> None:
+    _require_cluster()
+    output = args.output or SNAPSHOT_DIR / f"qd-local-{time.strftime('%Y%m%d-%H%M%S')}.tar.gz"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    t0 = time.monotonic()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        work = Path(tmp)
+        jobs = {"postgres": lambda: dump_postgres(work)}
+        for component in VOLUME_COMPONENTS:
+            jobs[component] = lambda c=component: dump_volume(c, work)
+        components = _run_parallel(jobs)
+
+        manifest = {
+            "format": SNAPSHOT_FORMAT,
+            "version": SNAPSHOT_VERSION,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "components": components,
+        }
+        (work / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+        pc.log(f"Compactando snapshot em {output}...")
+        with tarfile.open(output, "w:gz") as tf:
+            tf.add(work / "manifest.json", arcname="manifest.json")
+            for path in sorted(work.rglob("*")):
+                if path.is_file() and path.name != "manifest.json":
+                    tf.add(path, arcname=path.relative_to(work).as_posix())
+
+    size_mb = output.stat().st_size / (1024 * 1024)
+    pc.log(f"Snapshot pronto: {output} ({size_mb:.1f} MiB, {time.monotonic() - t0:.0f}s).")
+
+
+def _expected_members(manifest: dict) -> set[str]:
+    members = {"manifest.json"}
+    components = manifest.get("components", {})
+    for db in components.get("postgres", {}).get("databases", []):
+        members.add(f"postgres/{db}.dump")
+    for component in VOLUME_COMPONENTS:
+        if component in components:
+            members.add(f"volumes/{component}.tar")
+    return members
+
+
+def cmd_restore(args: argparse.Namespace) -> None:
+    archive = args.archive
+    if not archive.exists():
+        pc.err(f"Snapshot não encontrado: {archive}")
+    _require_cluster()
+    t0 = time.monotonic()
+
+    with tempfile.TemporaryDirectory() as tmp, tarfile.open(archive, "r:gz") as tf:
+        work = Path(tmp)
+        try:
+            manifest = json.load(tf.extractfile("manifest.json"))
+        except (KeyError, ValueError):
+            pc.err(f"{archive} não é um snapshot válido (manifest.json ausente ou inválido).")
+        if manifest.get("format") != SNAPSHOT_FORMAT or manifest.get("version", 0) > SNAPSHOT_VERSION:
+            pc.err(
+                f"Formato de snapshot não suportado ({manifest.get('format')} v{manifest.get('version')}); "
+                f"este script lê até v{SNAPSHOT_VERSION}."
+            )
+
+        # Extrai só os membros que o manifest declara, pelo nome esperado —
+        # nada de caminhos arbitrários vindos do arquivo.
+        pc.log(f"Descompactando {archive}...")
+        expected = _expected_members(manifest)
+        for member in tf:
+            if member.isfile() and member.name in expected and member.name != "manifest.json":
+                target = work / member.name
+                target.parent.mkdir(parents=True, exist_ok=True)
+                with tf.extractfile(member) as src, open(target, "wb") as dst:
+                    pc.shutil.copyfileobj(src, dst, 1024 * 1024)
+
+        components = manifest.get("components", {})
+        jobs = {}
+        if "postgres" in components:
+            jobs["postgres"] = lambda: restore_postgres(work, components["postgres"])
+        for component in VOLUME_COMPONENTS:
+            if component in components:
+                jobs[component] = lambda c=component: restore_volume(c, work, components[c])
+        _run_parallel(jobs)
+
+    pc.log(f"Snapshot restaurado em {time.monotonic() - t0:.0f}s.")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    snapshot_parser = sub.add_parser("snapshot", help="Exporta os dados do cluster local")
+    snapshot_parser.add_argument(
+        "--output", type=Path, default=None, help=f"Arquivo de saída (padrão: {SNAPSHOT_DIR}/qd-local-<data>.tar.gz)"
+    )
+
+    restore_parser = sub.add_parser("restore", help="Restaura um snapshot no cluster local")
+    restore_parser.add_argument("archive", type=Path)
+
+    args = parser.parse_args()
+    {"snapshot": cmd_snapshot, "restore": cmd_restore}[args.command](args)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        pc.err("Interrompido pelo usuário.")
+    except pc.subprocess.CalledProcessError as e:
+        pc.err(f"Comando falhou ({' '.join(e.cmd)}): código {e.returncode}")
@@ -7,10 +7,16 @@ em Linux, macOS e Windows, sem depender de bash/grep/awk/ss/netstat.
 """
 from __future__ import annotations
 
+import argparse
+import functools
+import json
 import os
 import re
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent))
@@ -82,12 +88,7 @@ def validate_dev_overlay_builds(kubectl: str) -> None:
     falhar cedo (YAML quebrado, patch inválido, etc.) em vez de no meio da
     criação do cluster."""
     pc.log("Validando que o overlay dev builda corretamente (kubectl kustomize)...")
-    result = pc.run(
-        [kubectl, "kustomize", str(DEV_OVERLAY)],
-        stdout=pc.subprocess.DEVNULL,
-        check=False,
-    )
-    if result.returncode != 0:
+    if _render_dev_overlay(kubectl) is None:
         pc.err(
             "`kubectl kustomize k8s/overlays/dev` falhou — corrija os manifestos "
             "antes de criar o cluster (veja o erro acima)."
@@ -95,13 +96,29 @@ def validate_dev_overlay_builds(kubectl: str) -> None:
     pc.info("Overlay dev ok.")
 
 
+@functools.lru_cache(maxsize=None)
+def _render_dev_overlay(kubectl: str) -> str | None:
+    """YAML renderizado do overlay dev (ou None se o build falhar). Memoizado:
+    serve tanto pra validação quanto pro fingerprint do modo incremental
+    (`kubectl` sem default, pra chave do cache ser sempre a mesma)."""
+    result = pc.run(
+        [kubectl, "kustomize", str(DEV_OVERLAY)],
+        stdout=pc.subprocess.PIPE,
+        check=False,
+        text=True,
+    )
+    return result.stdout if result.returncode == 0 else None
+
+
 # ─── 1. Dependências ────────────────────────────────────────────────────────
 
 def ensure_dependencies() -> None:
     pc.log("Verificando dependências...")
-    pc.ensure_kubectl()
-    pc.ensure_kind(KIND_MIN_VERSION, KIND_INSTALL_VERSION)
-    pc.ensure_helm()
+    pc.ensure_tools(
+        pc.ensure_kubectl,
+        lambda: pc.ensure_kind(KIND_MIN_VERSION, KIND_INSTALL_VERSION),
+        pc.ensure_helm,
+    )
 
 
 # ─── 4. Cluster kind ────────────────────────────────────────────────────────
@@ -126,8 +143,6 @@ def _cluster_node_ok(expected_image: str) -> bool:
     if not current_ver:
         return False
     try:
-        import json
-
         data = json.loads(current_ver)
         server_ver = data.get("serverVersion", {})
         major, minor = server_ver.get("major", ""), server_ver.get("minor", "")
@@ -145,6 +160,7 @@ def ensure_cluster() -> None:
 
     if exists:
         pc.run(["kubectl", "config", "use-context", f"kind-{CLUSTER_NAME}"], check=False)
+        pc.reset_kube_client()
         if _cluster_node_ok(expected_image):
             pc.info(f"Cluster '{CLUSTER_NAME}' já existe com a versão correta, pulando criação.")
             return
@@ -157,6 +173,79 @@ def ensure_cluster() -> None:
 
     pc.log(f"Selecionando contexto kubectl: kind-{CLUSTER_NAME}")
     pc.run(["kubectl", "config", "use-context", f"kind-{CLUSTER_NAME}"])
+    pc.reset_kube_client()
+    _node_id.cache_clear()
+    _forget_node_images()
+
+
+@functools.lru_cache(maxsize=None)
+def _node_id() -> str:
+    """ID do container do nó kind. Entra no fingerprint dos passos que
+    instalam algo dentro do cluster: recriar o cluster muda o ID e invalida
+    todos eles de uma vez."""
+    return pc.capture(["docker", "inspect", "--format", "{{.Id}}", f"{CLUSTER_NAME}-control-plane"]) or ""
+
+
+# ─── Mirrors locais de registry ─────────────────────────────────────────────
+#
+# Um container `registry:2` em modo pull-through por upstream (a distribution
+# só faz proxy de um remoto por instância), com volume nomeado e
+# --restart=always. O containerd do nó usa esses mirrors pelos
+# containerdConfigPatches do kind-config.yaml; como os containers e volumes
+# ficam fora do cluster, o cache sobrevive ao k8s-local-down. QD_REGISTRY_MIRROR=0
+# desliga (o containerd cai direto no registry original).
+
+REGISTRY_IMAGE = "registry:2"
+REGISTRY_MIRRORS = [
+    # (container, URL do upstream)
+    ("qd-mirror-docker-io", "https://registry-1.docker.io"),
+    ("qd-mirror-ghcr-io", "https://ghcr.io"),
+]
+
+
+def ensure_registry_mirrors() -> None:
+    if os.environ.get("QD_REGISTRY_MIRROR", "1") == "0":
+        pc.info("QD_REGISTRY_MIRROR=0 — pulando mirrors locais de registry.")
+        return
+
+    pc.log("Verificando mirrors locais de registry (pull-through cache)...")
+    for name, remote in REGISTRY_MIRRORS:
+        running = pc.capture(["docker", "inspect", "--format", "{{.State.Running}}", name])
+        if running is None:
+            ok = pc.run_ok(
+                [
+                    "docker", "run", "-d", "--restart=always", "--name", name,
+                    "-v", f"{name}-data:/var/lib/registry",
+                    "-e", f"REGISTRY_PROXY_REMOTEURL={remote}",
+                    REGISTRY_IMAGE,
+                ]
+            )
+        elif running != "true":
+            ok = pc.run_ok(["docker", "start", name])
+        else:
+            ok = True
+        if not ok:
+            pc.warn(f"Não consegui subir o mirror {name} — o nó vai puxar de {remote} diretamente.")
+            continue
+
+        # O nó kind resolve o mirror pelo nome via DNS da rede "kind", que só
+        # existe depois que o kind cria o primeiro cluster.
+        networks = pc.capture(["docker", "inspect", "--format", "{{json .NetworkSettings.Networks}}", name])
+        try:
+            connected = "kind" in json.loads(networks or "{}")
+        except ValueError:
+            connected = False
+        if not connected and not pc.run_ok(["docker", "network", "connect", "kind", name]):
+            pc.warn(f"Não consegui conectar {name} à rede 'kind'.")
+
+    node = f"{CLUSTER_NAME}-control-plane"
+    if not pc.run_ok(["docker", "exec", node, "grep", "-q", REGISTRY_MIRRORS[0][0], "/etc/containerd/config.toml"]):
+        pc.warn(
+            "O cluster atual foi criado sem os mirrors do kind-config.yaml — eles só "
+            "valem para clusters novos (make k8s-local-down && make k8s-local-up)."
+        )
+    else:
+        pc.info("Mirrors locais de registry ok.")
 
 
 # ─── 5. Traefik via helm ────────────────────────────────────────────────────
@@ -186,6 +275,11 @@ def install_traefik() -> None:
         ]
     )
 
+
+def wait_for_traefik() -> None:
+    # Separado de install_traefik(): os CRDs (IngressRoute/Middleware) que o
+    # overlay dev precisa já existem logo após o `helm upgrade`, então o
+    # resto do setup não precisa esperar o rollout do DaemonSet.
     pc.log("Aguardando Traefik ficar pronto...")
     pc.run(["kubectl", "rollout", "status", "daemonset/traefik", "-n", "traefik", "--timeout=300s"])
     pc.info("Traefik pronto.")
@@ -233,10 +327,11 @@ def _docker_platform() -> str:
     return f"linux/{pc.arch_name()}"
 
 
-def _kind_load(image: str) -> tuple[bool, str]:
-    """Tenta `kind load docker-image`. Retorna (sucesso, stderr)."""
+def _kind_load(*images: str) -> tuple[bool, str]:
+    """Tenta `kind load docker-image` (uma ou várias imagens numa chamada só).
+    Retorna (sucesso, saída)."""
     result = pc.run(
-        ["kind", "load", "docker-image", image, "--name", CLUSTER_NAME],
+        ["kind", "load", "docker-image", *images, "--name", CLUSTER_NAME],
         check=False,
         stdout=pc.subprocess.PIPE,
         stderr=pc.subprocess.STDOUT,
@@ -247,29 +342,128 @@ def _kind_load(image: str) -> tuple[bool, str]:
     return result.returncode == 0, output
 
 
-def _preload_image(image: str) -> None:
-    """Baixa `image` no host (se necessário) e carrega no nó kind (best-effort)."""
-    node = f"{CLUSTER_NAME}-control-plane"
-    platform = _docker_platform()
+# Quantos `docker pull` rodam em paralelo no pré-carregamento. Configurável
+# via QD_PRELOAD_WORKERS — ex: QD_PRELOAD_WORKERS=1 volta ao comportamento
+# sequencial, útil em conexões lentas onde pulls simultâneos só disputam banda.
+PRELOAD_WORKERS = pc.env_int("QD_PRELOAD_WORKERS", 4)
+
+
+@dataclass
+class _PreloadResult:
+    """Tempos e desfecho do pré-carregamento de uma imagem (pro resumo final)."""
+
+    image: str
+    pull_s: float = 0.0
+    load_s: float = 0.0
+    status: str = "pendente"
+
 
-    if not pc.run_ok(["docker", "image", "inspect", image]):
+def _pull_to_host(image: str, platform: str, result: _PreloadResult) -> bool:
+    """`docker pull` de uma imagem ausente no host. Roda em paralelo entre imagens."""
+    start = time.monotonic()
+    try:
         pc.log(f"Baixando {image}...")
         if not pc.run_ok(["docker", "pull", "--platform", platform, image]):
             pc.warn(f"Pull de {image} falhou, continuando.")
-            return
-
-    img_id = pc.capture(["docker", "image", "inspect", image, "--format", "{{.Id}}"]) or ""
-    img_id = img_id.split(":")[-1][:12]
-    if img_id:
-        node_images = pc.capture(["docker", "exec", node, "crictl", "images"]) or ""
-        if img_id in node_images:
-            pc.info(f"{image} já presente no nó kind.")
-            return
-
-    pc.log(f"Carregando {image} no nó kind...")
+            result.status = "pull falhou"
+            return False
+        return True
+    finally:
+        result.pull_s = time.monotonic() - start
+
+
+def _normalize_ref(image: str) -> str:
+    """Forma canônica de uma referência de imagem, como o containerd do nó
+    guarda: `busybox` -> `docker.io/library/busybox:latest`."""
+    if "@" in image:
+        return image
+    name, tag = image, "latest"
+    if ":" in image.rsplit("/", 1)[-1]:
+        name, tag = image.rsplit(":", 1)
+    first = name.split("/", 1)[0]
+    if "/" not in name:
+        name = f"docker.io/library/{name}"
+    elif "." not in first and ":" not in first and first != "localhost":
+        name = f"docker.io/{name}"
+    return f"{name}:{tag}"
+
+
+def _image_digests(image_id: str, repo_digests: list[str]) -> set[str]:
+    """ID + digests (só a parte sha256:..., sem o repositório) de uma imagem."""
+    return {image_id, *(d.rsplit("@", 1)[-1] for d in repo_digests or [])} - {""}
+
+
+def _host_images(images: list[str]) -> dict[str, set[str]]:
+    """Digests das imagens presentes no Docker do host, num único `docker
+    image inspect` pra todas. Imagens ausentes simplesmente não aparecem."""
+    if not images:
+        return {}
+    result = pc.run(
+        ["docker", "image", "inspect", "--format", "{{json .}}", *images],
+        check=False,
+        stdout=pc.subprocess.PIPE,
+        stderr=pc.subprocess.DEVNULL,
+        text=True,
+    )
+    by_ref: dict[str, set[str]] = {}
+    for line in (result.stdout or "").splitlines():
+        try:
+            obj = json.loads(line)
+        except ValueError:
+            continue
+        digests = _image_digests(obj.get("Id", ""), obj.get("RepoDigests"))
+        for tag in obj.get("RepoTags") or []:
+            by_ref[_normalize_ref(tag)] = digests
+    return {img: by_ref[_normalize_ref(img)] for img in images if _normalize_ref(img) in by_ref}
+
+
+# Inventário de imagens do nó kind: tag canônica -> digests. Buscado uma vez
+# por execução (`crictl images -o json`) e atualizado conforme carregamos
+# imagens; ensure_cluster() descarta quando o nó é recriado.
+_node_inventory: dict[str, set[str]] | None = None
+_node_inventory_lock = threading.Lock()
+
+
+def _node_images() -> dict[str, set[str]]:
+    global _node_inventory
+    with _node_inventory_lock:
+        if _node_inventory is None:
+            out = pc.capture(["docker", "exec", f"{CLUSTER_NAME}-control-plane", "crictl", "images", "-o", "json"])
+            inventory: dict[str, set[str]] = {}
+            try:
+                for img in json.loads(out or "{}").get("images", []):
+                    digests = _image_digests(img.get("id", ""), img.get("repoDigests"))
+                    for tag in img.get("repoTags") or []:
+                        inventory[tag] = digests
+            except ValueError:
+                pass
+            _node_inventory = inventory
+        return _node_inventory
+
+
+def _forget_node_images() -> None:
+    global _node_inventory
+    with _node_inventory_lock:
+        _node_inventory = None
+
+
+def _present_on_node(image: str, host_digests: set[str]) -> bool:
+    """A tag existe no nó e aponta pro mesmo conteúdo que temos no host?"""
+    return bool(_node_images().get(_normalize_ref(image), set()) & host_digests)
+
+
+def _remember_on_node(image: str, host_digests: set[str]) -> None:
+    with _node_inventory_lock:
+        if _node_inventory is not None:
+            _node_inventory[_normalize_ref(image)] = set(host_digests)
+
+
+def _load_single(image: str, platform: str) -> bool:
+    """Carrega uma imagem isolada no nó kind, com a recuperação do bug de
+    manifest multi-plataforma. Usado quando o `kind load` em lote falha."""
     ok, output = _kind_load(image)
     if ok:
-        return
+        return True
 
     # Bug conhecido do kind + Docker Desktop com "containerd image store"
     # habilitado: `docker pull` sem --platform guarda a manifest-list
@@ -293,18 +487,83 @@ def _preload_image(image: str) -> None:
             "Desktop: Settings > General > \"Use containerd for pulling and storing "
             "images\" (reinicie o Docker Desktop depois) — esse é o problema mais comum."
         )
+    return ok
+
+
+def _print_preload_summary(results: list[_PreloadResult]) -> None:
+    pc.info("Resumo do pré-carregamento (tempo de pull no host / load no nó):")
+    width = max(len(r.image) for r in results)
+    for r in sorted(results, key=lambda r: r.pull_s + r.load_s, reverse=True):
+        print(f"    {r.image:<{width}}  {r.pull_s:6.1f}s  {r.load_s:6.1f}s  {r.status}")
+
+
+def preload_images(images: list[str], workers: int = PRELOAD_WORKERS) -> None:
+    """Baixa `images` no host (em paralelo, até `workers` pulls simultâneos) e
+    carrega no nó kind as que faltarem, num único `kind load` sempre que
+    possível (best-effort: falhas só geram aviso)."""
+    platform = _docker_platform()
+    results = {img: _PreloadResult(img) for img in images}
+
+    host = _host_images(images)
+    missing = [img for img in images if img not in host]
+    if missing:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            pulled = list(pool.map(pc.bind_step(lambda img: _pull_to_host(img, platform, results[img])), missing))
+        host.update(_host_images([img for img, ok in zip(missing, pulled) if ok]))
+
+    to_load = []
+    for img in images:
+        if img not in host:
+            continue
+        if _present_on_node(img, host[img]):
+            pc.info(f"{img} já presente no nó kind.")
+            results[img].status = "já no nó"
+            continue
+        to_load.append(img)
+
+    if to_load:
+        # `kind load docker-image a b c` faz um único `docker save | ctr import`
+        # pra todas — bem mais barato que uma chamada (e um tar) por imagem.
+        pc.log(f"Carregando {len(to_load)} imagem(ns) no nó kind...")
+        start = time.monotonic()
+        ok, _ = _kind_load(*to_load)
+        if ok:
+            elapsed = time.monotonic() - start
+            for img in to_load:
+                results[img].load_s = elapsed
+                results[img].status = "carregada (em lote)" if len(to_load) > 1 else "carregada"
+                _remember_on_node(img, host[img])
+        else:
+            # Em lote, uma imagem problemática derruba todas — refaz uma a uma
+            # pra isolar a falha e aplicar a recuperação só onde precisa.
+            pc.warn("Carga em lote falhou — tentando imagem por imagem...")
+            for img in to_load:
+                start = time.monotonic()
+                loaded = _load_single(img, platform)
+                results[img].load_s = time.monotonic() - start
+                results[img].status = "carregada" if loaded else "load falhou"
+                if loaded:
+                    # A recuperação pode ter repuxado a imagem (digests novos):
+                    # força reler o inventário na próxima consulta.
+                    _forget_node_images()
+
+    _print_preload_summary(list(results.values()))
+
+
+def _preload_image(image: str) -> None:
+    """Baixa `image` no host (se necessário) e carrega no nó kind (best-effort)."""
+    preload_images([image])
 
 
 def preload_dev_infra_images() -> None:
     pc.log("Pré-carregando imagens de infra dev no nó kind...")
-    for img in DEV_INFRA_IMAGES:
-        _preload_image(img)
+    preload_images(DEV_INFRA_IMAGES)
 
 
 # ─── 7. CloudNativePG operator ──────────────────────────────────────────────
 
 def install_cnpg() -> None:
-    if pc.run_ok(["kubectl", "get", "deployment", "cnpg-controller-manager", "-n", "cnpg-system"]):
+    if pc.kube_exists("deployments", "cnpg-controller-manager", "cnpg-system"):
         pc.info("CloudNativePG operator já instalado.")
         return
 
@@ -329,21 +588,25 @@ def install_cnpg() -> None:
 def apply_dev_overlay() -> None:
     pc.log("Aplicando manifestos de desenvolvimento...")
     pc.run(["kubectl", "apply", "-k", str(DEV_OVERLAY)])
+    # O apply pode ter mudado o app-secret (patch-secret-dev.yaml).
+    pc.invalidate_secret("app-secret", NAMESPACE)
+
+
+# Tudo que o overlay dev precisa pronto antes dos bootstraps. Esperamos
+# todos ao mesmo tempo (pc.wait_ready), então o timeout vale pro conjunto.
+INFRA_TARGETS = [
+    ("clusters.postgresql.cnpg.io", "postgres"),
+    ("deployments", "garage"),
+    ("statefulsets", "opensearch"),
+    ("deployments", "redis"),
+    ("deployments", "apache-tika"),
+]
+INFRA_TIMEOUT = 600
 
 
 def wait_for_infra() -> None:
-    pc.log("Aguardando PostgreSQL (CloudNativePG)...")
-    pc.run(
-        ["kubectl", "wait", "cluster/postgres", "-n", NAMESPACE, "--for=condition=Ready", "--timeout=300s"]
-    )
-
-    pc.log("Aguardando infra (garage, opensearch)...")
-    pc.run(["kubectl", "rollout", "status", "deployment/garage", "-n", NAMESPACE, "--timeout=120s"])
-    pc.run(["kubectl", "rollout", "status", "statefulset/opensearch", "-n", NAMESPACE, "--timeout=300s"])
-
-    pc.log("Aguardando serviços de aplicação...")
-    pc.run(["kubectl", "rollout", "status", "deployment/redis", "-n", NAMESPACE, "--timeout=120s"])
-    pc.run(["kubectl", "rollout", "status", "deployment/apache-tika", "-n", NAMESPACE, "--timeout=300s"])
+    pc.log("Aguardando infra (postgres, garage, opensearch, redis, apache-tika)...")
+    pc.wait_ready(INFRA_TARGETS, NAMESPACE, timeout=INFRA_TIMEOUT)
 
 
 # ─── Bootstrap do índice do OpenSearch ──────────────────────────────────────
@@ -362,41 +625,43 @@ def wait_for_infra() -> None:
 # segundos, então fazemos polling direto nele.
 
 BOOTSTRAP_POLL_TIMEOUT = 120
-BOOTSTRAP_POLL_INTERVAL = 3
 
-
-def _gazettes_index_exists() -> bool:
-    status = pc.capture(
-        [
-            "kubectl", "exec", "opensearch-0", "-n", NAMESPACE, "--",
-            "curl", "-s", "-o", "/dev/null", "-w", "%{http_code}",
-            f"http://localhost:9200/{GAZETTES_INDEX}",
-        ]
-    )
-    return status == "200"
+# O polling passa por um único port-forward pro OpenSearch, mantido durante
+# todo o bootstrap, com conexão HTTP keep-alive — em vez de um
+# `kubectl exec ... curl` (fork + sessão exec no apiserver) por tentativa.
+OPENSEARCH_SVC = "opensearch"
+OPENSEARCH_FORWARD_PORT = 9201
 
 
-def bootstrap_opensearch_index() -> None:
+def bootstrap_opensearch_index() -> bool:
+    """Best-effort: avisa e segue em frente se o índice não aparecer (ou se
+    nem o port-forward pro OpenSearch abrir)."""
     pc.log(f"Verificando se o índice '{GAZETTES_INDEX}' já existe no OpenSearch...")
-    if _gazettes_index_exists():
-        pc.info(f"Índice '{GAZETTES_INDEX}' já existe.")
-        return
-
-    pc.warn(f"Índice '{GAZETTES_INDEX}' não encontrado — disparando job data-processing para criá-lo...")
-    job_name = dp.trigger_job(name_prefix="data-processing-bootstrap")
-
-    pc.log(f"Aguardando o índice aparecer (até {BOOTSTRAP_POLL_TIMEOUT}s)...")
-    deadline = time.time() + BOOTSTRAP_POLL_TIMEOUT
-    while time.time() < deadline:
-        if _gazettes_index_exists():
-            pc.info(f"Índice '{GAZETTES_INDEX}' criado com sucesso.")
-            return
-        time.sleep(BOOTSTRAP_POLL_INTERVAL)
+    try:
+        with pc.forwarded_http(OPENSEARCH_SVC, OPENSEARCH_FORWARD_PORT, 9200, NAMESPACE, fatal=False) as opensearch:
+            def index_exists() -> bool:
+                return opensearch.status(f"/{GAZETTES_INDEX}", method="HEAD") == 200
+
+            if index_exists():
+                pc.info(f"Índice '{GAZETTES_INDEX}' já existe.")
+                return True
+
+            pc.warn(f"Índice '{GAZETTES_INDEX}' não encontrado — disparando job data-processing para criá-lo...")
+            job_name = dp.trigger_job(name_prefix="data-processing-bootstrap")
+
+            pc.log(f"Aguardando o índice aparecer (até {BOOTSTRAP_POLL_TIMEOUT}s)...")
+            if pc.poll_until(index_exists, BOOTSTRAP_POLL_TIMEOUT):
+                pc.info(f"Índice '{GAZETTES_INDEX}' criado com sucesso.")
+                return True
+    except pc.PortForwardError as e:
+        pc.warn(f"{e} Pulando a verificação do índice '{GAZETTES_INDEX}'.")
+        return False
 
     pc.warn(
         f"Índice '{GAZETTES_INDEX}' não apareceu em {BOOTSTRAP_POLL_TIMEOUT}s. "
         f"Verifique os logs: kubectl logs -n {NAMESPACE} job/{job_name}"
     )
+    return False
 
 
 # ─── Bootstrap do schema do Postgres (territories/gazettes/spiders) ────────
@@ -415,14 +680,16 @@ POSTGRES_SVC = "postgres-rw"
 POSTGRES_FORWARD_PORT = 5433
 
 
-def bootstrap_postgres_schema() -> None:
+def bootstrap_postgres_schema() -> bool:
+    """Retorna False quando o bootstrap não foi concluído (best-effort), pra
+    que o modo incremental tente de novo na próxima execução."""
     dc_dir = spider.data_collection_dir(QD_DIR)
     if not dc_dir.exists():
         pc.info(
             f"Repositório de raspadores não encontrado em {QD_DIR} — pulando "
             "bootstrap do schema do Postgres (territories/gazettes/spiders)."
         )
-        return
+        return False
 
     pc.log("Sincronizando schema/territórios/spiders no Postgres (scrapy qd-sync-spiders)...")
     try:
@@ -430,11 +697,12 @@ def bootstrap_postgres_schema() -> None:
             pc.log("venv dos raspadores não encontrado — criando (make spider-setup)...")
             spider.setup_venv(QD_DIR)
 
-        user = pc.get_secret_value("app-secret", "QD_DATA_DB_USER", NAMESPACE)
-        password = pc.get_secret_value("app-secret", "QD_DATA_DB_PASSWORD", NAMESPACE)
+        app_secret = pc.get_secret("app-secret", NAMESPACE) or {}
+        user = app_secret.get("QD_DATA_DB_USER")
+        password = app_secret.get("QD_DATA_DB_PASSWORD")
         if not user or not password:
             pc.warn("Não consegui ler QD_DATA_DB_USER/QD_DATA_DB_PASSWORD do secret app-secret — pulando.")
-            return
+            return False
 
         with pc.PortForward(POSTGRES_SVC, POSTGRES_FORWARD_PORT, 5432, NAMESPACE):
             env = dict(os.environ)
@@ -445,8 +713,10 @@ def bootstrap_postgres_schema() -> None:
             pc.run([str(spider.venv_scrapy(QD_DIR)), "qd-sync-spiders"], cwd=str(dc_dir), env=env)
 
         pc.info("Schema/territórios/spiders sincronizados no Postgres.")
+        return True
     except Exception as e:  # best-effort — não deve travar o k8s-local-up
         pc.warn(f"Falha ao sincronizar schema do Postgres, siga manualmente depois: {e}")
+        return False
 
 
 # ─── 11. hosts file ──────────────────────────────────────────────────────────
@@ -469,21 +739,190 @@ def check_hosts_file() -> None:
         pc.info("hosts file já configurado.")
 
 
+# ─── Modo incremental ────────────────────────────────────────────────────────
+#
+# Cada passo caro declara um fingerprint das suas entradas e uma checagem
+# rápida do estado ao vivo. Se nada mudou desde a última execução
+# bem-sucedida e o cluster continua no estado esperado, o passo é pulado —
+# um re-run num cluster saudável cai de minutos pra segundos. O ID do nó
+# kind entra em todos os fingerprints, então recriar o cluster invalida tudo.
+# `--force PASSO` (ou `--force all`) ignora o estado gravado.
+
+STATE_FILE = pc.CACHE_DIR / "k8s-local-up-state.json"
+
+
+def _cluster_inputs() -> str:
+    return pc.fingerprint(KIND_CONFIG, _node_id())
+
+
+def _traefik_inputs() -> str:
+    return pc.fingerprint(TRAEFIK_VALUES, _cluster_inputs())
+
+
+def _traefik_deployed() -> bool:
+    return "STATUS: deployed" in (pc.capture(["helm", "status", "traefik", "-n", "traefik"]) or "")
+
+
+def _traefik_ready() -> bool:
+    return pc.resource_ready("daemonsets", pc.kube_get("daemonsets", "traefik", "traefik"))
+
+
+def _preload_inputs() -> str:
+    return pc.fingerprint("\n".join(DEV_INFRA_IMAGES), _cluster_inputs())
+
+
+def _cnpg_inputs() -> str:
+    return pc.fingerprint(CNPG_VERSION, _cluster_inputs())
+
+
+def _cnpg_ready() -> bool:
+    deployment = pc.kube_get("deployments", "cnpg-controller-manager", "cnpg-system") or {}
+    return deployment.get("status", {}).get("availableReplicas", 0) > 0
+
+
+def _overlay_inputs() -> str:
+    return pc.fingerprint(_render_dev_overlay("kubectl") or "", _cluster_inputs())
+
+
+_infra_seen_ready = threading.Event()
+
+
+def _infra_ready() -> bool:
+    """Check de apply-overlay, wait-infra e postgres-schema. Depois que a
+    infra foi vista pronta, não consulta o cluster de novo na mesma execução."""
+    if not _infra_seen_ready.is_set() and all(
+        pc.resource_ready(kind, pc.kube_get(kind, name, NAMESPACE)) for kind, name in INFRA_TARGETS
+    ):
+        _infra_seen_ready.set()
+    return _infra_seen_ready.is_set()
+
+
+def _postgres_schema_inputs() -> str:
+    dc_dir = spider.data_collection_dir(QD_DIR)
+    spiders_dir = dc_dir / "gazette" / "spiders"
+    listing = ""
+    if spiders_dir.is_dir():
+        listing = "\n".join(sorted(p.relative_to(spiders_dir).as_posix() for p in spiders_dir.rglob("*.py")))
+    return pc.fingerprint(
+        dc_dir / "gazette" / "resources" / "territories.csv",
+        listing,
+        _overlay_inputs(),
+    )
+
+
+# ─── Retomada de cluster pausado (k8s-local-pause) ─────────────────────────
+#
+# `k8s_local_down.py --pause` só para o container do nó kind. Nesse caso
+# não há nada pra instalar: basta religar o nó, esperar o apiserver e
+# conferir que a infra voltou — bem menos de um minuto, contra ~10 do
+# caminho completo.
+
+NODE_CONTAINER = f"{CLUSTER_NAME}-control-plane"
+APISERVER_TIMEOUT = 120
+
+
+def cluster_paused() -> bool:
+    return pc.capture(["docker", "inspect", "--format", "{{.State.Status}}", NODE_CONTAINER]) in ("exited", "created")
+
+
+def resume_cluster() -> None:
+    pc.log(f"Cluster '{CLUSTER_NAME}' pausado — religando o nó kind...")
+    pc.run(["docker", "start", NODE_CONTAINER], stdout=pc.subprocess.DEVNULL)
+    pc.run(["kubectl", "config", "use-context", f"kind-{CLUSTER_NAME}"], stdout=pc.subprocess.DEVNULL)
+    pc.reset_kube_client()
+
+    pc.log("Aguardando o apiserver responder...")
+    if not pc.poll_until(lambda: pc.run_ok(["kubectl", "get", "--raw", "/readyz"]), APISERVER_TIMEOUT):
+        pc.err(f"O apiserver não respondeu em {APISERVER_TIMEOUT}s após religar o nó.")
+    pc.info("Nó kind religado.")
+
+
+def resume_steps() -> list[pc.Step]:
+    return [
+        pc.Step("preflight", preflight),
+        pc.Step("dependencies", ensure_dependencies),
+        pc.Step("hosts-file", check_hosts_file),
+        pc.Step("resume-cluster", resume_cluster, deps=("preflight", "dependencies")),
+        pc.Step("registry-mirrors", ensure_registry_mirrors, deps=("resume-cluster",)),
+        pc.Step("traefik-rollout", wait_for_traefik, deps=("resume-cluster",)),
+        pc.Step("wait-infra", wait_for_infra, deps=("resume-cluster",)),
+    ]
+
+
 # ─── main ────────────────────────────────────────────────────────────────────
 
+def setup_steps() -> list[pc.Step]:
+    """Passos do setup e suas dependências. Ramos independentes rodam em
+    paralelo — ex: pré-carga de imagens, CNPG e rollout do Traefik ao mesmo
+    tempo, e hosts file a qualquer momento."""
+    return [
+        pc.Step("preflight", preflight),
+        pc.Step("dependencies", ensure_dependencies),
+        pc.Step("validate-overlay", lambda: validate_dev_overlay_builds("kubectl"), deps=("dependencies",)),
+        pc.Step("hosts-file", check_hosts_file),
+        pc.Step("cluster", ensure_cluster, deps=("preflight", "dependencies", "validate-overlay")),
+        pc.Step("registry-mirrors", ensure_registry_mirrors, deps=("cluster",)),
+        pc.Step(
+            "traefik", install_traefik, deps=("cluster", "registry-mirrors"),
+            inputs=_traefik_inputs, check=_traefik_deployed,
+        ),
+        pc.Step(
+            "traefik-rollout", wait_for_traefik, deps=("traefik",),
+            inputs=_traefik_inputs, check=_traefik_ready,
+        ),
+        pc.Step("preload-images", preload_dev_infra_images, deps=("cluster",), inputs=_preload_inputs),
+        pc.Step(
+            "cnpg", install_cnpg, deps=("cluster", "registry-mirrors"),
+            inputs=_cnpg_inputs, check=_cnpg_ready,
+        ),
+        # Aplicar só depois da pré-carga evita que os pods comecem a puxar da
+        # internet as mesmas imagens que estão sendo carregadas no nó.
+        pc.Step(
+            "apply-overlay", apply_dev_overlay, deps=("traefik", "cnpg", "preload-images"),
+            inputs=_overlay_inputs, check=_infra_ready,
+        ),
+        pc.Step("wait-infra", wait_for_infra, deps=("apply-overlay",), inputs=_overlay_inputs, check=_infra_ready),
+        pc.Step("opensearch-index", bootstrap_opensearch_index, deps=("wait-infra",)),
+        pc.Step(
+            "postgres-schema", bootstrap_postgres_schema, deps=("wait-infra",),
+            inputs=_postgres_schema_inputs, check=_infra_ready,
+        ),
+    ]
+
+
+def parse_args(step_names: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--force",
+        action="append",
+        default=[],
+        metavar="STEP",
+        choices=[*step_names, "all"],
+        help=(
+            "Roda o passo mesmo que as entradas não tenham mudado (pode repetir; "
+            f"'all' força todos). Passos: {', '.join(step_names)}"
+        ),
+    )
+    return parser.parse_args()
+
+
 def main() -> None:
-    preflight()
-    ensure_dependencies()
-    validate_dev_overlay_builds("kubectl")
-    ensure_cluster()
-    install_traefik()
-    preload_dev_infra_images()
-    install_cnpg()
-    apply_dev_overlay()
-    wait_for_infra()
-    bootstrap_opensearch_index()
-    bootstrap_postgres_schema()
-    check_hosts_file()
+    steps = setup_steps()
+    args = parse_args([s.name for s in steps])
+
+    if cluster_paused():
+        resumed = resume_steps()
+        pc.run_steps(resumed)
+        if not args.force:
+            pc.print_step_report(resumed)
+            print()
+            pc.log("Cluster retomado!")
+            print()
+            return
+        pc.info("--force informado — seguindo com o setup completo.")
+
+    pc.run_steps(steps, state=pc.StepState(STATE_FILE), force=args.force)
+    pc.print_step_report(steps)
 
     print()
     pc.log("Setup concluído!")
@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+"""k8s_portforward_daemon.py — Port-forwards de longa duração, compartilhados
+entre comandos, para os serviços do cluster kind local.
+
+Sem o daemon, cada `spider.py run`, `k8s-local-up` etc. abre o próprio
+`kubectl port-forward`, espera a porta abrir e o derruba no fim — e dois
+comandos ao mesmo tempo brigam pela mesma porta local (5434, 3910...). Com
+o daemon rodando, pc.PortForward pega um lease do forward que ele mantém
+aberto: uma ida e volta em 127.0.0.1, sem processo novo.
+
+O daemon conta as referências de cada forward (um lease por conexão de
+cliente; a conexão fechada libera o lease), confere a saúde dos túneis a
+cada HEALTH_INTERVAL segundos e reabre os que caíram (com backoff). Forwards
+sem nenhum lease há mais de --idle minutos são fechados, e o daemon sai
+quando não sobra nenhum.
+
+Uso:
+    python3 scripts/k8s_portforward_daemon.py start [--idle MIN]
+    python3 scripts/k8s_portforward_daemon.py status
+    python3 scripts/k8s_portforward_daemon.py stop
+    python3 scripts/k8s_portforward_daemon.py serve [--idle MIN]   (primeiro plano)
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import os
+import signal
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import pycommon as pc  # noqa: E402
+
+NAMESPACE = "querido-diario"
+
+# Abertos já no start (se o serviço existir): as mesmas portas locais que
+# spider.py (Postgres, Garage) e o k8s-local-up (OpenSearch) usam. Qualquer
+# outro forward é aberto sob demanda, no primeiro `acquire`.
+DEFAULT_FORWARDS = [
+    ("postgres-rw", 5434, 5432),
+    ("garage", 3910, 3900),
+    ("opensearch", 9201, 9200),
+]
+
+LOG_FILE = pc.CACHE_DIR / "portforward-daemon.log"
+HEALTH_INTERVAL = 5.0
+RESTART_BACKOFF_MAX = 60.0
+DEFAULT_IDLE_MINUTES = 30
+START_TIMEOUT = 30.0
+
+
+def _port_free(port: int) -> bool:
+    """True se dá pra escutar em 127.0.0.1:port. Sem essa checagem, um
+    `kubectl port-forward` manual esquecido na porta responderia ao
+    wait_for_port antes do nosso kubectl falhar no bind."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        if not pc.IS_WINDOWS:
+            # Só ignora conexões em TIME_WAIT; um listener ainda bloqueia o
+            # bind (no Windows, SO_REUSEADDR deixaria "roubar" a porta).
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            sock.bind(("127.0.0.1", port))
+        except OSError:
+            return False
+    return True
+
+
+class Forward:
+    """Um `kubectl port-forward` gerenciado pelo daemon."""
+
+    def __init__(self, service: str, namespace: str, local_port: int, remote_port: int):
+        self.service = service
+        self.namespace = namespace
+        self.local_port = local_port
+        self.remote_port = remote_port
+        self.refs = 0
+        self.restarts = 0
+        self.failures = 0
+        self.healthy = False
+        self.error: str | None = None  # motivo da última falha ao abrir
+        self.next_attempt = 0.0
+        self.idle_since = time.monotonic()
+        self._proc: subprocess.Popen | None = None
+        # Serializa abrir/reabrir: vários `acquire` simultâneos pro mesmo
+        # forward esperam o mesmo kubectl em vez de abrir um cada.
+        self._lock = threading.Lock()
+
+    def target(self) -> tuple[str, str, int]:
+        return (self.service, self.namespace, self.remote_port)
+
+    def label(self) -> str:
+        return f"svc/{self.service}:{self.remote_port} -> 127.0.0.1:{self.local_port}"
+
+    def alive(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None and pc.wait_for_port(self.local_port, timeout=1.0)
+
+    def ready(self) -> bool:
+        """Pronto segundo a última checagem de saúde (sem tocar na rede):
+        é o caminho do `acquire` num forward já aberto."""
+        return self.healthy and self._proc is not None and self._proc.poll() is None
+
+    def ensure(self) -> bool:
+        """Garante o túnel de pé, reabrindo se o processo morreu ou a porta
+        parou de aceitar conexões. True se está pronto."""
+        with self._lock:
+            self.healthy = self.alive()
+            if self.healthy:
+                return True
+            reopening = self._proc is not None
+            self._terminate()
+            if not _port_free(self.local_port):
+                return self._failed(f"porta {self.local_port} já está em uso por outro processo")
+            self._proc = subprocess.Popen(
+                [
+                    "kubectl", "port-forward",
+                    f"svc/{self.service}", f"{self.local_port}:{self.remote_port}",
+                    "-n", self.namespace,
+                ],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            if pc.wait_for_port(self.local_port) and self._proc.poll() is None:
+                if reopening:
+                    self.restarts += 1
+                    pc.info(f"Reaberto: {self.label()}")
+                self.failures = 0
+                self.error = None
+                self.healthy = True
+                return True
+            self._terminate()
+            return self._failed(f"kubectl port-forward para svc/{self.service} não abriu")
+
+    def _failed(self, reason: str) -> bool:
+        self.error = reason
+        self.failures += 1
+        self.next_attempt = time.monotonic() + min(RESTART_BACKOFF_MAX, 2.0 ** self.failures)
+        pc.warn(f"Falha ao abrir {self.label()}: {reason} (tentativa {self.failures}).")
+        return False
+
+    def close(self) -> None:
+        with self._lock:
+            self._terminate()
+
+    def _terminate(self) -> None:
+        if self._proc is None:
+            return
+        self._proc.terminate()
+        try:
+            self._proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self._proc.kill()
+        self._proc = None
+
+    def describe(self) -> dict:
+        return {
+            "service": self.service,
+            "namespace": self.namespace,
+            "local_port": self.local_port,
+            "remote_port": self.remote_port,
+            "refs": self.refs,
+            "up": self.ready(),
+            "restarts": self.restarts,
+            "failures": self.failures,
+            "error": self.error,
+            "idle_s": round(time.monotonic() - self.idle_since) if self.refs == 0 else 0,
+        }
+
+
+class Daemon:
+    def __init__(self, idle_seconds: float):
+        self.idle_seconds = idle_seconds
+        self.forwards: dict[int, Forward] = {}  # porta local -> forward
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self._lease_ids = itertools.count(1)
+        self.started = time.time()
+        self.empty_since = time.monotonic()
+
+    # ── Leases ──
+
+    def acquire(self, message: dict) -> tuple[dict, Forward | None]:
+        try:
+            service = str(message["service"])
+            namespace = str(message.get("namespace") or NAMESPACE)
+            local_port = int(message["local_port"])
+            remote_port = int(message["remote_port"])
+        except (KeyError, TypeError, ValueError):
+            return {"ok": False, "error": "acquire exige service, local_port e remote_port"}, None
+
+        with self.lock:
+            forward = self.forwards.get(local_port)
+            if forward is None:
+                forward = self.forwards[local_port] = Forward(service, namespace, local_port, remote_port)
+            elif forward.target() != (service, namespace, remote_port):
+                return {"ok": False, "error": f"porta {local_port} já está em uso por {forward.label()}"}, None
+            # Conta a referência antes de abrir: o coletor de ociosos não
+            # fecha um forward que alguém está esperando.
+            forward.refs += 1
+        if not forward.ready() and not forward.ensure():
+            self.release(forward)
+            return {"ok": False, "error": forward.error or f"kubectl port-forward para svc/{service} não abriu"}, None
+        return {"ok": True, "lease": next(self._lease_ids), "port": local_port}, forward
+
+    def release(self, forward: Forward) -> None:
+        with self.lock:
+            forward.refs -= 1
+            if forward.refs == 0:
+                forward.idle_since = time.monotonic()
+
+    def status(self) -> dict:
+        with self.lock:
+            forwards = [f.describe() for f in sorted(self.forwards.values(), key=lambda f: f.local_port)]
+        return {"ok": True, "pid": os.getpid(), "uptime_s": round(time.time() - self.started), "forwards": forwards}
+
+    # ── Manutenção ──
+
+    def preload(self) -> None:
+        for service, local_port, remote_port in DEFAULT_FORWARDS:
+            if not pc.kube_exists("services", service, NAMESPACE):
+                pc.info(f"svc/{service} não existe no cluster — não será pré-aberto.")
+                continue
+            with self.lock:
+                forward = self.forwards.setdefault(local_port, Forward(service, NAMESPACE, local_port, remote_port))
+            threading.Thread(target=forward.ensure, daemon=True).start()
+
+    def maintain(self) -> None:
+        """Laço de saúde: reabre túneis caídos e fecha os ociosos."""
+        while not self.stopping.wait(HEALTH_INTERVAL):
+            now = time.monotonic()
+            with self.lock:
+                forwards = list(self.forwards.values())
+            for forward in forwards:
+                with self.lock:
+                    expired = (
+                        self.idle_seconds > 0
+                        and forward.refs == 0
+                        and now - forward.idle_since > self.idle_seconds
+                    )
+                    if expired:
+                        # Fecha com o lock: um `acquire` da mesma porta só
+                        # cria o Forward novo depois que o kubectl antigo
+                        # saiu (senão o novo veria o listener velho).
+                        pc.info(f"Fechando forward ocioso: {forward.label()}")
+                        forward.close()
+                        del self.forwards[forward.local_port]
+                if not expired and now >= forward.next_attempt:
+                    forward.ensure()
+            with self.lock:
+                if self.forwards:
+                    self.empty_since = now
+                empty_for = now - self.empty_since
+            if self.idle_seconds > 0 and empty_for > self.idle_seconds:
+                pc.info("Nenhum forward em uso — encerrando o daemon.")
+                self.stopping.set()
+
+    def close_all(self) -> None:
+        with self.lock:
+            forwards = list(self.forwards.values())
+            self.forwards.clear()
+        for forward in forwards:
+            forward.close()
+
+
+class _ClientHandler(socketserver.StreamRequestHandler):
+    """Uma conexão de cliente: um objeto JSON por linha. Os leases pegos
+    nela são liberados quando ela fecha."""
+
+    server: "_ControlServer"
+
+    def handle(self) -> None:
+        daemon = self.server.daemon
+        leases: dict[int, Forward] = {}
+        try:
+            for raw in self.rfile:
+                try:
+                    message = json.loads(raw)
+                except ValueError:
+                    self._reply({"ok": False, "error": "JSON inválido"})
+                    continue
+                op = message.get("op")
+                if op == "acquire":
+                    reply, forward = daemon.acquire(message)
+                    if forward is not None:
+                        leases[reply["lease"]] = forward
+                elif op == "release":
+                    forward = leases.pop(message.get("lease"), None)
+                    if forward is not None:
+                        daemon.release(forward)
+                    reply = {"ok": forward is not None}
+                elif op == "status":
+                    reply = daemon.status()
+                elif op == "stop":
+                    reply = {"ok": True}
+                    daemon.stopping.set()
+                else:
+                    reply = {"ok": False, "error": f"op desconhecida: {op!r}"}
+                self._reply(reply)
+        except OSError:
+            pass
+        finally:
+            for forward in leases.values():
+                daemon.release(forward)
+
+    def _reply(self, reply: dict) -> None:
+        self.wfile.write((json.dumps(reply) + "\n").encode())
+        self.wfile.flush()
+
+
+class _ControlServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, daemon: Daemon):
+        super().__init__(("127.0.0.1", pc.PF_DAEMON_PORT), _ClientHandler)
+        self.daemon = daemon
+
+
+def serve(idle_minutes: float) -> None:
+    daemon = Daemon(idle_minutes * 60)
+    try:
+        server = _ControlServer(daemon)
+    except OSError as e:
+        pc.err(f"Não foi possível escutar em 127.0.0.1:{pc.PF_DAEMON_PORT} ({e}) — já há um daemon rodando?")
+
+    def request_stop(*_args) -> None:
+        daemon.stopping.set()
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    # Pré-abertura antes de atender: o primeiro `status` do `start` já
+    # enxerga os forwards (ainda subindo).
+    daemon.preload()
+    pc.log(f"Daemon de port-forward escutando em 127.0.0.1:{pc.PF_DAEMON_PORT} (pid {os.getpid()})")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    threading.Thread(target=daemon.maintain, daemon=True).start()
+    try:
+        while not daemon.stopping.wait(1.0):
+            pass
+    finally:
+        server.shutdown()
+        server.server_close()
+        daemon.close_all()
+        pc.log("Daemon de port-forward encerrado.")
+
+
+# ─── Controle (start/status/stop) ───────────────────────────────────────────
+
+def _request(message: dict) -> dict | None:
+    conn = pc.pf_daemon_connect()
+    if conn is None:
+        return None
+    with conn:
+        return pc.pf_daemon_call(conn, message)
+
+
+def _print_status(status: dict) -> None:
+    pc.info(f"Daemon de port-forward: pid {status['pid']}, porta de controle {pc.PF_DAEMON_PORT}, "
+            f"há {status['uptime_s']}s no ar")
+    if not status["forwards"]:
+        print("    (nenhum forward aberto)")
+    for f in status["forwards"]:
+        state = "ok" if f["up"] else f"fora do ar ({f['error']})" if f.get("error") else "fora do ar"
+        idle = f", ocioso há {f['idle_s']}s" if f["refs"] == 0 else ""
+        print(
+            f"    svc/{f['service']}:{f['remote_port']} -> 127.0.0.1:{f['local_port']}  "
+            f"{state}, {f['refs']} lease(s), {f['restarts']} reabertura(s){idle}"
+        )
+
+
+def cmd_start(args: argparse.Namespace) -> None:
+    status = _request({"op": "status"})
+    if status is None:
+        LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
+        cmd = [sys.executable, str(Path(__file__).resolve()), "serve", "--idle", str(args.idle)]
+        detach = (
+            {"creationflags": subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP}
+            if pc.IS_WINDOWS
+            else {"start_new_session": True}
+        )
+        with open(LOG_FILE, "a", encoding="utf-8") as log:
+            subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT, **detach)
+        pc.log(f"Iniciando daemon de port-forward (log em {LOG_FILE})...")
+
+        # Espera o controle responder e cada forward pré-aberto subir (ou falhar).
+        def settled() -> bool:
+            current = _request({"op": "status"})
+            return current is not None and all(f["up"] or f["failures"] for f in current["forwards"])
+
+        pc.poll_until(settled, timeout=START_TIMEOUT)
+        status = _request({"op": "status"})
+        if status is None:
+            pc.err(f"O daemon não respondeu em {START_TIMEOUT:.0f}s — veja {LOG_FILE}.")
+    else:
+        pc.info("Daemon de port-forward já está rodando.")
+    _print_status(status)
+
+
+def cmd_status(_args: argparse.Namespace) -> None:
+    status = _request({"op": "status"})
+    if status is None:
+        pc.info("Daemon de port-forward não está rodando (make k8s-local-forwards para iniciar).")
+        return
+    _print_status(status)
+
+
+def stop_daemon() -> bool:
+    """Encerra o daemon se estiver rodando. True se havia um daemon."""
+    if _request({"op": "stop"}) is None:
+        return False
+    pc.poll_until(lambda: _request({"op": "status"}) is None, timeout=10)
+    return True
+
+
+def cmd_stop(_args: argparse.Namespace) -> None:
+    if stop_daemon():
+        pc.log("Daemon de port-forward encerrado.")
+    else:
+        pc.info("Daemon de port-forward não estava rodando.")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in [
+        ("start", "Inicia o daemon em background"),
+        ("serve", "Roda o daemon em primeiro plano"),
+    ]:
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument(
+            "--idle", type=float, default=DEFAULT_IDLE_MINUTES,
+            help=f"Minutos sem lease até fechar um forward; 0 = nunca (padrão: {DEFAULT_IDLE_MINUTES})",
+        )
+    sub.add_parser("status", help="Mostra os forwards abertos e seus leases")
+    sub.add_parser("stop", help="Encerra o daemon e os forwards")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve(args.idle)
+        return
+    {"start": cmd_start, "status": cmd_status, "stop": cmd_stop}[args.command](args)
+
+
+if __name__ == "__main__":
+    main()
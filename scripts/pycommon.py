@@ -6,21 +6,35 @@ os scripts rodem em qualquer máquina com Python 3.9+ instalado, sem exigir
 """
 from __future__ import annotations
 
+import atexit
+import base64
+import errno
+import hashlib
+import http.client
 import json
 import os
 import platform
+import random
+import selectors
 import shutil
 import socket
+import ssl
 import stat
 import subprocess
 import sys
 import tarfile
 import tempfile
+import threading
+import time
 import urllib.error
+import urllib.parse
 import urllib.request
 import zipfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, Sequence
+from typing import Callable, Collection, Iterable, Iterator, Sequence
 
 IS_WINDOWS = platform.system() == "Windows"
 IS_MACOS = platform.system() == "Darwin"
@@ -32,6 +46,10 @@ REPO_ROOT = Path(__file__).resolve().parent.parent
 # Mesmo caminho em todos os SOs: só uma pasta dentro do home do usuário.
 LOCAL_BIN = Path.home() / ".local" / "bin"
 
+# Cache dos scripts (estado do modo incremental, downloads etc.). Respeita
+# XDG_CACHE_HOME quando definido; senão ~/.cache, em qualquer SO.
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "querido-diario-deployment"
+
 
 # ─── Saída colorida ────────────────────────────────────────────────────────
 
@@ -76,19 +94,184 @@ def err(msg: str) -> None:
     sys.exit(1)
 
 
+def env_int(name: str, default: int) -> int:
+    """Inteiro da variável de ambiente `name`; valor inválido cai no padrão
+    (com aviso) em vez de derrubar o import do módulo."""
+    raw = os.environ.get(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return int(raw)
+    except ValueError:
+        warn(f"{name}={raw!r} não é um inteiro; usando {default}.")
+        return default
+
+
+# ─── Trace de execução ──────────────────────────────────────────────────────
+#
+# Com QD_TRACE=arquivo.json, cada comando executado por run/capture/run_ok
+# (e cada requisição à API do Kubernetes, port-forward e passo do
+# run_steps) vira um span com início, fim, código de saída e o passo que o
+# disparou. Na saída do processo os spans são gravados no formato
+# trace-event do Chrome (abre em chrome://tracing ou ui.perfetto.dev) e uma
+# tabela com os comandos mais lentos é impressa.
+
+TRACE_FILE = os.environ.get("QD_TRACE") or None
+TRACE_SUMMARY_LIMIT = 15
+
+_trace_origin = time.perf_counter()
+_trace_lock = threading.Lock()
+_trace_spans: list[dict] = []
+_trace_local = threading.local()
+
+
+def current_step() -> str | None:
+    """Passo do run_steps que a thread atual está executando (ou None)."""
+    return getattr(_trace_local, "step", None)
+
+
+@contextmanager
+def step_context(step: str | None) -> Iterator[None]:
+    """Atribui os spans abertos nesta thread ao passo `step`."""
+    previous = current_step()
+    _trace_local.step = step
+    try:
+        yield
+    finally:
+        _trace_local.step = previous
+
+
+def bind_step(func: Callable) -> Callable:
+    """Amarra `func` ao passo atual, pra ser chamada em outra thread (pool)
+    sem perder a atribuição dos spans."""
+    step = current_step()
+
+    def bound(*args, **kwargs):
+        with step_context(step):
+            return func(*args, **kwargs)
+
+    return bound
+
+
+@contextmanager
+def span(name: str, cat: str, **args) -> Iterator[dict]:
+    """Registra um span de trace em volta do bloco. O dict devolvido vai
+    para os `args` do evento — o chamador pode completá-lo (ex: "exit").
+    Sem QD_TRACE não registra nada."""
+    if TRACE_FILE is None:
+        yield args
+        return
+    start = time.perf_counter()
+    try:
+        yield args
+    finally:
+        end = time.perf_counter()
+        thread = threading.current_thread()
+        record = {
+            "name": name,
+            "cat": cat,
+            "start": start - _trace_origin,
+            "end": end - _trace_origin,
+            "tid": thread.ident,
+            "thread": thread.name,
+            "step": current_step(),
+            "args": args,
+        }
+        with _trace_lock:
+            _trace_spans.append(record)
+
+
+def _command_label(cmd: Sequence[str]) -> str:
+    """Nome curto do comando pro trace: binário + subcomandos (sem flags)."""
+    words = [Path(cmd[0]).name] if cmd else []
+    for part in cmd[1:]:
+        if part.startswith("-") or len(words) == 3:
+            break
+        words.append(part)
+    return " ".join(words)
+
+
+def _subprocess_run(cmd: Sequence[str], **kwargs) -> subprocess.CompletedProcess:
+    """subprocess.run dentro de um span com o comando e o código de saída."""
+    cmd = list(cmd)
+    with span(_command_label(cmd), "cmd", command=" ".join(cmd)) as args:
+        try:
+            proc = subprocess.run(cmd, **kwargs)
+        except subprocess.CalledProcessError as e:
+            args["exit"] = e.returncode
+            raise
+        except OSError as e:
+            args["error"] = str(e)
+            raise
+        args["exit"] = proc.returncode
+        return proc
+
+
+def _write_trace() -> None:
+    with _trace_lock:
+        spans = sorted(_trace_spans, key=lambda s: s["start"])
+    if not spans:
+        return
+    pid = os.getpid()
+    events = []
+    for tid, thread in {s["tid"]: s["thread"] for s in spans}.items():
+        events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": thread}})
+    for s in spans:
+        args = dict(s["args"])
+        if s["step"]:
+            args["step"] = s["step"]
+        events.append(
+            {
+                "name": s["name"],
+                "cat": s["cat"],
+                "ph": "X",
+                "ts": round(s["start"] * 1e6),
+                "dur": round((s["end"] - s["start"]) * 1e6),
+                "pid": pid,
+                "tid": s["tid"],
+                "args": args,
+            }
+        )
+    path = Path(TRACE_FILE)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}), encoding="utf-8")
+    except OSError as e:
+        warn(f"Não foi possível gravar o trace em {path}: {e}")
+        return
+
+    commands = sorted((s for s in spans if s["cat"] == "cmd"), key=lambda s: s["start"] - s["end"])
+    total = sum(s["end"] - s["start"] for s in commands)
+    out = sys.stderr
+    print(file=out)
+    print(f"Comandos mais lentos ({len(commands)} executados, {total:.1f}s somados):", file=out)
+    print(f"  {'tempo':>7}  {'saída':>5}  {'passo':<18} comando", file=out)
+    for s in commands[:TRACE_SUMMARY_LIMIT]:
+        code = s["args"].get("exit", "-")
+        command = s["args"]["command"]
+        if len(command) > 70:
+            command = command[:67] + "..."
+        print(f"  {s['end'] - s['start']:6.1f}s  {code!s:>5}  {s['step'] or '-':<18} {command}", file=out)
+    print(f"Trace completo: {path} (abra em chrome://tracing ou https://ui.perfetto.dev)", file=out)
+
+
+if TRACE_FILE is not None:
+    atexit.register(_write_trace)
+
+
 # ─── Execução de comandos ──────────────────────────────────────────────────
 
 def run(cmd: Sequence[str], **kwargs) -> subprocess.CompletedProcess:
     """Executa um comando, propagando stdout/stderr, e falha em erro (exceto se check=False)."""
     kwargs.setdefault("check", True)
-    return subprocess.run(list(cmd), **kwargs)
+    return _subprocess_run(cmd, **kwargs)
 
 
 def run_ok(cmd: Sequence[str]) -> bool:
     """True se o comando existe e roda com código de saída 0 (silencioso)."""
     try:
-        subprocess.run(
-            list(cmd),
+        _subprocess_run(
+            cmd,
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL,
             check=True,
@@ -101,8 +284,8 @@ def run_ok(cmd: Sequence[str]) -> bool:
 def capture(cmd: Sequence[str]) -> str | None:
     """Roda um comando e retorna stdout (str) ou None se falhar."""
     try:
-        proc = subprocess.run(
-            list(cmd),
+        proc = _subprocess_run(
+            cmd,
             stdout=subprocess.PIPE,
             stderr=subprocess.DEVNULL,
             check=True,
@@ -150,12 +333,16 @@ def find_python(preferred_versions: Sequence[str], fallback: bool = True) -> str
     err(f"Nenhum Python encontrado entre as versões preferidas: {', '.join(preferred_versions)}")
 
 
+_path_lock = threading.Lock()
+
+
 def ensure_path_has(directory: Path) -> None:
     """Garante que `directory` esteja no PATH do processo atual (e filhos)."""
     directory_str = str(directory)
-    parts = os.environ.get("PATH", "").split(os.pathsep)
-    if directory_str not in parts:
-        os.environ["PATH"] = directory_str + os.pathsep + os.environ.get("PATH", "")
+    with _path_lock:
+        parts = os.environ.get("PATH", "").split(os.pathsep)
+        if directory_str not in parts:
+            os.environ["PATH"] = directory_str + os.pathsep + os.environ.get("PATH", "")
 
 
 # ─── Plataforma / arquitetura ──────────────────────────────────────────────
@@ -182,21 +369,183 @@ def exe(name: str) -> str:
 
 # ─── Download / instalação de binários ─────────────────────────────────────
 
-def _download(url: str, dest: Path) -> None:
+# Cache persistente de downloads (kubectl/kind/helm...), por URL, verificado
+# por SHA-256: reinstalar (~/.local/bin apagado, devcontainer recriado, runner
+# de CI novo com cache restaurado) não baixa nada de novo. Downloads
+# interrompidos ficam como .part e são retomados via HTTP Range. Acima de
+# QD_DOWNLOAD_CACHE_MAX_MB, os arquivos usados há mais tempo saem primeiro.
+DOWNLOAD_CACHE_DIR = CACHE_DIR / "downloads"
+DOWNLOAD_CACHE_MAX_MB = env_int("QD_DOWNLOAD_CACHE_MAX_MB", 1024)
+
+
+def _sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _fetch_checksum(url: str) -> str:
+    """Lê um arquivo de checksum publicado upstream ("<hash>" ou "<hash>  <arquivo>")."""
     req = urllib.request.Request(url, headers={"User-Agent": "querido-diario-deployment"})
     try:
-        with urllib.request.urlopen(req) as resp, open(dest, "wb") as f:
-            shutil.copyfileobj(resp, f)
+        with urllib.request.urlopen(req) as resp:
+            text = resp.read().decode("utf-8", "replace")
+    except (urllib.error.URLError, urllib.error.HTTPError) as e:
+        err(f"Falha ao baixar checksum {url}: {e}")
+    token = text.split()[0].lower() if text.split() else ""
+    if len(token) != 64 or any(c not in "0123456789abcdef" for c in token):
+        err(f"Checksum inválido em {url}: {text[:80]!r}")
+    return token
+
+
+def _fetch_resumable(url: str, part: Path) -> None:
+    """Baixa `url` em `part`, continuando de onde parou se o arquivo já existir."""
+    offset = part.stat().st_size if part.exists() else 0
+    headers = {"User-Agent": "querido-diario-deployment"}
+    if offset:
+        headers["Range"] = f"bytes={offset}-"
+    req = urllib.request.Request(url, headers=headers)
+    try:
+        with urllib.request.urlopen(req) as resp:
+            if offset and resp.status == 206:
+                log(f"Retomando download a partir de {offset // 1024} KiB...")
+                mode = "ab"
+            else:
+                mode = "wb"
+            with open(part, mode) as f:
+                shutil.copyfileobj(resp, f, 1024 * 1024)
     except urllib.error.HTTPError as e:
+        if e.code == 416 and offset:
+            return  # o .part já estava completo
         err(f"Falha ao baixar {url}: HTTP {e.code}")
     except urllib.error.URLError as e:
         err(f"Falha ao baixar {url}: {e.reason}")
+    except OSError as e:
+        err(f"Download de {url} interrompido ({e}). Rode de novo para retomar de onde parou.")
 
 
-def github_latest_tag(repo: str) -> str:
-    """Consulta a tag da última release de um repo GitHub (ex: 'helm/helm')."""
+def _evict_downloads(keep: str) -> None:
+    """LRU acima de DOWNLOAD_CACHE_MAX_MB. Downloads interrompidos (.part)
+    entram na conta pelo mtime: se a URL nunca mais for pedida (ex: versão
+    nova), o .part não fica no cache pra sempre."""
+    limit = DOWNLOAD_CACHE_MAX_MB * 1024 * 1024
+    entries = []
+    for meta_path in DOWNLOAD_CACHE_DIR.glob("*.json"):
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        key = meta_path.stem
+        files = [DOWNLOAD_CACHE_DIR / key, meta_path]
+        entries.append((meta.get("last_used", 0), key, meta.get("size", 0), files))
+    for part in DOWNLOAD_CACHE_DIR.glob("*.part"):
+        try:
+            st = part.stat()
+        except OSError:
+            continue
+        entries.append((st.st_mtime, part.stem, st.st_size, [part]))
+    total = sum(size for _, _, size, _ in entries)
+    for _, key, size, files in sorted(entries, key=lambda e: e[0]):
+        if total <= limit:
+            break
+        if key == keep:
+            continue
+        for path in files:
+            path.unlink(missing_ok=True)
+        total -= size
+
+
+def cached_download(url: str, checksum_url: str | None = None) -> Path:
+    """Caminho de `url` no cache de downloads, baixando só se preciso.
+
+    Com `checksum_url`, o download novo é conferido contra o SHA-256
+    publicado upstream; hits no cache são conferidos contra o hash gravado
+    (sem tráfego de rede)."""
+    DOWNLOAD_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+    blob = DOWNLOAD_CACHE_DIR / key
+    meta_path = DOWNLOAD_CACHE_DIR / f"{key}.json"
+    part = DOWNLOAD_CACHE_DIR / f"{key}.part"
+
+    meta = None
+    if blob.exists():
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            meta = None
+        if meta is None or _sha256_file(blob) != meta.get("sha256"):
+            warn(f"Cache de {url} corrompido — baixando de novo.")
+            blob.unlink(missing_ok=True)
+            meta = None
+        else:
+            info(f"Usando {url} do cache ({blob}).")
+
+    if meta is None:
+        expected = _fetch_checksum(checksum_url) if checksum_url else None
+        log(f"Baixando {url} ...")
+        _fetch_resumable(url, part)
+        digest = _sha256_file(part)
+        if expected and digest != expected:
+            part.unlink(missing_ok=True)
+            err(f"SHA-256 de {url} não confere com {checksum_url} (esperado {expected}, obtido {digest}).")
+        os.replace(part, blob)
+        meta = {"url": url, "sha256": digest, "size": blob.stat().st_size}
+
+    meta["last_used"] = time.time()
+    tmp = meta_path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(meta), encoding="utf-8")
+    os.replace(tmp, meta_path)
+    _evict_downloads(keep=key)
+    return blob
+
+
+def _download(url: str, dest: Path, checksum_url: str | None = None) -> None:
+    shutil.copyfile(cached_download(url, checksum_url), dest)
+
+
+# Versões "latest" resolvidas (release estável do kubectl, última tag do
+# helm no GitHub...) ficam num cache em disco por QD_VERSION_CACHE_TTL
+# segundos (padrão: 1 dia). Re-execuções e jobs de CI não repetem a
+# consulta — a API do GitHub sem token limita a 60 requisições/hora por IP.
+VERSION_CACHE_FILE = CACHE_DIR / "versions.json"
+VERSION_CACHE_TTL = env_int("QD_VERSION_CACHE_TTL", 24 * 3600)
+_version_cache_lock = threading.Lock()
+
+
+def _read_version_cache() -> dict:
+    try:
+        return json.loads(VERSION_CACHE_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def cached_version(key: str, resolve: Callable[[], str]) -> str:
+    """Versão guardada em cache para `key`, ou `resolve()` se ausente/expirada."""
+    with _version_cache_lock:
+        entry = _read_version_cache().get(key)
+    if entry and time.time() - entry.get("resolved_at", 0) < VERSION_CACHE_TTL:
+        return entry["version"]
+
+    version = resolve()
+    with _version_cache_lock:
+        data = _read_version_cache()
+        data[key] = {"version": version, "resolved_at": time.time()}
+        VERSION_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp = VERSION_CACHE_FILE.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, VERSION_CACHE_FILE)
+    return version
+
+
+def _github_latest_tag_uncached(repo: str) -> str:
     url = f"https://api.github.com/repos/{repo}/releases/latest"
-    req = urllib.request.Request(url, headers={"User-Agent": "querido-diario-deployment"})
+    headers = {"User-Agent": "querido-diario-deployment"}
+    # Com token (ex: GITHUB_TOKEN num runner de CI), o limite sobe pra 5000/h.
+    if os.environ.get("GITHUB_TOKEN"):
+        headers["Authorization"] = f"Bearer {os.environ['GITHUB_TOKEN']}"
+    req = urllib.request.Request(url, headers=headers)
     try:
         with urllib.request.urlopen(req) as resp:
             data = json.load(resp)
@@ -205,44 +554,81 @@ def github_latest_tag(repo: str) -> str:
         err(f"Não foi possível consultar a última versão de {repo}: {e}")
 
 
-def install_raw_binary(url: str, bin_name: str) -> Path:
+def github_latest_tag(repo: str) -> str:
+    """Consulta a tag da última release de um repo GitHub (ex: 'helm/helm')."""
+    return cached_version(f"github:{repo}", lambda: _github_latest_tag_uncached(repo))
+
+
+def install_raw_binary(url: str, bin_name: str, checksum_url: str | None = None) -> Path:
     """Baixa um binário único (sem arquivo compactado) para LOCAL_BIN."""
     LOCAL_BIN.mkdir(parents=True, exist_ok=True)
     dest = LOCAL_BIN / exe(bin_name)
-    log(f"Baixando {bin_name} de {url} ...")
-    _download(url, dest)
+    log(f"Instalando {bin_name} de {url} ...")
+    _download(url, dest, checksum_url)
     if not IS_WINDOWS:
         dest.chmod(dest.stat().st_mode | stat.S_IEXEC | stat.S_IXGRP | stat.S_IXOTH)
     ensure_path_has(LOCAL_BIN)
     return dest
 
 
-def install_archive_binary(url: str, bin_name: str, archive_kind: str) -> Path:
-    """Baixa um .tar.gz ou .zip, extrai o binário `bin_name` e o copia para LOCAL_BIN."""
+def _extract_member(archive_path: Path, archive_kind: str, member_name: str, dest: Path) -> bool:
+    """Copia de dentro do pacote só o arquivo chamado `member_name` (em
+    qualquer subpasta) direto para `dest`, sem extrair o resto. Retorna
+    False se não encontrar.
+
+    O tar.gz é lido em modo stream ("r|gz") e a leitura para logo depois do
+    membro encontrado. Como o destino é sempre `dest`, e não o caminho
+    gravado no pacote, nomes maliciosos (../, absolutos) não têm efeito.
+    A cópia passa por `<dest>.tmp`, removido se falhar no meio (pacote
+    corrompido, disco cheio) ou se o membro não existir.
+    """
+    tmp = dest.with_name(dest.name + ".tmp")
+    try:
+        found = _copy_member(archive_path, archive_kind, member_name, tmp)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    if not found:
+        tmp.unlink(missing_ok=True)
+        return False
+    os.replace(tmp, dest)
+    return True
+
+
+def _copy_member(archive_path: Path, archive_kind: str, member_name: str, out_path: Path) -> bool:
+    if archive_kind == "tar.gz":
+        with tarfile.open(archive_path, "r|gz") as tf:
+            for member in tf:
+                if member.isfile() and member.name.rsplit("/", 1)[-1] == member_name:
+                    with tf.extractfile(member) as src, open(out_path, "wb") as out:
+                        shutil.copyfileobj(src, out, 1024 * 1024)
+                    return True
+        return False
+    if archive_kind == "zip":
+        # zip precisa do diretório central (fim do arquivo), então aqui não
+        # dá pra ser stream puro — mas só o membro pedido é descomprimido.
+        with zipfile.ZipFile(archive_path) as zf:
+            for entry in zf.infolist():
+                if not entry.is_dir() and entry.filename.replace("\\", "/").rsplit("/", 1)[-1] == member_name:
+                    with zf.open(entry) as src, open(out_path, "wb") as out:
+                        shutil.copyfileobj(src, out, 1024 * 1024)
+                    return True
+        return False
+    err(f"Tipo de arquivo desconhecido: {archive_kind}")
+
+
+def install_archive_binary(
+    url: str, bin_name: str, archive_kind: str, checksum_url: str | None = None
+) -> Path:
+    """Baixa um .tar.gz ou .zip e extrai só o binário `bin_name` para LOCAL_BIN."""
     LOCAL_BIN.mkdir(parents=True, exist_ok=True)
     target_name = exe(bin_name)
-    with tempfile.TemporaryDirectory() as tmp:
-        tmp_path = Path(tmp)
-        archive_path = tmp_path / f"download.{archive_kind}"
-        log(f"Baixando {bin_name} de {url} ...")
-        _download(url, archive_path)
-
-        extract_dir = tmp_path / "extracted"
-        extract_dir.mkdir()
-        if archive_kind == "tar.gz":
-            with tarfile.open(archive_path, "r:gz") as tf:
-                tf.extractall(extract_dir)
-        elif archive_kind == "zip":
-            with zipfile.ZipFile(archive_path) as zf:
-                zf.extractall(extract_dir)
-        else:
-            err(f"Tipo de arquivo desconhecido: {archive_kind}")
+    log(f"Instalando {bin_name} de {url} ...")
+    archive_path = cached_download(url, checksum_url)
 
-        found = list(extract_dir.rglob(target_name))
-        if not found:
-            err(f"Binário '{target_name}' não encontrado dentro do pacote baixado.")
-        dest = LOCAL_BIN / target_name
-        shutil.copy2(found[0], dest)
+    dest = LOCAL_BIN / target_name
+    if not _extract_member(archive_path, archive_kind, target_name, dest):
+        err(f"Binário '{target_name}' não encontrado dentro do pacote baixado.")
 
     if not IS_WINDOWS:
         dest.chmod(dest.stat().st_mode | stat.S_IEXEC | stat.S_IXGRP | stat.S_IXOTH)
@@ -252,26 +638,29 @@ def install_archive_binary(url: str, bin_name: str, archive_kind: str) -> Path:
 
 # ─── Ferramentas específicas ────────────────────────────────────────────────
 
-def ensure_kubectl() -> None:
-    """Instala o kubectl (versão estável mais recente) se ele não estiver disponível."""
-    if which("kubectl"):
-        info(f"kubectl ok: {capture(['kubectl', 'version', '--client', '--short']) or capture(['kubectl', 'version', '--client'])}")
-        return
-
-    warn("kubectl não encontrado. Instalando automaticamente...")
+def _kubectl_stable_version() -> str:
     req = urllib.request.Request(
         "https://dl.k8s.io/release/stable.txt",
         headers={"User-Agent": "querido-diario-deployment"},
     )
     try:
         with urllib.request.urlopen(req) as resp:
-            version = resp.read().decode().strip()
+            return resp.read().decode().strip()
     except (urllib.error.URLError, urllib.error.HTTPError) as e:
         err(f"Não foi possível determinar a versão estável do kubectl: {e}")
 
+
+def ensure_kubectl() -> None:
+    """Instala o kubectl (versão estável mais recente) se ele não estiver disponível."""
+    if which("kubectl"):
+        info(f"kubectl ok: {capture(['kubectl', 'version', '--client', '--short']) or capture(['kubectl', 'version', '--client'])}")
+        return
+
+    warn("kubectl não encontrado. Instalando automaticamente...")
+    version = cached_version("kubectl:stable", _kubectl_stable_version)
     os_, arch = os_name(), arch_name()
     url = f"https://dl.k8s.io/release/{version}/bin/{os_}/{arch}/{exe('kubectl')}"
-    install_raw_binary(url, "kubectl")
+    install_raw_binary(url, "kubectl", checksum_url=f"{url}.sha256")
     info(f"kubectl {version} instalado em {LOCAL_BIN}.")
 
 
@@ -300,7 +689,7 @@ def ensure_kind(min_version: str, install_version: str) -> None:
     os_, arch = os_name(), arch_name()
     url = f"https://kind.sigs.k8s.io/dl/v{install_version}/kind-{os_}-{arch}"
     log(f"Instalando kind v{install_version} em {LOCAL_BIN}...")
-    install_raw_binary(url, "kind")
+    install_raw_binary(url, "kind", checksum_url=f"{url}.sha256sum")
     info(f"kind instalado: {capture(['kind', 'version'])}")
 
 
@@ -316,10 +705,20 @@ def ensure_helm() -> None:
     archive_kind = "zip" if IS_WINDOWS else "tar.gz"
     ext = "zip" if IS_WINDOWS else "tar.gz"
     url = f"https://get.helm.sh/helm-{version}-{os_}-{arch}.{ext}"
-    install_archive_binary(url, "helm", archive_kind)
+    install_archive_binary(url, "helm", archive_kind, checksum_url=f"{url}.sha256sum")
     info(f"helm {version} instalado em {LOCAL_BIN}.")
 
 
+def ensure_tools(*installers: Callable[[], None]) -> None:
+    """Roda os `ensure_*` em paralelo — cada um faz a própria consulta de
+    versão e o próprio download, sem depender dos outros. Falhas (inclusive
+    o SystemExit de err()) são repropagadas na thread principal."""
+    with ThreadPoolExecutor(max_workers=max(1, len(installers))) as pool:
+        futures = [pool.submit(bind_step(installer)) for installer in installers]
+    for future in futures:
+        future.result()
+
+
 def docker_install_hint() -> str:
     if IS_MACOS:
         return "brew install --cask docker   (ou baixe o Docker Desktop em docker.com)"
@@ -369,49 +768,759 @@ def port_in_use(port: int, host: str = "127.0.0.1") -> bool | None:
         return False
 
 
-def get_secret_value(secret: str, key: str, namespace: str) -> str | None:
-    """Lê e decodifica (base64) uma chave de um Secret do k8s."""
-    import base64
+# ─── Cliente da API do Kubernetes ───────────────────────────────────────────
+#
+# Cada `kubectl get` é um fork que relê o kubeconfig e abre uma conexão TLS
+# nova. Nos caminhos quentes (secrets, services, pods, jobs, deployments...)
+# falamos direto com o apiserver: o contexto atual do kubeconfig é lido uma
+# vez (via `kubectl config view --minify --raw -o json`, pra não precisar de
+# parser YAML) e a conexão HTTPS fica aberta entre as chamadas. Se o contexto
+# usa um plugin `exec`/`auth-provider` (EKS, GKE, OIDC...), kube_client()
+# retorna None e os helpers caem de volta no kubectl. QD_KUBE_API=0 força o
+# kubectl sempre.
+
+# tipo (como no kubectl) -> (prefixo da API, recurso no path)
+KUBE_RESOURCES = {
+    "secrets": ("/api/v1", "secrets"),
+    "services": ("/api/v1", "services"),
+    "pods": ("/api/v1", "pods"),
+    "events": ("/api/v1", "events"),
+    "jobs": ("/apis/batch/v1", "jobs"),
+    "cronjobs": ("/apis/batch/v1", "cronjobs"),
+    "deployments": ("/apis/apps/v1", "deployments"),
+    "statefulsets": ("/apis/apps/v1", "statefulsets"),
+    "daemonsets": ("/apis/apps/v1", "daemonsets"),
+    "clusters.postgresql.cnpg.io": ("/apis/postgresql.cnpg.io/v1", "clusters"),
+}
+
+
+class KubeAPIError(Exception):
+    """Resposta de erro do apiserver (status HTTP + mensagem do Status)."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"HTTP {status}: {message}")
+        self.status = status
+        self.message = message
+
+
+class KubeClient:
+    """Cliente mínimo (stdlib) da API do Kubernetes, com conexão persistente."""
+
+    def __init__(self, server: str, context: ssl.SSLContext | None, headers: dict[str, str]):
+        url = urllib.parse.urlsplit(server)
+        self.scheme = url.scheme
+        self.host = url.hostname or "localhost"
+        self.port = url.port or (443 if url.scheme == "https" else 80)
+        self.base_path = url.path.rstrip("/")
+        self._ssl_context = context
+        self._headers = {"Accept": "application/json", "User-Agent": "querido-diario-deployment", **headers}
+        self._conn: http.client.HTTPConnection | None = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_kubeconfig(cls) -> "KubeClient | None":
+        """Monta o cliente a partir do contexto atual, ou None se não der
+        (sem kubeconfig, kubectl ausente, autenticação via plugin...)."""
+        raw = capture(["kubectl", "config", "view", "--minify", "--raw", "-o", "json"])
+        if not raw:
+            return None
+        try:
+            config = json.loads(raw)
+            cluster = config["clusters"][0]["cluster"]
+            user = (config.get("users") or [{}])[0].get("user", {}) or {}
+        except (ValueError, KeyError, IndexError):
+            return None
+        if "exec" in user or "auth-provider" in user:
+            return None
 
-    encoded = capture(
-        ["kubectl", "get", "secret", secret, "-n", namespace, "-o", f"jsonpath={{.data.{key}}}"]
-    )
-    if not encoded:
+        server = cluster.get("server", "")
+        headers: dict[str, str] = {}
+        if user.get("token"):
+            headers["Authorization"] = f"Bearer {user['token']}"
+        elif user.get("tokenFile"):
+            try:
+                headers["Authorization"] = f"Bearer {Path(user['tokenFile']).read_text().strip()}"
+            except OSError:
+                return None
+        elif user.get("username"):
+            basic = base64.b64encode(f"{user['username']}:{user.get('password', '')}".encode()).decode()
+            headers["Authorization"] = f"Basic {basic}"
+
+        if not server.startswith("https://"):
+            return cls(server, None, headers)
+
+        try:
+            if cluster.get("insecure-skip-tls-verify"):
+                context = ssl._create_unverified_context()
+            elif cluster.get("certificate-authority-data"):
+                ca = base64.b64decode(cluster["certificate-authority-data"]).decode("ascii")
+                context = ssl.create_default_context(cadata=ca)
+            else:
+                context = ssl.create_default_context(cafile=cluster.get("certificate-authority"))
+
+            if user.get("client-certificate-data") and user.get("client-key-data"):
+                # load_cert_chain só aceita arquivos: grava num diretório
+                # temporário (só o usuário lê) e apaga logo depois de carregar.
+                with tempfile.TemporaryDirectory() as tmp:
+                    cert = Path(tmp) / "client.crt"
+                    key = Path(tmp) / "client.key"
+                    cert.write_bytes(base64.b64decode(user["client-certificate-data"]))
+                    key.write_bytes(base64.b64decode(user["client-key-data"]))
+                    context.load_cert_chain(str(cert), str(key))
+            elif user.get("client-certificate") and user.get("client-key"):
+                context.load_cert_chain(user["client-certificate"], user["client-key"])
+        except (ssl.SSLError, OSError, ValueError):
+            return None
+        return cls(server, context, headers)
+
+    def _connect(self, timeout: float | None) -> http.client.HTTPConnection:
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(self.host, self.port, timeout=timeout, context=self._ssl_context)
+        return http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def path(self, kind: str, namespace: str | None, name: str | None = None, **query) -> str:
+        try:
+            prefix, resource = KUBE_RESOURCES[kind]
+        except KeyError:
+            raise ValueError(f"Tipo de recurso não suportado pelo KubeClient: {kind}") from None
+        path = f"{self.base_path}{prefix}"
+        if namespace:
+            path += f"/namespaces/{namespace}"
+        path += f"/{resource}"
+        if name:
+            path += f"/{name}"
+        query = {k: v for k, v in query.items() if v is not None}
+        if query:
+            path += "?" + urllib.parse.urlencode(query)
+        return path
+
+    def request(self, method: str, path: str, body: dict | None = None) -> dict:
+        """Faz uma requisição na conexão persistente (reabre uma vez se o
+        servidor tiver fechado a conexão ociosa) e devolve o JSON."""
+        headers = dict(self._headers)
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        with self._lock, span(f"{method} {path.split('?', 1)[0]}", "api") as args:
+            for attempt in (1, 2):
+                if self._conn is None:
+                    self._conn = self._connect(timeout=30)
+                try:
+                    self._conn.request(method, path, body=payload, headers=headers)
+                    resp = self._conn.getresponse()
+                    data = resp.read()
+                    break
+                except (http.client.HTTPException, OSError):
+                    self._conn.close()
+                    self._conn = None
+                    if attempt == 2:
+                        raise
+            args["status"] = resp.status
+        if resp.status >= 400:
+            raise KubeAPIError(resp.status, _kube_error_message(data))
+        return json.loads(data or b"{}")
+
+    def get(self, kind: str, name: str, namespace: str) -> dict:
+        return self.request("GET", self.path(kind, namespace, name))
+
+    def list(
+        self,
+        kind: str,
+        namespace: str,
+        label_selector: str | None = None,
+        field_selector: str | None = None,
+    ) -> dict:
+        return self.request(
+            "GET", self.path(kind, namespace, labelSelector=label_selector, fieldSelector=field_selector)
+        )
+
+    def watch(
+        self,
+        kind: str,
+        namespace: str,
+        resource_version: str | None = None,
+        label_selector: str | None = None,
+        field_selector: str | None = None,
+        timeout: int = 60,
+    ) -> Iterator[dict]:
+        """Itera eventos ({"type": ADDED|MODIFIED|DELETED, "object": ...}) até
+        o servidor encerrar o stream (`timeout` segundos). Usa uma conexão
+        própria, pra não bloquear as outras chamadas enquanto o stream dura."""
+        path = self.path(
+            kind, namespace,
+            watch="1", resourceVersion=resource_version, timeoutSeconds=str(timeout),
+            labelSelector=label_selector, fieldSelector=field_selector,
+        )
+        conn = self._connect(timeout=timeout + 10)
+        try:
+            conn.request("GET", path, headers=self._headers)
+            resp = conn.getresponse()
+            if resp.status >= 400:
+                raise KubeAPIError(resp.status, _kube_error_message(resp.read()))
+            for line in resp:
+                if not line.strip():
+                    continue
+                event = json.loads(line)
+                if event.get("type") == "ERROR":
+                    status = event.get("object", {})
+                    raise KubeAPIError(status.get("code", 500), status.get("message", ""))
+                yield event
+        finally:
+            conn.close()
+
+
+def _kube_error_message(data: bytes) -> str:
+    try:
+        return json.loads(data).get("message", "") or data.decode("utf-8", "replace")
+    except ValueError:
+        return data.decode("utf-8", "replace")
+
+
+_kube_client: KubeClient | None = None
+_kube_client_loaded = False
+_kube_client_lock = threading.Lock()
+
+
+def kube_client() -> KubeClient | None:
+    """Cliente compartilhado pro contexto atual do kubeconfig (criado na
+    primeira chamada), ou None quando só o kubectl serve."""
+    global _kube_client, _kube_client_loaded
+    with _kube_client_lock:
+        if not _kube_client_loaded:
+            _kube_client_loaded = True
+            if os.environ.get("QD_KUBE_API", "1") != "0":
+                _kube_client = KubeClient.from_kubeconfig()
+        return _kube_client
+
+
+def reset_kube_client() -> None:
+    """Descarta o cliente atual (ex: depois de `kubectl config use-context`)."""
+    global _kube_client, _kube_client_loaded
+    with _kube_client_lock:
+        if _kube_client is not None:
+            _kube_client.close()
+        _kube_client = None
+        _kube_client_loaded = False
+
+
+def kube_get(kind: str, name: str, namespace: str) -> dict | None:
+    """Objeto do k8s como dict, ou None se não existir/não der pra ler."""
+    client = kube_client()
+    if client is not None:
+        try:
+            return client.get(kind, name, namespace)
+        except KubeAPIError as e:
+            if e.status == 404:
+                return None
+        except (http.client.HTTPException, OSError, ValueError):
+            pass
+    out = capture(["kubectl", "get", kind, name, "-n", namespace, "-o", "json"])
+    if not out:
         return None
     try:
-        return base64.b64decode(encoded).decode("utf-8")
-    except (ValueError, UnicodeDecodeError):
+        return json.loads(out)
+    except ValueError:
         return None
 
 
-def wait_for_port(port: int, host: str = "127.0.0.1", timeout: float = 20.0) -> bool:
-    """Tenta conectar em host:port repetidamente até timeout. Retorna True se conectou."""
-    import time as _time
+def kube_list(
+    kind: str,
+    namespace: str,
+    label_selector: str | None = None,
+    field_selector: str | None = None,
+) -> list[dict] | None:
+    """Itens de uma listagem do k8s, ou None se não der pra listar."""
+    client = kube_client()
+    if client is not None:
+        try:
+            return client.list(kind, namespace, label_selector, field_selector).get("items", [])
+        except (KubeAPIError, http.client.HTTPException, OSError, ValueError):
+            pass
+    cmd = ["kubectl", "get", kind, "-n", namespace, "-o", "json"]
+    if label_selector:
+        cmd += ["-l", label_selector]
+    if field_selector:
+        cmd += ["--field-selector", field_selector]
+    out = capture(cmd)
+    if not out:
+        return None
+    try:
+        return json.loads(out).get("items", [])
+    except ValueError:
+        return None
+
+
+def kube_exists(kind: str, name: str, namespace: str) -> bool:
+    return kube_get(kind, name, namespace) is not None
+
+
+_secret_cache: dict[tuple[str, str], dict[str, str]] = {}
+_secret_cache_lock = threading.Lock()
+
+
+def get_secret(secret: str, namespace: str) -> dict[str, str] | None:
+    """Todas as chaves de um Secret do k8s, já decodificadas (base64), ou None
+    se ele não existir. O Secret é lido numa única chamada e memoizado pelo
+    resto do processo — use invalidate_secret() depois de alterá-lo."""
+    cache_key = (namespace, secret)
+    with _secret_cache_lock:
+        if cache_key in _secret_cache:
+            return dict(_secret_cache[cache_key])
+
+    obj = kube_get("secrets", secret, namespace)
+    if obj is None:
+        return None
+    decoded = {}
+    for key, encoded in (obj.get("data") or {}).items():
+        try:
+            decoded[key] = base64.b64decode(encoded).decode("utf-8")
+        except (ValueError, UnicodeDecodeError):
+            continue
+
+    with _secret_cache_lock:
+        _secret_cache[cache_key] = decoded
+    return dict(decoded)
+
+
+def invalidate_secret(secret: str | None = None, namespace: str | None = None) -> None:
+    """Descarta do cache de get_secret() o Secret indicado (ou todos)."""
+    with _secret_cache_lock:
+        for ns, name in list(_secret_cache):
+            if (secret is None or name == secret) and (namespace is None or ns == namespace):
+                del _secret_cache[(ns, name)]
+
 
-    deadline = _time.time() + timeout
-    while _time.time() < deadline:
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            s.settimeout(1.0)
+def get_secret_value(secret: str, key: str, namespace: str) -> str | None:
+    """Lê e decodifica (base64) uma chave de um Secret do k8s."""
+    return (get_secret(secret, namespace) or {}).get(key) or None
+
+
+# ─── Espera por prontidão (watch) ───────────────────────────────────────────
+
+# Motivos de espera de container que não se resolvem sozinhos em tempo útil:
+# em vez de esperar o timeout inteiro, wait_ready() falha na hora.
+POD_FAILURE_REASONS = {"CrashLoopBackOff", "ImagePullBackOff"}
+
+
+def resource_ready(kind: str, obj: dict | None) -> bool:
+    """True se o objeto (deployment/statefulset/daemonset/cluster CNPG) está pronto."""
+    if not obj:
+        return False
+    status = obj.get("status") or {}
+    if kind == "clusters.postgresql.cnpg.io":
+        return any(c.get("type") == "Ready" and c.get("status") == "True" for c in status.get("conditions", []))
+    if status.get("observedGeneration", 0) < obj.get("metadata", {}).get("generation", 0):
+        return False
+    if kind == "daemonsets":
+        desired = status.get("desiredNumberScheduled", 0)
+        return desired > 0 and status.get("numberReady", 0) >= desired
+    wanted = obj.get("spec", {}).get("replicas", 1)
+    return status.get("updatedReplicas", 0) >= wanted and status.get("readyReplicas", 0) >= wanted
+
+
+def _readiness_detail(kind: str, obj: dict | None) -> str:
+    if not obj:
+        return "ainda não existe"
+    status = obj.get("status") or {}
+    if kind == "clusters.postgresql.cnpg.io":
+        return status.get("phase", "sem status")
+    if kind == "daemonsets":
+        return f"{status.get('numberReady', 0)}/{status.get('desiredNumberScheduled', 0)} prontos"
+    return f"{status.get('readyReplicas', 0)}/{obj.get('spec', {}).get('replicas', 1)} prontos"
+
+
+def pod_failure(pod: dict, reasons: Collection[str] = POD_FAILURE_REASONS) -> str | None:
+    """"container: motivo" se o pod está preso num dos `reasons`."""
+    status = pod.get("status") or {}
+    for cs in status.get("initContainerStatuses", []) + status.get("containerStatuses", []):
+        reason = (cs.get("state") or {}).get("waiting", {}).get("reason")
+        if reason in reasons:
+            return f"{cs.get('name')}: {reason}"
+    return None
+
+
+def pod_events(pod: str, namespace: str, limit: int = 10) -> list[str]:
+    """Últimos eventos de um pod, formatados em uma linha cada."""
+    events = kube_list("events", namespace, field_selector=f"involvedObject.name={pod}") or []
+    events.sort(key=lambda e: e.get("lastTimestamp") or e.get("eventTime") or "")
+    return [f"{e.get('type', '')} {e.get('reason', '')}: {e.get('message', '').strip()}" for e in events[-limit:]]
+
+
+class _ReadinessWatch:
+    """Acompanha o estado de vários recursos com um único stream de watch por
+    tipo (mais um de pods, pra detectar falhas), caindo em polling via
+    kubectl quando não há cliente da API."""
+
+    def __init__(self, targets: Sequence[tuple[str, str]], namespace: str):
+        self.targets = list(targets)
+        self.namespace = namespace
+        self.objects: dict[tuple[str, str], dict | None] = {t: None for t in self.targets}
+        # Pod com falha -> (labels, motivo), de qualquer pod do namespace: se
+        # ele pertence a um alvo só dá pra saber com o seletor do workload,
+        # que pode chegar depois do pod.
+        self._pod_failures: dict[str, tuple[dict, str]] = {}
+        self.changed = threading.Condition()
+        self.stopped = threading.Event()
+        self._names = {}
+        for kind, name in self.targets:
+            self._names.setdefault(kind, set()).add(name)
+        self._names["pods"] = set()
+
+    def _selectors(self) -> list[dict]:
+        """matchLabels dos alvos (o cluster CNPG marca os pods com
+        cnpg.io/cluster). Prefixo de nome não serve: garage-webui-... não é
+        pod do deployment garage."""
+        selectors = []
+        for (kind, name), obj in self.objects.items():
+            if kind == "clusters.postgresql.cnpg.io":
+                selectors.append({"cnpg.io/cluster": name})
+            elif obj:
+                labels = ((obj.get("spec") or {}).get("selector") or {}).get("matchLabels")
+                if labels:
+                    selectors.append(labels)
+        return selectors
+
+    @property
+    def failures(self) -> dict[str, str]:
+        """Pods de algum alvo presos em CrashLoopBackOff, ImagePullBackOff etc."""
+        selectors = self._selectors()
+        return {
+            pod: reason
+            for pod, (labels, reason) in self._pod_failures.items()
+            if any(selector.items() <= labels.items() for selector in selectors)
+        }
+
+    def _update(self, kind: str, obj: dict, deleted: bool = False) -> None:
+        name = obj.get("metadata", {}).get("name", "")
+        with self.changed:
+            if kind == "pods":
+                failure = None if deleted else pod_failure(obj)
+                if failure:
+                    self._pod_failures[name] = (obj.get("metadata", {}).get("labels") or {}, failure)
+                elif self._pod_failures.pop(name, None) is None:
+                    return
+            elif name in self._names[kind]:
+                self.objects[(kind, name)] = None if deleted else obj
+            else:
+                return
+            self.changed.notify_all()
+
+    def _follow(self, kind: str) -> None:
+        client = kube_client()
+        while not self.stopped.is_set():
             try:
-                s.connect((host, port))
+                if client is None:
+                    for item in kube_list(kind, self.namespace) or []:
+                        self._update(kind, item)
+                    self.stopped.wait(2)
+                    continue
+                listing = client.list(kind, self.namespace)
+                for item in listing.get("items", []):
+                    self._update(kind, item)
+                version = listing.get("metadata", {}).get("resourceVersion")
+                for event in client.watch(kind, self.namespace, resource_version=version, timeout=30):
+                    self._update(kind, event.get("object", {}), deleted=event.get("type") == "DELETED")
+                    if self.stopped.is_set():
+                        return
+            except (KubeAPIError, http.client.HTTPException, OSError, ValueError):
+                # 410 Gone (resourceVersion expirado), conexão caída, CRD
+                # ainda não registrado...: lista de novo depois de um respiro.
+                self.stopped.wait(1)
+
+    def start(self) -> None:
+        for kind in self._names:
+            threading.Thread(target=bind_step(self._follow), args=(kind,), daemon=True).start()
+
+    def pending(self) -> list[tuple[str, str]]:
+        return [t for t in self.targets if not resource_ready(t[0], self.objects[t])]
+
+
+def wait_ready(targets: Sequence[tuple[str, str]], namespace: str, timeout: float = 600) -> None:
+    """Espera todos os `targets` ((tipo, nome)) ficarem prontos ao mesmo tempo,
+    em vez de um `rollout status` depois do outro: o tempo total é o do mais
+    lento, não a soma. Mostra o que ainda está pendente a cada mudança e falha
+    na hora (com os eventos do pod) se algum entrar em CrashLoopBackOff ou
+    ImagePullBackOff."""
+    watch = _ReadinessWatch(targets, namespace)
+    watch.start()
+    t0 = time.monotonic()
+    deadline = t0 + timeout
+    last_table = None
+    try:
+        with watch.changed:
+            while True:
+                if watch.failures:
+                    pod, reason = next(iter(watch.failures.items()))
+                    lines = "\n".join(f"    {e}" for e in pod_events(pod, namespace)) or "    (sem eventos)"
+                    err(f"Pod {pod} falhou ({reason}). Eventos recentes:\n{lines}")
+                pending = watch.pending()
+                if not pending:
+                    info(f"Tudo pronto em {time.monotonic() - t0:.0f}s.")
+                    return
+                table = [
+                    f"    {kind}/{name}: {_readiness_detail(kind, watch.objects[(kind, name)])}"
+                    for kind, name in pending
+                ]
+                if table != last_table:
+                    info(f"Pendentes ({len(pending)}/{len(watch.targets)}, {time.monotonic() - t0:.0f}s):")
+                    print("\n".join(table))
+                    last_table = table
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    err(
+                        f"Timeout de {timeout:.0f}s esperando: "
+                        + ", ".join(f"{kind}/{name}" for kind, name in pending)
+                    )
+                watch.changed.wait(min(remaining, 5))
+    finally:
+        watch.stopped.set()
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    """Alvo de wait_for_endpoints(): porta TCP e, opcionalmente, um path HTTP
+    que precisa responder (qualquer status < 500 conta como pronto — um 401
+    de um OpenSearch com segurança ainda é um servidor de pé)."""
+
+    port: int
+    host: str = "127.0.0.1"
+    path: str | None = None
+
+    def __str__(self) -> str:
+        return f"{self.host}:{self.port}{self.path or ''}"
+
+
+# Backoff entre tentativas por alvo: começa curto (porta que abre logo é
+# detectada em dezenas de ms) e dobra até o teto, com jitter.
+ENDPOINT_INITIAL_DELAY = 0.05
+ENDPOINT_MAX_DELAY = 0.5
+# Uma tentativa (connect + resposta HTTP) que passa disso é abandonada.
+ENDPOINT_ATTEMPT_TIMEOUT = 2.0
+
+
+_CONNECT_PENDING = {0, errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY, getattr(errno, "WSAEWOULDBLOCK", -1)}
+
+
+class _EndpointProbe:
+    """Estado de um alvo em wait_for_endpoints()."""
+
+    def __init__(self, endpoint: Endpoint):
+        self.endpoint = endpoint
+        self.sock: socket.socket | None = None
+        self.attempt_deadline = 0.0
+        self.next_attempt = 0.0
+        self.delay = ENDPOINT_INITIAL_DELAY
+        self.response = b""
+
+    def connect(self, sel: selectors.BaseSelector, now: float) -> bool:
+        """Inicia uma tentativa. False se o connect já falhou de cara (ex:
+        ECONNREFUSED imediato em localhost)."""
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setblocking(False)
+        self.attempt_deadline = now + ENDPOINT_ATTEMPT_TIMEOUT
+        self.response = b""
+        sel.register(self.sock, selectors.EVENT_WRITE, self)
+        # connect_ex num socket não bloqueante devolve EINPROGRESS (ou
+        # WSAEWOULDBLOCK); o resultado chega como "pronto pra escrita".
+        code = self.sock.connect_ex((self.endpoint.host, self.endpoint.port))
+        return code in _CONNECT_PENDING
+
+    def retry(self, sel: selectors.BaseSelector, now: float) -> None:
+        self.close(sel)
+        self.next_attempt = now + random.uniform(self.delay / 2, self.delay)
+        self.delay = min(ENDPOINT_MAX_DELAY, self.delay * 2)
+
+    def close(self, sel: selectors.BaseSelector) -> None:
+        if self.sock is not None:
+            sel.unregister(self.sock)
+            self.sock.close()
+            self.sock = None
+
+    def on_event(self, sel: selectors.BaseSelector, events: int) -> bool | None:
+        """True: pronto. False: tentativa falhou. None: esperando mais eventos."""
+        assert self.sock is not None
+        if events & selectors.EVENT_WRITE:
+            if self.sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) != 0:
+                return False
+            if self.endpoint.path is None:
                 return True
+            request = f"GET {self.endpoint.path} HTTP/1.0\r\nHost: {self.endpoint.host}\r\n\r\n".encode()
+            try:
+                self.sock.sendall(request)
             except OSError:
-                _time.sleep(0.5)
-    return False
+                return False
+            sel.modify(self.sock, selectors.EVENT_READ, self)
+            return None
+        try:
+            chunk = self.sock.recv(4096)
+        except BlockingIOError:
+            return None
+        except OSError:
+            return False
+        self.response += chunk
+        if b"\r\n" not in self.response:
+            return None if chunk else False
+        status_line = self.response.split(b"\r\n", 1)[0].split()
+        return len(status_line) >= 2 and status_line[1].isdigit() and int(status_line[1]) < 500
+
+
+def wait_for_endpoints(
+    targets: Sequence[Endpoint | int], timeout: float = 20.0
+) -> dict[Endpoint, float | None]:
+    """Espera vários alvos ao mesmo tempo: connects não bloqueantes
+    multiplexados num `selectors`, com backoff exponencial e jitter por alvo
+    entre tentativas. O total dura o do alvo mais lento, não a soma.
+    Devolve {alvo: segundos até ficar pronto, ou None se estourou o timeout}
+    (inteiros em `targets` viram Endpoint(porta) em 127.0.0.1)."""
+    endpoints = [t if isinstance(t, Endpoint) else Endpoint(t) for t in targets]
+    result: dict[Endpoint, float | None] = dict.fromkeys(endpoints)
+    t0 = time.monotonic()
+    deadline = t0 + timeout
+    probes = [_EndpointProbe(e) for e in dict.fromkeys(endpoints)]
+    with selectors.DefaultSelector() as sel:
+        while probes:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            for probe in probes:
+                if probe.sock is None and now >= probe.next_attempt:
+                    if not probe.connect(sel, now):
+                        probe.retry(sel, now)
+                elif probe.sock is not None and now >= probe.attempt_deadline:
+                    probe.retry(sel, now)
+            wake = min(
+                [p.attempt_deadline if p.sock is not None else p.next_attempt for p in probes] + [deadline]
+            )
+            if sel.get_map():
+                events = sel.select(max(0.0, wake - now))
+            else:
+                time.sleep(max(0.0, wake - now))
+                events = []
+            now = time.monotonic()
+            for key, mask in events:
+                probe = key.data
+                outcome = probe.on_event(sel, mask)
+                if outcome is True:
+                    result[probe.endpoint] = now - t0
+                    probe.close(sel)
+                    probes.remove(probe)
+                elif outcome is False:
+                    probe.retry(sel, now)
+        for probe in probes:
+            probe.close(sel)
+    return result
+
+
+def wait_for_port(port: int, host: str = "127.0.0.1", timeout: float = 20.0) -> bool:
+    """Tenta conectar em host:port até timeout. Retorna True se conectou."""
+    endpoint = Endpoint(port, host)
+    return wait_for_endpoints([endpoint], timeout)[endpoint] is not None
+
+
+# ─── Port-forwards compartilhados (daemon) ──────────────────────────────────
+#
+# scripts/k8s_portforward_daemon.py mantém port-forwards vivos entre
+# comandos. Protocolo: uma conexão TCP em 127.0.0.1:PF_DAEMON_PORT, um
+# objeto JSON por linha em cada sentido. `acquire` devolve um lease; o lease
+# vale enquanto a conexão estiver aberta (fechar a conexão = liberar), então
+# um cliente que morre não deixa contagem de referências pendurada.
+
+PF_DAEMON_PORT = env_int("QD_PF_DAEMON_PORT", 5399)
+# QD_PF_DAEMON=0 ignora o daemon mesmo que esteja rodando (port-forward direto).
+PF_DAEMON_ENABLED = os.environ.get("QD_PF_DAEMON", "1") != "0"
+# O daemon pode precisar (re)abrir o kubectl port-forward antes de responder.
+PF_DAEMON_ACQUIRE_TIMEOUT = 30.0
+
+
+def pf_daemon_connect(timeout: float = 0.2) -> socket.socket | None:
+    """Conexão com o daemon, ou None se ele não estiver rodando."""
+    try:
+        return socket.create_connection(("127.0.0.1", PF_DAEMON_PORT), timeout=timeout)
+    except OSError:
+        return None
+
+
+def pf_daemon_call(conn: socket.socket, message: dict, timeout: float = 5.0) -> dict | None:
+    """Envia uma mensagem e lê a resposta (None se a conexão cair)."""
+    try:
+        conn.settimeout(timeout)
+        conn.sendall((json.dumps(message) + "\n").encode())
+        with conn.makefile("rb") as reader:
+            line = reader.readline()
+        return json.loads(line) if line else None
+    except (OSError, ValueError):
+        return None
+
+
+def _pf_daemon_lease(service: str, local_port: int, remote_port: int, namespace: str) -> socket.socket | None:
+    """Conexão com um lease do daemon pro forward pedido, ou None (daemon
+    fora do ar ou recusou — o chamador abre um port-forward próprio)."""
+    if not PF_DAEMON_ENABLED:
+        return None
+    conn = pf_daemon_connect()
+    if conn is None:
+        return None
+    request = {
+        "op": "acquire",
+        "service": service,
+        "namespace": namespace,
+        "local_port": local_port,
+        "remote_port": remote_port,
+    }
+    reply = pf_daemon_call(conn, request, timeout=PF_DAEMON_ACQUIRE_TIMEOUT)
+    if reply and reply.get("ok"):
+        return conn
+    conn.close()
+    detail = (reply or {}).get("error", "sem resposta")
+    warn(f"Daemon de port-forward não atendeu svc/{service}:{remote_port} ({detail}) — abrindo port-forward próprio.")
+    return None
+
+
+class PortForwardError(RuntimeError):
+    """Port-forward que não abriu (a porta local não aceitou conexões)."""
 
 
 class PortForward:
     """Context manager: abre `kubectl port-forward` em background e garante
-    que o processo seja encerrado ao sair do bloco `with`, mesmo em erro."""
+    que o processo seja encerrado ao sair do bloco `with`, mesmo em erro.
+
+    Se o daemon de port-forward estiver rodando, em vez disso pega um lease
+    do forward que ele mantém aberto (sem processo novo nem espera pela
+    porta) e o devolve ao sair.
 
-    def __init__(self, service: str, local_port: int, remote_port: int, namespace: str):
+    Se o forward não abrir, aborta com err() — ou, com fatal=False, levanta
+    PortForwardError pra passos best-effort seguirem em frente."""
+
+    def __init__(self, service: str, local_port: int, remote_port: int, namespace: str, fatal: bool = True):
         self.service = service
         self.local_port = local_port
         self.remote_port = remote_port
         self.namespace = namespace
+        self.fatal = fatal
         self._proc: subprocess.Popen | None = None
+        self._lease: socket.socket | None = None
 
     def __enter__(self) -> "PortForward":
+        try:
+            _open_forwards([self])
+        except PortForwardError as e:
+            if self.fatal:
+                err(str(e))
+            raise
+        return self
+
+    def _start(self) -> None:
+        """Pega o lease do daemon ou dispara o kubectl, sem esperar a porta."""
+        self._lease = _pf_daemon_lease(self.service, self.local_port, self.remote_port, self.namespace)
+        if self._lease is not None:
+            return
         self._proc = subprocess.Popen(
             [
                 "kubectl", "port-forward",
@@ -421,12 +1530,11 @@ class PortForward:
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL,
         )
-        if not wait_for_port(self.local_port):
-            self.__exit__(None, None, None)
-            err(f"Não foi possível abrir port-forward para svc/{self.service}:{self.remote_port}.")
-        return self
 
     def __exit__(self, *exc_info) -> None:
+        if self._lease is not None:
+            self._lease.close()
+            self._lease = None
         if self._proc is not None:
             self._proc.terminate()
             try:
@@ -436,6 +1544,339 @@ class PortForward:
             self._proc = None
 
 
+def _open_forwards(forwards: Sequence[PortForward]) -> None:
+    """Abre todos os forwards de uma vez: os kubectl sobem juntos e a espera
+    pelas portas locais é uma só (wait_for_endpoints), então o total é o do
+    forward mais lento. Se algum não abrir, fecha todos e levanta
+    PortForwardError."""
+    names = ", ".join(f"svc/{f.service}" for f in forwards)
+    # O span cobre só a abertura (até as portas locais aceitarem conexões).
+    with span(f"port-forward {names}", "port-forward", ports=[f.local_port for f in forwards]) as args:
+        for forward in forwards:
+            forward._start()
+        spawned = [f for f in forwards if f._proc is not None]
+        latencies = wait_for_endpoints([f.local_port for f in spawned]) if spawned else {}
+        failed = [f for f in spawned if latencies[Endpoint(f.local_port)] is None]
+        args["leases"] = len(forwards) - len(spawned)
+        args["ready"] = not failed
+    if failed:
+        for forward in forwards:
+            forward.__exit__(None, None, None)
+        raise PortForwardError(
+            "Não foi possível abrir port-forward para "
+            + ", ".join(f"svc/{f.service}:{f.remote_port}" for f in failed)
+            + "."
+        )
+
+
+@contextmanager
+def port_forwards(forwards: Sequence[PortForward]) -> Iterator[Sequence[PortForward]]:
+    """Vários PortForward abertos em paralelo, pelo tempo do `with`."""
+    if not forwards:
+        yield forwards
+        return
+    try:
+        _open_forwards(forwards)
+    except PortForwardError as e:
+        err(str(e))
+    try:
+        yield forwards
+    finally:
+        for forward in reversed(forwards):
+            forward.__exit__(None, None, None)
+
+
+# ─── Sondagem HTTP ──────────────────────────────────────────────────────────
+
+class HttpProbe:
+    """Conexão HTTP keep-alive pra sondar um serviço repetidamente (ex:
+    OpenSearch por trás de um port-forward) sem um processo por tentativa.
+    Reabre a conexão sozinha se o servidor a fechar."""
+
+    def __init__(self, host: str, port: int, timeout: float = 5.0, auth: tuple[str, str] | None = None):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._headers = {"User-Agent": "querido-diario-deployment"}
+        if auth:
+            self._headers["Authorization"] = "Basic " + base64.b64encode(f"{auth[0]}:{auth[1]}".encode()).decode()
+        self._conn: http.client.HTTPConnection | None = None
+
+    def __enter__(self) -> "HttpProbe":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def request(self, method: str, path: str, body: bytes | None = None) -> tuple[int, bytes]:
+        """(status, corpo). Levanta OSError/HTTPException se nem reconectando der."""
+        try:
+            return self._send(method, path, body)
+        except (http.client.HTTPException, OSError):
+            # Conexão ociosa fechada pelo servidor (ou port-forward
+            # reiniciado): uma nova tentativa numa conexão nova.
+            self.close()
+            try:
+                return self._send(method, path, body)
+            except (http.client.HTTPException, OSError):
+                self.close()
+                raise
+
+    def _send(self, method: str, path: str, body: bytes | None) -> tuple[int, bytes]:
+        headers = dict(self._headers)
+        if body is not None:
+            headers["Content-Type"] = "application/json"
+        if self._conn is None:
+            self._conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        self._conn.request(method, path, body=body, headers=headers)
+        resp = self._conn.getresponse()
+        return resp.status, resp.read()
+
+    def status(self, path: str, method: str = "GET") -> int | None:
+        """Status HTTP de `path`, ou None se o serviço não respondeu."""
+        try:
+            return self.request(method, path)[0]
+        except (http.client.HTTPException, OSError):
+            return None
+
+    def get_json(self, path: str) -> dict | list | None:
+        """Corpo JSON de um GET com status 2xx, ou None."""
+        try:
+            status, body = self.request("GET", path)
+            return json.loads(body) if 200 <= status < 300 else None
+        except (http.client.HTTPException, OSError, ValueError):
+            return None
+
+
+def poll_until(
+    predicate: Callable[[], bool],
+    timeout: float,
+    initial_delay: float = 0.25,
+    max_delay: float = 5.0,
+) -> bool:
+    """Chama `predicate` até ele retornar True ou estourar `timeout`, com
+    backoff exponencial e jitter entre tentativas (responde rápido quando o
+    recurso fica pronto logo, sem martelar o serviço quando demora)."""
+    deadline = time.monotonic() + timeout
+    delay = initial_delay
+    while True:
+        if predicate():
+            return True
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(remaining, random.uniform(0, delay)))
+        delay = min(max_delay, delay * 2)
+
+
+@contextmanager
+def forwarded_http(
+    service: str, local_port: int, remote_port: int, namespace: str, fatal: bool = True
+) -> Iterator[HttpProbe]:
+    """Port-forward pra `svc/service` + HttpProbe nele, pelo tempo do `with`
+    (`fatal` como em PortForward)."""
+    forward = PortForward(service, local_port, remote_port, namespace, fatal=fatal)
+    with forward, HttpProbe("127.0.0.1", local_port) as probe:
+        yield probe
+
+
+# ─── Passos com dependências (DAG) ──────────────────────────────────────────
+
+@dataclass
+class Step:
+    """Um passo de setup: `func` roda assim que todos os passos em `deps`
+    terminarem. `start`/`end` são preenchidos por run_steps().
+
+    Se `func` retornar False (passo best-effort que não concluiu), o
+    fingerprint do modo incremental não é gravado."""
+
+    name: str
+    func: Callable[[], object]
+    deps: tuple[str, ...] = ()
+    # Modo incremental (opcional): `inputs` devolve um fingerprint das
+    # entradas do passo (ver fingerprint()) e `check` confere no cluster se
+    # o resultado ainda está lá. Com os dois ok, o passo é pulado.
+    inputs: Callable[[], str] | None = None
+    check: Callable[[], bool] | None = None
+    start: float | None = None
+    end: float | None = None
+    skipped: bool = False
+
+    @property
+    def duration(self) -> float:
+        if self.start is None or self.end is None:
+            return 0.0
+        return self.end - self.start
+
+
+def fingerprint(*parts: str | bytes | Path | None) -> str:
+    """SHA-256 de uma sequência de entradas. Path entra pelo conteúdo do
+    arquivo (ou um marcador, se ele não existir), str/bytes pelo valor."""
+    h = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, Path):
+            try:
+                data = part.read_bytes()
+            except OSError:
+                data = b"<ausente>"
+        elif isinstance(part, str):
+            data = part.encode("utf-8")
+        else:
+            data = part or b""
+        h.update(hashlib.sha256(data).digest())
+    return h.hexdigest()
+
+
+class StepState:
+    """Fingerprint das entradas de cada passo que terminou com sucesso,
+    persistido em JSON entre execuções (usado pelo modo incremental de
+    run_steps)."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            self._data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self._data = {}
+
+    def matches(self, name: str, value: str) -> bool:
+        with self._lock:
+            return self._data.get(name) == value
+
+    def record(self, name: str, value: str | None) -> None:
+        with self._lock:
+            if value is None:
+                self._data.pop(name, None)
+            else:
+                self._data[name] = value
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self._data, indent=2, sort_keys=True), encoding="utf-8")
+            os.replace(tmp, self.path)
+
+
+def run_steps(
+    steps: Sequence[Step],
+    state: StepState | None = None,
+    force: Iterable[str] = (),
+) -> None:
+    """Roda `steps` como um grafo de dependências: cada passo começa assim que
+    as dependências terminam, e ramos independentes rodam em paralelo (threads).
+
+    Com `state`, passos que declaram `inputs` são pulados quando o
+    fingerprint é igual ao da última execução bem-sucedida e o `check` ao
+    vivo passa — exceto os listados em `force` ("all" força todos).
+
+    Se um passo falha, nenhum passo novo é iniciado: espera os que já estão
+    rodando e repropaga a exceção do primeiro que falhou (inclusive o
+    SystemExit de err(), que numa thread não encerraria o processo sozinho).
+    """
+    by_name = {s.name: s for s in steps}
+    for step in steps:
+        unknown = [d for d in step.deps if d not in by_name]
+        if unknown:
+            err(f"Passo '{step.name}' depende de passo(s) inexistente(s): {', '.join(unknown)}")
+
+    forced = set(force)
+    t0 = time.monotonic()
+
+    def _run(step: Step) -> None:
+        with step_context(step.name), span(step.name, "step") as args:
+            _run_step(step)
+            if step.skipped:
+                args["skipped"] = True
+
+    def _run_step(step: Step) -> None:
+        step.start = time.monotonic() - t0
+        try:
+            value = None
+            if state is not None and step.inputs is not None:
+                value = step.inputs()
+                if (
+                    step.name not in forced
+                    and "all" not in forced
+                    and state.matches(step.name, value)
+                    and (step.check is None or step.check())
+                ):
+                    step.skipped = True
+                    info(f"[{step.name}] entradas inalteradas e estado ok no cluster — pulando.")
+                    return
+                # Esquece o fingerprint antigo antes de rodar: se o passo
+                # falhar no meio, a próxima execução não deve pulá-lo.
+                state.record(step.name, None)
+            completed = step.func() is not False
+            if value is not None and completed:
+                state.record(step.name, value)
+        finally:
+            step.end = time.monotonic() - t0
+
+    pending = dict(by_name)
+    done: set[str] = set()
+    running: dict = {}
+    error: BaseException | None = None
+    with ThreadPoolExecutor(max_workers=max(1, len(steps))) as pool:
+        while pending or running:
+            if error is None:
+                for name, step in list(pending.items()):
+                    if all(d in done for d in step.deps):
+                        del pending[name]
+                        running[pool.submit(_run, step)] = step
+            if not running:
+                if error is None and pending:
+                    err(f"Dependência cíclica entre os passos: {', '.join(sorted(pending))}")
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                step = running.pop(future)
+                exc = future.exception()
+                if exc is None:
+                    done.add(step.name)
+                elif error is None:
+                    error = exc
+    if error is not None:
+        raise error
+
+
+def critical_path(steps: Sequence[Step]) -> list[Step]:
+    """Cadeia de passos que de fato limitou o tempo total: parte do passo que
+    terminou por último e volta sempre pela dependência que terminou por
+    último (a que o segurou)."""
+    by_name = {s.name: s for s in steps}
+    finished = [s for s in steps if s.end is not None]
+    if not finished:
+        return []
+    path = [max(finished, key=lambda s: s.end)]
+    while True:
+        deps = [by_name[d] for d in path[-1].deps if by_name[d].end is not None]
+        if not deps:
+            break
+        path.append(max(deps, key=lambda s: s.end))
+    return list(reversed(path))
+
+
+def print_step_report(steps: Sequence[Step]) -> None:
+    """Tabela com início/duração de cada passo, marcando o caminho crítico."""
+    critical = {s.name for s in critical_path(steps)}
+    ran = sorted((s for s in steps if s.start is not None), key=lambda s: s.start)
+    if not ran:
+        return
+    total = max(s.end or 0.0 for s in ran)
+    width = max(len(s.name) for s in ran)
+    info(f"Tempo por passo (* = caminho crítico, total {total:.1f}s):")
+    for s in ran:
+        mark = "*" if s.name in critical else " "
+        note = "  (pulado)" if s.skipped else ""
+        print(f"  {mark} {s.name:<{width}}  início {s.start:6.1f}s  duração {s.duration:6.1f}s{note}")
+    serial = sum(s.duration for s in ran)
+    print(f"    soma das durações {serial:.1f}s — paralelismo economizou {max(0.0, serial - total):.1f}s")
+
+
 def path_hint() -> str:
     if IS_WINDOWS:
         return (
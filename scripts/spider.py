@@ -6,20 +6,37 @@ dependiam de `.venv/bin/` (inexistente no Windows, onde é `.venv/Scripts/`)
 e de `source .local.env` (sintaxe bash).
 
 Uso:
-    python3 scripts/spider.py setup  [--qd-dir PATH]
-    python3 scripts/spider.py list   [--qd-dir PATH]
+    python3 scripts/spider.py setup  [--qd-dir PATH] [--force]
+    python3 scripts/spider.py list   [--state UF] [--zyte|--no-zyte] [--details|--json] [--scrapy] [--qd-dir PATH]
     python3 scripts/spider.py run SPIDER [--start YYYY-MM-DD] [--end YYYY-MM-DD] [--qd-dir PATH]
+    python3 scripts/spider.py run SPIDER --start YYYY-MM-DD [--end ...] --shard-by month|year [--jobs N]
+    python3 scripts/spider.py backfill SPIDER [--start ...] [--end ...] [--min-gap N] [--dry-run]
+    python3 scripts/spider.py run-many [SPIDER|GLOB ...] [--file ARQUIVO] [--state UF] [--zyte|--no-zyte] [--jobs N]
+                                       [--start ...] [--end ...]
 """
 from __future__ import annotations
 
 import argparse
+import difflib
+import fnmatch
+import functools
+import json
 import os
+import re
+import subprocess
 import sys
-from contextlib import ExitStack
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+from datetime import date, timedelta
 from pathlib import Path
+from typing import Callable, Iterator
 
 sys.path.insert(0, str(Path(__file__).resolve().parent))
 import pycommon as pc  # noqa: E402
+import spider_index  # noqa: E402
 
 DEFAULT_QD_DIR = pc.REPO_ROOT.parent / "querido-diario"
 
@@ -62,33 +79,92 @@ def venv_scrapy(qd_dir: Path) -> Path:
     return venv_bin(qd_dir) / pc.exe("scrapy")
 
 
-def setup_venv(qd_dir: Path) -> None:
+# Wheelhouse compartilhado entre venvs: as distribuições exatas (com os
+# hashes do requirements.txt) ficam no cache, e a instalação roda offline a
+# partir dele. Só o que faltar (requirements mudaram) é baixado. O venv
+# guarda um marcador com o fingerprint de requirements.txt + interpretador:
+# se nada mudou, o setup não faz nada.
+WHEELHOUSE_DIR = pc.CACHE_DIR / "wheelhouse"
+SETUP_MARKER = ".qd-setup"
+
+# requirements.txt usa --hash (modo --require-hashes do pip), mas não
+# pina setuptools — é dependência transitiva implícita do Scrapy. Numa
+# venv nova, o setuptools do ensurepip às vezes já satisfaz isso sem
+# baixar nada; em outras (varia por patch do Python/pip instalados),
+# o pip tenta buscar uma versão nova, sem hash, e o --require-hashes
+# rejeita com "must have their versions pinned with ==". Pinamos aqui
+# pra tornar o resultado determinístico entre máquinas.
+SETUPTOOLS_PIN = "setuptools==79.0.1"
+
+_INTERPRETER_ID = "import platform, sys; print(platform.python_version(), sys.platform, platform.machine())"
+
+
+def _interpreter_id(python_bin: str | Path) -> str | None:
+    return pc.capture([str(python_bin), "-c", _INTERPRETER_ID])
+
+
+def _pip_install_offline(pip: Path, *args: str, quiet: bool = False) -> bool:
+    """`pip install` só do wheelhouse (sem rede). Com quiet, a tentativa é
+    especulativa: a falha (algo faltando no wheelhouse) não polui a saída."""
+    output = subprocess.DEVNULL if quiet else None
+    cmd = [str(pip), "install", "--no-index", "--find-links", str(WHEELHOUSE_DIR), *args]
+    return pc.run(cmd, check=False, stdout=output, stderr=output).returncode == 0
+
+
+def _fill_wheelhouse(pip: Path, *args: str) -> None:
+    """Baixa pro wheelhouse o que faltar (arquivos já presentes não são
+    baixados de novo). `pip download` em vez de `pip wheel`: guarda as
+    distribuições originais, cujos hashes batem com o requirements.txt —
+    wheels compilados localmente seriam rejeitados pelo --require-hashes."""
+    pc.run([str(pip), "download", "--dest", str(WHEELHOUSE_DIR), "--find-links", str(WHEELHOUSE_DIR), *args])
+
+
+def _install_from_wheelhouse(pip: Path, *args: str) -> None:
+    if _pip_install_offline(pip, *args, quiet=True):
+        return
+    pc.log("Baixando para o wheelhouse o que ainda não está em cache...")
+    _fill_wheelhouse(pip, *[a for a in args if a != "--upgrade"])
+    if not _pip_install_offline(pip, *args):
+        pc.err(f"Instalação a partir do wheelhouse ({WHEELHOUSE_DIR}) falhou — veja o erro acima.")
+
+
+def setup_venv(qd_dir: Path, force: bool = False) -> None:
     dc_dir = data_collection_dir(qd_dir)
     requirements = dc_dir / "requirements.txt"
     if not requirements.exists():
         pc.err(f"requirements.txt não encontrado em {requirements} — confira QD_DIR.")
 
     python_bin = pc.find_python(COMPATIBLE_PYTHON_VERSIONS)
-    pc.info(f"Usando interpretador: {python_bin}")
-    pc.log(f"Criando venv em {venv_dir(qd_dir)}...")
-    pc.run([python_bin, "-m", "venv", str(venv_dir(qd_dir))])
-
+    interpreter = _interpreter_id(python_bin) or python_bin
+    key = pc.fingerprint(requirements, SETUPTOOLS_PIN, interpreter)
+    marker = venv_dir(qd_dir) / SETUP_MARKER
+    venv_ok = venv_python(qd_dir).exists() and _interpreter_id(venv_python(qd_dir)) == interpreter
+    if venv_ok and not force:
+        try:
+            if marker.read_text(encoding="utf-8").strip() == key:
+                pc.info("Ambiente dos raspadores já atualizado (requirements.txt e interpretador inalterados).")
+                return
+        except OSError:
+            pass
+
+    pc.info(f"Usando interpretador: {python_bin} ({interpreter})")
+    if venv_ok:
+        pc.log(f"Atualizando venv existente em {venv_dir(qd_dir)}...")
+    else:
+        pc.log(f"Criando venv em {venv_dir(qd_dir)}...")
+        pc.run([python_bin, "-m", "venv", "--clear", str(venv_dir(qd_dir))])
+    marker.unlink(missing_ok=True)
+
+    WHEELHOUSE_DIR.mkdir(parents=True, exist_ok=True)
     pip = venv_bin(qd_dir) / pc.exe("pip")
-    pc.run([str(pip), "install", "--upgrade", "pip"])
-    # requirements.txt usa --hash (modo --require-hashes do pip), mas não
-    # pina setuptools — é dependência transitiva implícita do Scrapy. Numa
-    # venv nova, o setuptools do ensurepip às vezes já satisfaz isso sem
-    # baixar nada; em outras (varia por patch do Python/pip instalados),
-    # o pip tenta buscar uma versão nova, sem hash, e o --require-hashes
-    # rejeita com "must have their versions pinned with ==". Pinamos aqui
-    # pra tornar o resultado determinístico entre máquinas.
-    pc.run([str(pip), "install", "setuptools==79.0.1"])
-    pc.run([str(pip), "install", "-r", str(requirements)])
+    _install_from_wheelhouse(pip, "--upgrade", "pip", SETUPTOOLS_PIN)
+    _install_from_wheelhouse(pip, "-r", str(requirements))
+    marker.write_text(key, encoding="utf-8")
     pc.log("Ambiente dos raspadores pronto.")
 
 
 def cmd_setup(args: argparse.Namespace) -> None:
-    setup_venv(args.qd_dir)
+    setup_venv(args.qd_dir, force=args.force)
 
 
 def _require_venv(qd_dir: Path) -> Path:
@@ -98,10 +174,42 @@ def _require_venv(qd_dir: Path) -> Path:
     return scrapy
 
 
+@functools.lru_cache(maxsize=None)
+def _spider_index(dc_dir: Path) -> dict[str, spider_index.Spider]:
+    """Índice estático dos spiders (ver spider_index.py) — lido uma vez por
+    execução; entre execuções, só arquivos alterados são reparseados."""
+    return spider_index.load(dc_dir / "gazette" / "spiders")
+
+
+def _require_index(dc_dir: Path) -> dict[str, spider_index.Spider]:
+    spiders = _spider_index(dc_dir)
+    if not spiders:
+        pc.err(f"Nenhum spider encontrado em {dc_dir / 'gazette' / 'spiders'} — confira QD_DIR.")
+    return spiders
+
+
 def cmd_list(args: argparse.Namespace) -> None:
     qd_dir = args.qd_dir
-    scrapy = _require_venv(qd_dir)
-    pc.run([str(scrapy), "list"], cwd=str(data_collection_dir(qd_dir)))
+    dc_dir = data_collection_dir(qd_dir)
+    if args.scrapy:
+        # Caminho antigo: importa todos os módulos (lento, mas é a fonte da verdade).
+        scrapy = _require_venv(qd_dir)
+        pc.run([str(scrapy), "list"], cwd=str(dc_dir))
+        return
+
+    spiders = spider_index.select(_require_index(dc_dir), states=args.state, zyte=args.zyte)
+    if args.json:
+        print(json.dumps([spider_index.as_dict(s) for s in spiders], indent=2, ensure_ascii=False))
+    elif args.details:
+        width = max([len("spider"), *(len(s.name) for s in spiders)])
+        print(f"{'spider':<{width}}  {'início':<10}  {'zyte':<4}  {'territórios':<11}  arquivo")
+        for s in spiders:
+            territories = ",".join(s.territory_ids) or "-"
+            zyte = "sim" if s.zyte else ""
+            print(f"{s.name:<{width}}  {s.start_date or '-':<10}  {zyte:<4}  {territories:<11}  {s.file}")
+    else:
+        for s in spiders:
+            print(s.name)
 
 
 def _load_local_env(dc_dir: Path) -> dict:
@@ -119,12 +227,13 @@ def _load_local_env(dc_dir: Path) -> dict:
 
 
 def _cluster_service_reachable(svc: str) -> bool:
-    return pc.run_ok(["kubectl", "get", "svc", svc, "-n", NAMESPACE])
+    return pc.kube_exists("services", svc, NAMESPACE)
 
 
 def _auto_database_env() -> dict | None:
-    user = pc.get_secret_value("app-secret", "QD_DATA_DB_USER", NAMESPACE)
-    password = pc.get_secret_value("app-secret", "QD_DATA_DB_PASSWORD", NAMESPACE)
+    secret = pc.get_secret("app-secret", NAMESPACE) or {}
+    user = secret.get("QD_DATA_DB_USER")
+    password = secret.get("QD_DATA_DB_PASSWORD")
     if not user or not password:
         return None
     return {
@@ -135,9 +244,10 @@ def _auto_database_env() -> dict | None:
 
 
 def _auto_storage_env() -> dict | None:
-    key = pc.get_secret_value("app-secret", "STORAGE_ACCESS_KEY", NAMESPACE)
-    secret = pc.get_secret_value("app-secret", "STORAGE_ACCESS_SECRET", NAMESPACE)
-    bucket = pc.get_secret_value("app-secret", "STORAGE_BUCKET", NAMESPACE)
+    app_secret = pc.get_secret("app-secret", NAMESPACE) or {}
+    key = app_secret.get("STORAGE_ACCESS_KEY")
+    secret = app_secret.get("STORAGE_ACCESS_SECRET")
+    bucket = app_secret.get("STORAGE_BUCKET")
     if not key or not secret or not bucket:
         return None
     return {
@@ -157,31 +267,39 @@ AUTO_CONNECTORS = [
 ]
 
 
-def _run_scrapy(cmd: list, dc_dir: Path, env: dict) -> None:
-    """Roda um comando scrapy, conectando automaticamente aos serviços do
-    cluster kind local (Postgres, Garage/S3) via port-forward temporário,
-    pra cada um cuja env var indicadora ainda não estiver configurada — seja
-    em `.local.env`, seja no ambiente. Configuração manual sempre tem
-    prioridade (ex: pra apontar pra outro ambiente, como o Revoada)."""
-    with ExitStack() as stack:
-        for label, marker_key, svc, local_port, remote_port, env_builder in AUTO_CONNECTORS:
-            if env.get(marker_key):
-                continue
-            if not _cluster_service_reachable(svc):
-                pc.info(
-                    f"Cluster kind local não encontrado (svc/{svc}) — rodando sem conexão "
-                    f"automática ao {label}. Configure {marker_key} em .local.env se precisar "
-                    "apontar pra outro ambiente."
-                )
-                continue
-            extra_env = env_builder()
-            if not extra_env:
-                pc.warn(f"Não consegui ler credenciais do secret app-secret pra {label} — pulando auto-conexão.")
-                continue
-            pc.info(f"Conectando automaticamente ao {label} do cluster local (svc/{svc})...")
-            stack.enter_context(pc.PortForward(svc, local_port, remote_port, NAMESPACE))
-            env.update(extra_env)
+@contextmanager
+def _cluster_connections(env: dict) -> Iterator[dict]:
+    """Conecta automaticamente aos serviços do cluster kind local (Postgres,
+    Garage/S3) via port-forward temporário, pra cada um cuja env var
+    indicadora ainda não estiver configurada — seja em `.local.env`, seja no
+    ambiente. Configuração manual sempre tem prioridade (ex: pra apontar pra
+    outro ambiente, como o Revoada). Devolve `env` completado; os
+    port-forwards (abertos juntos) ficam abertos até o fim do bloco `with`."""
+    forwards = []
+    for label, marker_key, svc, local_port, remote_port, env_builder in AUTO_CONNECTORS:
+        if env.get(marker_key):
+            continue
+        if not _cluster_service_reachable(svc):
+            pc.info(
+                f"Cluster kind local não encontrado (svc/{svc}) — rodando sem conexão "
+                f"automática ao {label}. Configure {marker_key} em .local.env se precisar "
+                "apontar pra outro ambiente."
+            )
+            continue
+        extra_env = env_builder()
+        if not extra_env:
+            pc.warn(f"Não consegui ler credenciais do secret app-secret pra {label} — pulando auto-conexão.")
+            continue
+        pc.info(f"Conectando automaticamente ao {label} do cluster local (svc/{svc})...")
+        forwards.append(pc.PortForward(svc, local_port, remote_port, NAMESPACE))
+        env.update(extra_env)
+    with pc.port_forwards(forwards):
+        yield env
+
 
+def _run_scrapy(cmd: list, dc_dir: Path, env: dict) -> None:
+    """Roda um comando scrapy com a auto-conexão ao cluster local."""
+    with _cluster_connections(env):
         pc.run(cmd, cwd=str(dc_dir), env=env)
 
 
@@ -190,14 +308,37 @@ def _spider_requires_zyte(dc_dir: Path, spider_name: str) -> bool:
     proteção anti-bot em sites específicos, exigindo uma API key real do
     Zyte Smart Proxy (serviço pago) — sem ela, `ZYTE_SMARTPROXY_APIKEY` fica
     no placeholder hardcoded em settings.py (não configurável via
-    .local.env) e toda requisição falha com "Proxy Authentication Required"."""
-    matches = list((dc_dir / "gazette" / "spiders").rglob(f"{spider_name}.py"))
-    if not matches:
-        return False
-    try:
-        return "zyte_smartproxy_enabled = True" in matches[0].read_text(encoding="utf-8")
-    except OSError:
-        return False
+    .local.env) e toda requisição falha com "Proxy Authentication Required".
+    A flag pode vir de uma classe base — o índice resolve a herança."""
+    spider = _spider_index(dc_dir).get(spider_name)
+    return spider is not None and spider.zyte
+
+
+def _check_spider(dc_dir: Path, spider_name: str) -> None:
+    """Avisos antes de crawlear: nome fora do índice (provável erro de
+    digitação — o Scrapy só acusaria depois de importar tudo) e Zyte."""
+    spiders = _spider_index(dc_dir)
+    if spiders and spider_name not in spiders:
+        close = difflib.get_close_matches(spider_name, list(spiders), n=3)
+        hint = f" Você quis dizer: {', '.join(close)}?" if close else ""
+        pc.warn(f"'{spider_name}' não encontrado em gazette/spiders.{hint}")
+    if _spider_requires_zyte(dc_dir, spider_name):
+        pc.warn(
+            f"'{spider_name}' usa zyte_smartproxy_enabled=True (proteção anti-bot do site). "
+            "ZYTE_SMARTPROXY_APIKEY é um placeholder hardcoded em settings.py, sem suporte a "
+            ".local.env — sem uma API key real do Zyte, as requisições vão falhar com "
+            "'Proxy Authentication Required'. Isso é uma limitação do repo querido-diario, "
+            "não do ambiente local."
+        )
+
+
+def _crawl_cmd(scrapy: Path, spider_name: str, start: str | None, end: str | None) -> list:
+    cmd = [str(scrapy), "crawl", spider_name]
+    if start:
+        cmd += ["-a", f"start={start}"]
+    if end:
+        cmd += ["-a", f"end={end}"]
+    return cmd
 
 
 def cmd_run(args: argparse.Namespace) -> None:
@@ -206,24 +347,507 @@ def cmd_run(args: argparse.Namespace) -> None:
     qd_dir = args.qd_dir
     scrapy = _require_venv(qd_dir)
     dc_dir = data_collection_dir(qd_dir)
+
+    _check_spider(dc_dir, args.spider)
+    if args.shard_by:
+        run_sharded(args, scrapy, dc_dir)
+        return
     env = _load_local_env(dc_dir)
+    _run_scrapy(_crawl_cmd(scrapy, args.spider, args.start, args.end), dc_dir, env)
 
-    if _spider_requires_zyte(dc_dir, args.spider):
-        pc.warn(
-            f"'{args.spider}' usa zyte_smartproxy_enabled=True (proteção anti-bot do site). "
-            "ZYTE_SMARTPROXY_APIKEY é um placeholder hardcoded em settings.py, sem suporte a "
-            ".local.env — sem uma API key real do Zyte, as requisições vão falhar com "
-            "'Proxy Authentication Required'. Isso é uma limitação do repo querido-diario, "
-            "não do ambiente local."
+
+# ─── run-many: vários spiders em paralelo ────────────────────────────────────
+#
+# Um conjunto só de port-forwards (Postgres/Garage) pra todos os crawls, até
+# --jobs processos scrapy simultâneos, e os spiders mais demorados (pelo
+# histórico de execuções anteriores) começando primeiro — assim o mais
+# longo não fica sozinho no fim, com o resto do pool ocioso.
+
+DURATIONS_FILE = pc.CACHE_DIR / "spider-durations.json"
+RUN_LOGS_DIR = pc.CACHE_DIR / "spider-logs"
+DEFAULT_JOBS = 4
+
+# Linhas do dump de estatísticas que o Scrapy imprime ao terminar.
+_STAT_ITEMS = re.compile(r"'item_scraped_count':\s*(\d+)")
+_STAT_ERRORS = re.compile(r"'log_count/ERROR':\s*(\d+)")
+
+
+@dataclass
+class _CrawlResult:
+    """Um `scrapy crawl` do pool: spider inteiro (run-many) ou uma janela de
+    datas de um spider (run --shard-by)."""
+
+    label: str
+    cmd: list
+    log: Path
+    returncode: int | None = None
+    items: int = 0
+    errors: int = 0
+    seconds: float = 0.0
+
+
+def _load_durations() -> dict[str, float]:
+    try:
+        return json.loads(DURATIONS_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_durations(durations: dict[str, float]) -> None:
+    DURATIONS_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = DURATIONS_FILE.with_suffix(".tmp")
+    tmp.write_text(json.dumps(durations, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, DURATIONS_FILE)
+
+
+def _resolve_spiders(
+    patterns: list[str],
+    spiders_file: Path | None,
+    dc_dir: Path,
+    states: list[str] | None = None,
+    zyte: bool | None = None,
+) -> list[str]:
+    """Nomes e globs (ex: `sp_*`) da linha de comando e do arquivo, na ordem,
+    sem repetição. Globs são expandidos contra o índice de spiders. Com
+    --state/--zyte, globs são filtrados por eles; sem nenhum nome/glob, os
+    filtros sozinhos selecionam do índice inteiro."""
+    wanted = list(patterns)
+    if spiders_file is not None:
+        try:
+            lines = spiders_file.read_text(encoding="utf-8").splitlines()
+        except OSError as e:
+            pc.err(f"Não foi possível ler {spiders_file}: {e}")
+        wanted += [line.split("#", 1)[0].strip() for line in lines]
+    wanted = [w for w in wanted if w]
+    filtered = bool(states) or zyte is not None
+    if not wanted and not filtered:
+        pc.err("Informe spiders (nomes ou globs), --file ou --state.   ex: spider.py run-many 'ba_*' sp_campinas")
+
+    available = [s.name for s in spider_index.select(_require_index(dc_dir), states=states, zyte=zyte)]
+    if not wanted:
+        return available
+    names: list[str] = []
+    for pattern in wanted:
+        if set(pattern) & set("*?["):
+            matched = fnmatch.filter(available, pattern)
+            if not matched:
+                pc.warn(f"Nenhum spider casa com '{pattern}'.")
+            names += matched
+        else:
+            names.append(pattern)
+    return list(dict.fromkeys(names))
+
+
+def _longest_first(names: list[str], durations: dict[str, float]) -> list[str]:
+    """Ordem de execução: spiders sem histórico primeiro (podem ser os mais
+    longos), depois do mais lento pro mais rápido."""
+    return sorted(names, key=lambda n: (n in durations, -durations.get(n, 0.0)))
+
+
+def _parse_stats(log: Path) -> tuple[int, int]:
+    try:
+        text = log.read_text(encoding="utf-8", errors="replace")
+    except OSError:
+        return 0, 0
+    items = _STAT_ITEMS.findall(text)
+    errors = _STAT_ERRORS.findall(text)
+    return int(items[-1]) if items else 0, int(errors[-1]) if errors else 0
+
+
+def _crawl_to_log(result: _CrawlResult, dc_dir: Path, env: dict) -> _CrawlResult:
+    start = time.monotonic()
+    with open(result.log, "w", encoding="utf-8") as out:
+        proc = pc.run(result.cmd, cwd=str(dc_dir), env=env, stdout=out, stderr=subprocess.STDOUT, check=False)
+    result.seconds = time.monotonic() - start
+    result.returncode = proc.returncode
+    result.items, result.errors = _parse_stats(result.log)
+    return result
+
+
+def _run_crawls(
+    crawls: list[_CrawlResult],
+    dc_dir: Path,
+    jobs: int,
+    on_done: Callable[[_CrawlResult], None] | None = None,
+    env: dict | None = None,
+) -> float:
+    """Roda `crawls` (na ordem dada) em até `jobs` processos, todos sob o
+    mesmo conjunto de port-forwards — os de `env`, se o chamador já estiver
+    dentro de _cluster_connections(), ou abertos aqui. `on_done` é chamado
+    (serializado) a cada crawl que termina. Devolve o tempo de parede."""
+    jobs = max(1, min(jobs, len(crawls)))
+    done = 0
+    lock = threading.Lock()
+
+    def crawl(result: _CrawlResult) -> None:
+        nonlocal done
+        _crawl_to_log(result, dc_dir, env)
+        with lock:
+            done += 1
+            outcome = "ok" if result.returncode == 0 else f"falhou (código {result.returncode})"
+            pc.info(f"[{done}/{len(crawls)}] {result.label}: {outcome}, {result.items} itens, {result.seconds:.0f}s")
+            if on_done is not None:
+                on_done(result)
+
+    t0 = time.monotonic()
+    with ExitStack() as stack:
+        if env is None:
+            env = stack.enter_context(_cluster_connections(_load_local_env(dc_dir)))
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            list(pool.map(pc.bind_step(crawl), crawls))
+    return time.monotonic() - t0
+
+
+def _print_crawl_table(results: list[_CrawlResult], wall: float, heading: str = "spider") -> None:
+    width = max([len(heading), *(len(r.label) for r in results)])
+    print()
+    print(f"  {heading:<{width}}  {'status':<10} {'itens':>7} {'erros':>6} {'tempo':>8}")
+    for r in results:
+        status = "ok" if r.returncode == 0 else f"falhou ({r.returncode})"
+        print(f"  {r.label:<{width}}  {status:<10} {r.items:>7} {r.errors:>6} {r.seconds:7.0f}s")
+    total_items = sum(r.items for r in results)
+    total_errors = sum(r.errors for r in results)
+    print(f"  {'total':<{width}}  {'':<10} {total_items:>7} {total_errors:>6} {wall:7.0f}s (parede)")
+    print()
+
+
+def _new_log_dir() -> Path:
+    log_dir = RUN_LOGS_DIR / time.strftime("%Y%m%d-%H%M%S")
+    log_dir.mkdir(parents=True, exist_ok=True)
+    return log_dir
+
+
+def cmd_run_many(args: argparse.Namespace) -> None:
+    qd_dir = args.qd_dir
+    scrapy = _require_venv(qd_dir)
+    dc_dir = data_collection_dir(qd_dir)
+    names = _resolve_spiders(args.spiders, args.file, dc_dir, states=args.state, zyte=args.zyte)
+    if not names:
+        pc.err("Nenhum spider selecionado.")
+    for name in names:
+        _check_spider(dc_dir, name)
+
+    durations = _load_durations()
+    log_dir = _new_log_dir()
+    results = [
+        _CrawlResult(name, _crawl_cmd(scrapy, name, args.start, args.end), log_dir / f"{name}.log")
+        for name in _longest_first(names, durations)
+    ]
+    pc.log(f"Rodando {len(results)} spider(s), até {args.jobs} em paralelo — logs em {log_dir}")
+    wall = _run_crawls(results, dc_dir, args.jobs)
+
+    for r in results:
+        if r.returncode == 0:
+            durations[r.label] = round(r.seconds, 1)
+    _save_durations(durations)
+
+    _print_crawl_table(results, wall)
+    failed = [r for r in results if r.returncode != 0]
+    if failed:
+        pc.err(f"{len(failed)} spider(s) falharam — veja os logs em {log_dir}")
+
+
+# ─── run --shard-by: backfill de um spider em janelas de datas ─────────────
+#
+# Um backfill de vários anos vira uma janela por mês (ou ano), crawleadas
+# em paralelo. Cada janela concluída vai pro checkpoint em CACHE_DIR, então
+# rodar o mesmo comando de novo depois de uma interrupção (ou falha) só
+# crawleia as janelas que faltam. O checkpoint não depende do fim do
+# intervalo (que por padrão é hoje, e mudaria a cada dia): cada janela
+# guarda até que data foi crawleada, e a janela ainda aberta (que chega a
+# hoje) nunca é marcada como concluída.
+
+CHECKPOINT_DIR = pc.CACHE_DIR / "spider-checkpoints"
+
+
+def _date_windows(start: date, end: date, shard_by: str) -> list[tuple[date, date]]:
+    """Janelas [início, fim] (inclusive) por mês ou ano civil, recortadas ao
+    intervalo pedido."""
+    windows = []
+    cursor = start
+    while cursor <= end:
+        if shard_by == "year":
+            next_start = date(cursor.year + 1, 1, 1)
+        elif cursor.month == 12:
+            next_start = date(cursor.year + 1, 1, 1)
+        else:
+            next_start = date(cursor.year, cursor.month + 1, 1)
+        windows.append((cursor, min(end, next_start - timedelta(days=1))))
+        cursor = next_start
+    return windows
+
+
+def _window_label(window: tuple[date, date], shard_by: str) -> str:
+    return str(window[0].year) if shard_by == "year" else window[0].strftime("%Y-%m")
+
+
+def _checkpoint_path(spider_name: str, start: date, shard_by: str) -> Path:
+    return CHECKPOINT_DIR / f"{spider_name}_{start.isoformat()}_{shard_by}.json"
+
+
+def _load_checkpoint(path: Path) -> dict[str, str]:
+    """Janela -> último dia crawleado dela (ISO)."""
+    try:
+        done = json.loads(path.read_text(encoding="utf-8")).get("done", {})
+    except (OSError, ValueError, AttributeError):
+        return {}
+    return done if isinstance(done, dict) else {}
+
+
+def _save_checkpoint(path: Path, done: dict[str, str]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"done": dict(sorted(done.items()))}, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _parse_date(value: str, flag: str) -> date:
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        pc.err(f"{flag} inválido: '{value}' (use YYYY-MM-DD)")
+
+
+def run_sharded(args: argparse.Namespace, scrapy: Path, dc_dir: Path) -> None:
+    if not args.start:
+        pc.err("--shard-by exige --start (o fim padrão é hoje).")
+    start = _parse_date(args.start, "--start")
+    end = _parse_date(args.end, "--end") if args.end else date.today()
+    if end < start:
+        pc.err(f"--end ({end}) é anterior a --start ({start}).")
+
+    checkpoint = _checkpoint_path(args.spider, start, args.shard_by)
+    if args.restart:
+        checkpoint.unlink(missing_ok=True)
+    done = _load_checkpoint(checkpoint)
+    windows = _date_windows(start, end, args.shard_by)
+    # Janela crawleada só até um --end anterior conta como pendente.
+    pending = [w for w in windows if done.get(_window_label(w, args.shard_by), "") < w[1].isoformat()]
+    if not pending:
+        pc.info(
+            f"Todas as {len(windows)} janela(s) de {args.spider} entre {start} e {end} já foram concluídas "
+            f"(checkpoint {checkpoint}). Use --restart para crawlear de novo."
+        )
+        return
+    if len(pending) < len(windows):
+        pc.info(f"Retomando do checkpoint: {len(windows) - len(pending)} de {len(windows)} janela(s) já concluídas.")
+
+    log_dir = _new_log_dir()
+    results = [
+        _CrawlResult(
+            _window_label(w, args.shard_by),
+            _crawl_cmd(scrapy, args.spider, w[0].isoformat(), w[1].isoformat()),
+            log_dir / f"{args.spider}_{_window_label(w, args.shard_by)}.log",
         )
+        for w in pending
+    ]
+    window_end = {_window_label(w, args.shard_by): w[1] for w in pending}
+    today = date.today()
+
+    def record(result: _CrawlResult) -> None:
+        # A janela que chega a hoje ainda pode ganhar diários: fica pendente.
+        if result.returncode == 0 and window_end[result.label] < today:
+            done[result.label] = window_end[result.label].isoformat()
+            _save_checkpoint(checkpoint, done)
+
+    pc.log(
+        f"Crawleando {args.spider} em {len(results)} janela(s) ({args.shard_by}), até {args.jobs} em paralelo "
+        f"— logs em {log_dir}"
+    )
+    wall = _run_crawls(results, dc_dir, args.jobs, on_done=record)
+    _print_crawl_table(results, wall, heading="janela")
+    failed = [r for r in results if r.returncode != 0]
+    if failed:
+        pc.err(
+            f"{len(failed)} janela(s) falharam ({', '.join(r.label for r in failed)}) — veja os logs em {log_dir}. "
+            "Rode o mesmo comando de novo para crawlear só as que faltam."
+        )
+
+
+# ─── backfill: crawleia só as lacunas do banco ──────────────────────────────
+#
+# Em vez de recrawlear o intervalo inteiro, consulta na tabela `gazettes`
+# quais datas já existem pra cada território do spider (via
+# territory_spider_map, populada pelo qd-sync-spiders) e crawleia só os
+# buracos. Diários não saem todo dia (fins de semana, feriados, municípios
+# que publicam 1x por semana), então só conta como lacuna um trecho sem
+# nenhuma edição maior que --min-gap dias; lacunas separadas por menos de
+# --merge-within dias viram um crawl só, pra não disparar dezenas de crawls
+# minúsculos contra o site da prefeitura.
+#
+# A consulta roda no python do venv dos raspadores (que já tem SQLAlchemy e
+# o driver do Postgres), com a mesma QUERIDODIARIO_DATABASE_URL que o crawl
+# usa — a do cluster local via port-forward, ou a configurada em .local.env.
+
+DEFAULT_MIN_GAP_DAYS = 7
+DEFAULT_MERGE_WITHIN_DAYS = 30
+
+_COVERAGE_SCRIPT = """
+import json, os, sys
+from sqlalchemy import create_engine, text
+
+spider = sys.argv[1]
+engine = create_engine(os.environ["QUERIDODIARIO_DATABASE_URL"])
+with engine.connect() as conn:
+    date_from = conn.execute(
+        text("SELECT date_from FROM querido_diario_spiders WHERE spider_name = :s"), {"s": spider}
+    ).scalar()
+    territories = [
+        row[0] for row in conn.execute(
+            text("SELECT territory_id FROM territory_spider_map WHERE spider_name = :s"), {"s": spider}
+        )
+    ]
+    rows = conn.execute(
+        text(
+            "SELECT DISTINCT g.territory_id, g.date FROM gazettes g "
+            "JOIN territory_spider_map m ON m.territory_id = g.territory_id "
+            "WHERE m.spider_name = :s ORDER BY 1, 2"
+        ),
+        {"s": spider},
+    )
+    dates = {}
+    for territory, day in rows:
+        dates.setdefault(territory, []).append(day.isoformat())
+print(json.dumps({
+    "date_from": date_from.isoformat() if date_from else None,
+    "territories": {t: dates.get(t, []) for t in territories},
+}))
+"""
 
-    cmd = [str(scrapy), "crawl", args.spider]
-    if args.start:
-        cmd += ["-a", f"start={args.start}"]
-    if args.end:
-        cmd += ["-a", f"end={args.end}"]
 
-    _run_scrapy(cmd, dc_dir, env)
+def _gazette_coverage(qd_dir: Path, dc_dir: Path, env: dict, spider_name: str) -> dict:
+    """{"date_from": ..., "territories": {territory_id: [datas ISO]}} do spider."""
+    if not env.get("QUERIDODIARIO_DATABASE_URL"):
+        pc.err(
+            "Sem conexão com o banco: suba o cluster local (make k8s-local-up) ou configure "
+            "QUERIDODIARIO_DATABASE_URL em .local.env."
+        )
+    result = pc.run(
+        [str(venv_python(qd_dir)), "-c", _COVERAGE_SCRIPT, spider_name],
+        cwd=str(dc_dir),
+        env=env,
+        stdout=subprocess.PIPE,
+        check=False,
+        text=True,
+    )
+    if result.returncode != 0:
+        pc.err("Consulta às edições existentes (tabela gazettes) falhou — veja o erro acima.")
+    try:
+        return json.loads(result.stdout.strip().splitlines()[-1])
+    except (ValueError, IndexError):
+        pc.err(f"Resposta inesperada da consulta de cobertura: {result.stdout[-200:]!r}")
+
+
+def _missing_intervals(dates: list[date], start: date, end: date, min_gap: int) -> list[tuple[date, date]]:
+    """Trechos de [start, end] sem edição por mais de `min_gap` dias seguidos."""
+    intervals = []
+    previous = start - timedelta(days=1)
+    for day in [d for d in sorted(dates) if start <= d <= end] + [end + timedelta(days=1)]:
+        gap_start, gap_end = previous + timedelta(days=1), day - timedelta(days=1)
+        if (gap_end - gap_start).days + 1 > min_gap:
+            intervals.append((gap_start, gap_end))
+        previous = day
+    return intervals
+
+
+def _merge_intervals(intervals: list[tuple[date, date]], within: int) -> list[tuple[date, date]]:
+    """Une intervalos que se sobrepõem ou estão a até `within` dias um do outro."""
+    merged: list[tuple[date, date]] = []
+    for first, last in sorted(intervals):
+        if merged and (first - merged[-1][1]).days <= within + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+        else:
+            merged.append((first, last))
+    return merged
+
+
+def plan_backfill(
+    coverage: dict, start: date, end: date, min_gap: int, merge_within: int
+) -> list[tuple[date, date, list[str]]]:
+    """Intervalos a crawlear (unindo as lacunas de todos os territórios do
+    spider) e os territórios com lacuna em cada um."""
+    gaps: list[tuple[date, date, str]] = []
+    for territory, days in coverage["territories"].items():
+        parsed = [date.fromisoformat(d) for d in days]
+        gaps += [(a, b, territory) for a, b in _missing_intervals(parsed, start, end, min_gap)]
+    plan = []
+    for first, last in _merge_intervals([(a, b) for a, b, _ in gaps], merge_within):
+        territories = sorted({t for a, b, t in gaps if a <= last and b >= first})
+        plan.append((first, last, territories))
+    return plan
+
+
+def cmd_backfill(args: argparse.Namespace) -> None:
+    qd_dir = args.qd_dir
+    scrapy = _require_venv(qd_dir)
+    dc_dir = data_collection_dir(qd_dir)
+    _check_spider(dc_dir, args.spider)
+
+    with _cluster_connections(_load_local_env(dc_dir)) as env:
+        pc.log(f"Consultando edições já existentes de {args.spider} no banco...")
+        coverage = _gazette_coverage(qd_dir, dc_dir, env, args.spider)
+        if not coverage["territories"]:
+            pc.err(
+                f"'{args.spider}' não tem territórios em territory_spider_map — o spider existe? "
+                "Sincronize com `scrapy qd-sync-spiders` (o make k8s-local-up já faz isso)."
+            )
+        indexed = _spider_index(dc_dir).get(args.spider)
+        if args.start:
+            start = _parse_date(args.start, "--start")
+        elif coverage.get("date_from"):
+            start = date.fromisoformat(coverage["date_from"])
+        elif indexed is not None and indexed.start_date:
+            start = date.fromisoformat(indexed.start_date)
+            pc.info(f"Sem date_from no banco — usando o start_date do código do spider ({start}).")
+        else:
+            pc.err(f"Sem date_from para '{args.spider}' em querido_diario_spiders — informe --start.")
+        end = _parse_date(args.end, "--end") if args.end else date.today()
+
+        plan = plan_backfill(coverage, start, end, args.min_gap, args.merge_within)
+        total_days = (end - start).days + 1
+        gap_days = sum((b - a).days + 1 for a, b, _ in plan)
+        if not plan:
+            pc.info(
+                f"Nenhuma lacuna maior que {args.min_gap} dia(s) entre {start} e {end} "
+                f"({len(coverage['territories'])} território(s)). Nada a crawlear."
+            )
+            return
+        pc.info(
+            f"{len(plan)} intervalo(s) a crawlear, {gap_days} de {total_days} dias "
+            f"({len(coverage['territories'])} território(s)):"
+        )
+        for first, last, territories in plan:
+            print(f"    {first} .. {last}  ({(last - first).days + 1} dias; territórios: {', '.join(territories)})")
+        if args.dry_run:
+            return
+
+        log_dir = _new_log_dir()
+        results = [
+            _CrawlResult(
+                f"{first}..{last}",
+                _crawl_cmd(scrapy, args.spider, first.isoformat(), last.isoformat()),
+                log_dir / f"{args.spider}_{first}_{last}.log",
+            )
+            for first, last, _ in plan
+        ]
+        pc.log(f"Crawleando {len(results)} intervalo(s), até {args.jobs} em paralelo — logs em {log_dir}")
+        wall = _run_crawls(results, dc_dir, args.jobs, env=env)
+
+    _print_crawl_table(results, wall, heading="intervalo")
+    failed = [r for r in results if r.returncode != 0]
+    if failed:
+        pc.err(f"{len(failed)} intervalo(s) falharam — veja os logs em {log_dir}")
+
+
+def _add_filter_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--state", action="append", default=None, metavar="UF",
+        help="Só spiders da UF (prefixo do nome, ex: sp); pode repetir",
+    )
+    parser.add_argument(
+        "--zyte", action=argparse.BooleanOptionalAction, default=None,
+        help="Só spiders que usam (--zyte) ou não usam (--no-zyte) o Zyte Smart Proxy",
+    )
 
 
 def main() -> None:
@@ -241,18 +865,77 @@ def main() -> None:
     parser = argparse.ArgumentParser(description=__doc__, parents=[qd_dir_parser])
     sub = parser.add_subparsers(dest="command", required=True)
 
-    sub.add_parser("setup", help="Cria venv e instala dependências", parents=[qd_dir_parser])
-    sub.add_parser("list", help="Lista os raspadores disponíveis", parents=[qd_dir_parser])
+    setup_parser = sub.add_parser("setup", help="Cria venv e instala dependências", parents=[qd_dir_parser])
+    setup_parser.add_argument(
+        "--force", action="store_true", help="Reinstala mesmo com requirements.txt inalterado"
+    )
+    list_parser = sub.add_parser("list", help="Lista os raspadores disponíveis", parents=[qd_dir_parser])
+    _add_filter_args(list_parser)
+    list_format = list_parser.add_mutually_exclusive_group()
+    list_format.add_argument(
+        "--details", action="store_true", help="Tabela com início, Zyte, territórios e arquivo"
+    )
+    list_format.add_argument("--json", action="store_true", help="Índice completo em JSON")
+    list_format.add_argument(
+        "--scrapy", action="store_true", help="Usa `scrapy list` (importa todos os spiders; lento)"
+    )
 
     run_parser = sub.add_parser("run", help="Executa um raspador", parents=[qd_dir_parser])
     run_parser.add_argument("spider")
     run_parser.add_argument("--start", default=None)
     run_parser.add_argument("--end", default=None)
+    run_parser.add_argument(
+        "--shard-by", choices=["month", "year"], default=None,
+        help="Divide o intervalo em janelas crawleadas em paralelo, com checkpoint",
+    )
+    run_parser.add_argument(
+        "--jobs", type=int, default=DEFAULT_JOBS, help=f"Janelas simultâneas com --shard-by (padrão: {DEFAULT_JOBS})"
+    )
+    run_parser.add_argument(
+        "--restart", action="store_true", help="Com --shard-by, ignora o checkpoint e crawleia todas as janelas"
+    )
+
+    many_parser = sub.add_parser(
+        "run-many", help="Executa vários raspadores em paralelo", parents=[qd_dir_parser]
+    )
+    many_parser.add_argument("spiders", nargs="*", help="Nomes ou globs (ex: 'ba_*')")
+    many_parser.add_argument("--file", type=Path, default=None, help="Arquivo com um spider (ou glob) por linha")
+    _add_filter_args(many_parser)
+    many_parser.add_argument(
+        "--jobs", type=int, default=DEFAULT_JOBS, help=f"Crawls simultâneos (padrão: {DEFAULT_JOBS})"
+    )
+    many_parser.add_argument("--start", default=None)
+    many_parser.add_argument("--end", default=None)
+
+    backfill_parser = sub.add_parser(
+        "backfill", help="Crawleia só as datas ausentes no banco", parents=[qd_dir_parser]
+    )
+    backfill_parser.add_argument("spider")
+    backfill_parser.add_argument("--start", default=None, help="Padrão: date_from do spider")
+    backfill_parser.add_argument("--end", default=None, help="Padrão: hoje")
+    backfill_parser.add_argument(
+        "--min-gap", type=int, default=DEFAULT_MIN_GAP_DAYS,
+        help=f"Dias seguidos sem edição pra contar como lacuna (padrão: {DEFAULT_MIN_GAP_DAYS})",
+    )
+    backfill_parser.add_argument(
+        "--merge-within", type=int, default=DEFAULT_MERGE_WITHIN_DAYS,
+        help=f"Une lacunas a até N dias uma da outra num crawl só (padrão: {DEFAULT_MERGE_WITHIN_DAYS})",
+    )
+    backfill_parser.add_argument(
+        "--jobs", type=int, default=DEFAULT_JOBS, help=f"Crawls simultâneos (padrão: {DEFAULT_JOBS})"
+    )
+    backfill_parser.add_argument("--dry-run", action="store_true", help="Só mostra o plano, sem crawlear")
 
     args = parser.parse_args()
     args.qd_dir = args.qd_dir.resolve()
 
-    {"setup": cmd_setup, "list": cmd_list, "run": cmd_run}[args.command](args)
+    {
+        "setup": cmd_setup,
+        "list": cmd_list,
+        "run": cmd_run,
+        "run-many": cmd_run_many,
+        "backfill": cmd_backfill,
+    }[args.command](args)
 
 
 if __name__ == "__main__":
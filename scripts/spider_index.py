@@ -0,0 +1,197 @@
+"""spider_index.py — Índice estático (AST) dos raspadores do querido-diario.
+
+`scrapy list` importa todos os módulos de gazette/spiders (vários segundos)
+só pra listar nomes. Aqui cada arquivo é lido com `ast`, sem importar nada,
+e o resultado fica em cache (CACHE_DIR/spider-index.json), reparseando só
+os arquivos cujo mtime/tamanho mudou. Atributos herdados de classes base
+(ex: `zyte_smartproxy_enabled` ou `start_date` definidos em
+gazette/spiders/base/) são resolvidos pelo nome da classe base.
+
+Usado por spider.py (list, run, run-many, backfill).
+"""
+from __future__ import annotations
+
+import ast
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime
+from pathlib import Path
+
+import pycommon as pc
+
+INDEX_FILE = pc.CACHE_DIR / "spider-index.json"
+INDEX_VERSION = 1
+
+# Atributos de classe extraídos (só valores literais; o resto é ignorado).
+_ATTRS = ("name", "TERRITORY_ID", "start_date", "zyte_smartproxy_enabled")
+
+
+@dataclass
+class Spider:
+    name: str
+    file: str
+    cls: str
+    territory_ids: list[str] = field(default_factory=list)
+    start_date: str | None = None
+    zyte: bool = False
+
+    @property
+    def state(self) -> str:
+        """UF pelo prefixo do nome (`sp_campinas` -> `sp`)."""
+        return self.name.split("_", 1)[0]
+
+
+def _literal(node: ast.AST):
+    """Valor de um literal simples, ou de `date(...)`/`datetime.date(...)`/
+    `datetime(...)` com argumentos inteiros (como string ISO). None se não
+    for avaliável estaticamente."""
+    if isinstance(node, ast.Call):
+        func = node.func
+        func_name = func.attr if isinstance(func, ast.Attribute) else getattr(func, "id", "")
+        if func_name in ("date", "datetime") and all(isinstance(a, ast.Constant) for a in node.args):
+            try:
+                value = (date if func_name == "date" else datetime)(*(a.value for a in node.args))
+            except (TypeError, ValueError):
+                return None
+            return value.date().isoformat() if isinstance(value, datetime) else value.isoformat()
+        return None
+    try:
+        return ast.literal_eval(node)
+    except (ValueError, SyntaxError, TypeError):
+        return None
+
+
+def _base_name(node: ast.AST) -> str | None:
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    return None
+
+
+def parse_file(path: Path) -> list[dict]:
+    """Classes do arquivo: nome, bases (por nome) e atributos literais."""
+    try:
+        tree = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+    except (OSError, SyntaxError, ValueError):
+        return []
+    classes = []
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        attrs = {}
+        for stmt in node.body:
+            if isinstance(stmt, ast.Assign):
+                targets, value = stmt.targets, stmt.value
+            elif isinstance(stmt, ast.AnnAssign) and stmt.value is not None:
+                targets, value = [stmt.target], stmt.value
+            else:
+                continue
+            for target in targets:
+                if isinstance(target, ast.Name) and target.id in _ATTRS:
+                    attrs[target.id] = _literal(value)
+        classes.append({"class": node.name, "bases": [b for b in map(_base_name, node.bases) if b], "attrs": attrs})
+    return classes
+
+
+def _load_cache(spiders_dir: Path) -> dict:
+    try:
+        data = json.loads(INDEX_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != INDEX_VERSION or data.get("root") != str(spiders_dir):
+        return {}
+    return data.get("files", {})
+
+
+def _save_cache(spiders_dir: Path, files: dict) -> None:
+    INDEX_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = INDEX_FILE.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"version": INDEX_VERSION, "root": str(spiders_dir), "files": files}), encoding="utf-8")
+    os.replace(tmp, INDEX_FILE)
+
+
+def _scan(spiders_dir: Path) -> dict:
+    """{arquivo relativo: {"mtime", "size", "classes"}} atualizado: só
+    arquivos novos ou com mtime/tamanho diferentes são reparseados."""
+    cached = _load_cache(spiders_dir)
+    files = {}
+    changed = False
+    for dirpath, dirnames, filenames in os.walk(spiders_dir):
+        dirnames[:] = [d for d in dirnames if not d.startswith((".", "__"))]
+        for filename in filenames:
+            if not filename.endswith(".py"):
+                continue
+            path = Path(dirpath) / filename
+            rel = path.relative_to(spiders_dir).as_posix()
+            st = path.stat()
+            entry = cached.get(rel)
+            if entry is None or entry["mtime"] != st.st_mtime_ns or entry["size"] != st.st_size:
+                entry = {"mtime": st.st_mtime_ns, "size": st.st_size, "classes": parse_file(path)}
+                changed = True
+            files[rel] = entry
+    if changed or files.keys() != cached.keys():
+        _save_cache(spiders_dir, files)
+    return files
+
+
+def _resolve(cls: dict, file: str, by_name: dict[str, list[tuple[str, dict]]], seen: frozenset = frozenset()) -> dict:
+    """Atributos da classe com os herdados das bases (ordem das bases, da
+    esquerda pra direita; os da própria classe têm prioridade)."""
+    merged: dict = {}
+    for base in reversed(cls["bases"]):
+        candidates = by_name.get(base, [])
+        # Mesmo nome em mais de um arquivo: prefere o do próprio arquivo.
+        match = next((c for f, c in candidates if f == file), candidates[0][1] if candidates else None)
+        if match is not None and base not in seen:
+            merged.update(_resolve(match, file, by_name, seen | {cls["class"]}))
+    merged.update({k: v for k, v in cls["attrs"].items() if v is not None})
+    return merged
+
+
+def load(spiders_dir: Path) -> dict[str, Spider]:
+    """Índice {nome do spider: Spider} de `spiders_dir` (vazio se não existir)."""
+    if not spiders_dir.is_dir():
+        return {}
+    files = _scan(spiders_dir)
+    by_name: dict[str, list[tuple[str, dict]]] = {}
+    for rel, entry in files.items():
+        for cls in entry["classes"]:
+            by_name.setdefault(cls["class"], []).append((rel, cls))
+
+    spiders: dict[str, Spider] = {}
+    for rel in sorted(files):
+        for cls in files[rel]["classes"]:
+            own_name = cls["attrs"].get("name")
+            if not isinstance(own_name, str) or not own_name:
+                continue  # classes base não definem `name`
+            attrs = _resolve(cls, rel, by_name)
+            territory = attrs.get("TERRITORY_ID")
+            spiders[own_name] = Spider(
+                name=own_name,
+                file=rel,
+                cls=cls["class"],
+                territory_ids=[str(territory)] if territory else [],
+                start_date=attrs.get("start_date") if isinstance(attrs.get("start_date"), str) else None,
+                zyte=attrs.get("zyte_smartproxy_enabled") is True,
+            )
+    return dict(sorted(spiders.items()))
+
+
+def select(
+    spiders: dict[str, Spider],
+    states: list[str] | None = None,
+    zyte: bool | None = None,
+) -> list[Spider]:
+    """Filtra por UF (prefixo do nome) e/ou pela flag do Zyte."""
+    wanted_states = {s.lower() for s in states or []}
+    return [
+        s
+        for s in spiders.values()
+        if (not wanted_states or s.state in wanted_states) and (zyte is None or s.zyte == zyte)
+    ]
+
+
+def as_dict(spider: Spider) -> dict:
+    return {**asdict(spider), "state": spider.state}